@@ -0,0 +1,63 @@
+-- Conversation summaries for the chat list (replaces per-partner lookups).
+-- After applying, populate from history with: flask backfill-conversations
+
+-- Per-user conversation summaries (one row per user/partner pair), kept
+-- current by the trigger below so the chat list is a single indexed query
+CREATE TABLE conversation_summaries (
+    user_id INT NOT NULL,
+    partner_id INT NOT NULL,
+    last_message_id INT,
+    last_message TEXT,
+    last_sender_id INT,
+    last_message_at TIMESTAMP,
+    unread_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, partner_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (partner_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_conversation_summaries_recent ON conversation_summaries(user_id, last_message_at DESC);
+
+CREATE OR REPLACE FUNCTION update_conversation_summaries() RETURNS TRIGGER AS $$
+BEGIN
+    -- Sender's side: latest message is theirs, so nothing is unread
+    INSERT INTO conversation_summaries
+        (user_id, partner_id, last_message_id, last_message, last_sender_id, last_message_at, unread_count)
+    VALUES
+        (NEW.sender_id, NEW.receiver_id, NEW.message_id, LEFT(NEW.content, 200), NEW.sender_id, NEW.created_at, 0)
+    ON CONFLICT (user_id, partner_id) DO UPDATE SET
+        last_message_id = EXCLUDED.last_message_id,
+        last_message = EXCLUDED.last_message,
+        last_sender_id = EXCLUDED.last_sender_id,
+        last_message_at = EXCLUDED.last_message_at,
+        unread_count = 0
+    WHERE conversation_summaries.last_message_at IS NULL
+       OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at;
+
+    IF NEW.receiver_id <> NEW.sender_id THEN
+        -- Receiver's side: one more unread message
+        INSERT INTO conversation_summaries
+            (user_id, partner_id, last_message_id, last_message, last_sender_id, last_message_at, unread_count)
+        VALUES
+            (NEW.receiver_id, NEW.sender_id, NEW.message_id, LEFT(NEW.content, 200), NEW.sender_id, NEW.created_at, 1)
+        ON CONFLICT (user_id, partner_id) DO UPDATE SET
+            last_message_id = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                     OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                   THEN EXCLUDED.last_message_id ELSE conversation_summaries.last_message_id END,
+            last_message = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                  OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                THEN EXCLUDED.last_message ELSE conversation_summaries.last_message END,
+            last_sender_id = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                    OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                  THEN EXCLUDED.last_sender_id ELSE conversation_summaries.last_sender_id END,
+            last_message_at = GREATEST(conversation_summaries.last_message_at, EXCLUDED.last_message_at),
+            unread_count = conversation_summaries.unread_count + 1;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_messages_conversation_summaries
+    AFTER INSERT ON messages
+    FOR EACH ROW EXECUTE FUNCTION update_conversation_summaries();
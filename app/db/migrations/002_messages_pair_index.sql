@@ -0,0 +1,6 @@
+-- Composite index for keyset-paginated DM history (see conversations.fetch_history).
+-- CONCURRENTLY avoids blocking writes on a live messages table; run outside a transaction.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_pair_created ON messages (
+    LEAST(sender_id, receiver_id), GREATEST(sender_id, receiver_id), created_at DESC, message_id DESC
+);
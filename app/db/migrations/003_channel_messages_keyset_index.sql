@@ -0,0 +1,6 @@
+-- Partial index backing keyset pagination in channels.get_channel_messages.
+-- Run outside a transaction (CONCURRENTLY).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_channel_messages_channel_keyset
+    ON channel_messages(channel_id, created_at DESC, message_id DESC)
+    WHERE is_deleted = false;
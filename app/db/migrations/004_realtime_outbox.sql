@@ -0,0 +1,29 @@
+-- Real-time outbox; deploy the relay process alongside (flask outbox-relay).
+
+-- Transactional outbox for real-time channel events. Rows are written in the
+-- same transaction as the channel data and streamed to the Go WebSocket
+-- server by the outbox relay (flask outbox-relay)
+CREATE TABLE realtime_outbox (
+    outbox_id BIGSERIAL PRIMARY KEY,
+    channel_id INT NOT NULL,
+    event_type VARCHAR(40) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    delivered_at TIMESTAMP,
+    FOREIGN KEY (channel_id) REFERENCES channels(channel_id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_realtime_outbox_pending ON realtime_outbox(outbox_id) WHERE delivered_at IS NULL;
+CREATE INDEX idx_realtime_outbox_channel ON realtime_outbox(channel_id, outbox_id);
+
+-- Wake the relay (and any in-process listeners) when outbox rows commit
+CREATE OR REPLACE FUNCTION notify_realtime_outbox() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('realtime_outbox', NEW.channel_id || ':' || NEW.outbox_id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_realtime_outbox_notify
+    AFTER INSERT ON realtime_outbox
+    FOR EACH ROW EXECUTE FUNCTION notify_realtime_outbox();
@@ -0,0 +1,6 @@
+-- Partial index for "messages after id N" scans (channels.sync_channel and
+-- the SSE stream replay). Run outside a transaction (CONCURRENTLY).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_channel_messages_channel_id_seq
+    ON channel_messages(channel_id, message_id)
+    WHERE is_deleted = false;
@@ -0,0 +1,45 @@
+-- Denormalized reaction counters for channel messages.
+-- The backfill at the end runs in the same transaction as the trigger, so no
+-- reaction can slip between them.
+
+BEGIN;
+
+-- Reaction counts per (message, emoji), kept in step with message_reactions
+-- by the trigger below; check/repair with: flask reaction-counts [--fix]
+CREATE TABLE message_reaction_counts (
+    message_id INT NOT NULL,
+    emoji VARCHAR(10) NOT NULL,
+    count INT NOT NULL,
+    PRIMARY KEY (message_id, emoji),
+    FOREIGN KEY (message_id) REFERENCES channel_messages(message_id) ON DELETE CASCADE
+);
+
+CREATE OR REPLACE FUNCTION update_message_reaction_counts() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO message_reaction_counts (message_id, emoji, count)
+        VALUES (NEW.message_id, NEW.emoji, 1)
+        ON CONFLICT (message_id, emoji) DO UPDATE SET count = message_reaction_counts.count + 1;
+        RETURN NEW;
+    END IF;
+
+    UPDATE message_reaction_counts SET count = count - 1
+    WHERE message_id = OLD.message_id AND emoji = OLD.emoji;
+    DELETE FROM message_reaction_counts
+    WHERE message_id = OLD.message_id AND emoji = OLD.emoji AND count <= 0;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_message_reactions_counts
+    AFTER INSERT OR DELETE ON message_reactions
+    FOR EACH ROW EXECUTE FUNCTION update_message_reaction_counts();
+
+LOCK TABLE message_reactions IN SHARE MODE;
+
+INSERT INTO message_reaction_counts (message_id, emoji, count)
+SELECT message_id, emoji, COUNT(*)
+FROM message_reactions
+GROUP BY message_id, emoji;
+
+COMMIT;
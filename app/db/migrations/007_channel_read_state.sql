@@ -0,0 +1,14 @@
+-- Channel read pointers for unread badges. Unread counts use
+-- idx_channel_messages_channel_id_seq from migration 005.
+
+-- Per-member read pointer for each channel (public channels have no
+-- channel_members row, so this is its own table); see algo/channel_reads.py
+CREATE TABLE channel_read_state (
+    user_id INT NOT NULL,
+    channel_id INT NOT NULL,
+    last_read_message_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, channel_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (channel_id) REFERENCES channels(channel_id) ON DELETE CASCADE
+);
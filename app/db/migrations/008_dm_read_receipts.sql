@@ -0,0 +1,50 @@
+-- DM read receipts: per-conversation read pointer on conversation_summaries.
+-- The index is built CONCURRENTLY, so run this file outside a transaction.
+
+ALTER TABLE conversation_summaries ADD COLUMN IF NOT EXISTS last_read_message_id INT;
+
+CREATE OR REPLACE FUNCTION update_conversation_summaries() RETURNS TRIGGER AS $$
+BEGIN
+    -- Sender's side: replying means they have read the conversation
+    INSERT INTO conversation_summaries
+        (user_id, partner_id, last_message_id, last_message, last_sender_id, last_message_at,
+         unread_count, last_read_message_id)
+    VALUES
+        (NEW.sender_id, NEW.receiver_id, NEW.message_id, LEFT(NEW.content, 200), NEW.sender_id, NEW.created_at,
+         0, NEW.message_id)
+    ON CONFLICT (user_id, partner_id) DO UPDATE SET
+        last_message_id = EXCLUDED.last_message_id,
+        last_message = EXCLUDED.last_message,
+        last_sender_id = EXCLUDED.last_sender_id,
+        last_message_at = EXCLUDED.last_message_at,
+        unread_count = 0,
+        last_read_message_id = GREATEST(conversation_summaries.last_read_message_id, EXCLUDED.last_read_message_id)
+    WHERE conversation_summaries.last_message_at IS NULL
+       OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at;
+
+    IF NEW.receiver_id <> NEW.sender_id THEN
+        -- Receiver's side: one more unread message
+        INSERT INTO conversation_summaries
+            (user_id, partner_id, last_message_id, last_message, last_sender_id, last_message_at, unread_count)
+        VALUES
+            (NEW.receiver_id, NEW.sender_id, NEW.message_id, LEFT(NEW.content, 200), NEW.sender_id, NEW.created_at, 1)
+        ON CONFLICT (user_id, partner_id) DO UPDATE SET
+            last_message_id = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                     OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                   THEN EXCLUDED.last_message_id ELSE conversation_summaries.last_message_id END,
+            last_message = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                  OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                THEN EXCLUDED.last_message ELSE conversation_summaries.last_message END,
+            last_sender_id = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                    OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                  THEN EXCLUDED.last_sender_id ELSE conversation_summaries.last_sender_id END,
+            last_message_at = GREATEST(conversation_summaries.last_message_at, EXCLUDED.last_message_at),
+            unread_count = conversation_summaries.unread_count + 1;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_receiver_sender
+    ON messages(receiver_id, sender_id, message_id);
@@ -0,0 +1,19 @@
+-- Full-text search: generated tsvector columns plus GIN indexes.
+-- Adding a STORED generated column rewrites the table under an ACCESS
+-- EXCLUSIVE lock, so apply in a maintenance window. The indexes are built
+-- CONCURRENTLY; run this file outside a transaction.
+
+ALTER TABLE messages
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+
+ALTER TABLE channel_messages
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_search
+    ON messages USING GIN (search_vector);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_channel_messages_search
+    ON channel_messages USING GIN (search_vector)
+    WHERE is_deleted = false;
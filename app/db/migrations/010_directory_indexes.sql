@@ -0,0 +1,37 @@
+-- Alumni directory: indexes behind /api/directory (algo/directory.py).
+-- Pages are keyset-ordered on (lastname, firstname, user_id) over verified
+-- users; each filter column gets its own partial index, and free-text search
+-- uses pg_trgm so '%word%' patterns can use an index. Built CONCURRENTLY;
+-- run this file outside a transaction.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_directory
+    ON users (lastname, firstname, user_id)
+    WHERE verification_status = 'verified';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_directory_university
+    ON users (university_name, lastname, firstname, user_id)
+    WHERE verification_status = 'verified';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_directory_year
+    ON users (graduation_year, lastname, firstname, user_id)
+    WHERE verification_status = 'verified';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_directory_city
+    ON users (current_city, lastname, firstname, user_id)
+    WHERE verification_status = 'verified';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_name_trgm
+    ON users USING GIN (lower(firstname || ' ' || lastname || ' ' || username) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_work_experience_current
+    ON work_experience (user_id)
+    WHERE leave_year IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_work_experience_current_trgm
+    ON work_experience USING GIN (lower(company_name || ' ' || job_title) gin_trgm_ops)
+    WHERE leave_year IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_connections_user_con
+    ON connections (user_id, con_user_id);
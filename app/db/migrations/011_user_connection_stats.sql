@@ -0,0 +1,75 @@
+-- Denormalized per-user connection counters.
+-- The backfill at the end runs in the same transaction as the trigger, so no
+-- connection change can slip between them.
+
+BEGIN;
+
+-- Accepted connections and pending requests per user, kept in step with
+-- connections by the trigger below; check/repair with: flask connection-counts [--fix]
+CREATE TABLE user_connection_stats (
+    user_id INT PRIMARY KEY,
+    accepted INT NOT NULL DEFAULT 0,
+    pending_in INT NOT NULL DEFAULT 0,
+    pending_out INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Adds delta to the counters one connection row contributes. Decrements
+-- only update existing rows, so cascaded deletes of a user never re-insert it.
+CREATE OR REPLACE FUNCTION bump_connection_stats(sender INT, receiver INT, state TEXT, delta INT) RETURNS VOID AS $$
+BEGIN
+    IF state NOT IN ('pending', 'accepted') THEN
+        RETURN;
+    END IF;
+    IF delta < 0 THEN
+        UPDATE user_connection_stats SET
+            accepted = accepted + CASE WHEN state = 'accepted' THEN delta ELSE 0 END,
+            pending_out = pending_out + CASE WHEN state = 'pending' AND user_id = sender THEN delta ELSE 0 END,
+            pending_in = pending_in + CASE WHEN state = 'pending' AND user_id = receiver THEN delta ELSE 0 END
+        WHERE user_id IN (sender, receiver);
+        RETURN;
+    END IF;
+    INSERT INTO user_connection_stats (user_id, accepted, pending_in, pending_out)
+    VALUES
+        (sender, CASE WHEN state = 'accepted' THEN delta ELSE 0 END, 0, CASE WHEN state = 'pending' THEN delta ELSE 0 END),
+        (receiver, CASE WHEN state = 'accepted' THEN delta ELSE 0 END, CASE WHEN state = 'pending' THEN delta ELSE 0 END, 0)
+    ON CONFLICT (user_id) DO UPDATE SET
+        accepted = user_connection_stats.accepted + EXCLUDED.accepted,
+        pending_in = user_connection_stats.pending_in + EXCLUDED.pending_in,
+        pending_out = user_connection_stats.pending_out + EXCLUDED.pending_out;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_user_connection_stats() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_connection_stats(OLD.user_id, OLD.con_user_id, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_connection_stats(NEW.user_id, NEW.con_user_id, NEW.status, 1);
+        RETURN NEW;
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_connections_stats
+    AFTER INSERT OR DELETE OR UPDATE OF status, user_id, con_user_id ON connections
+    FOR EACH ROW EXECUTE FUNCTION update_user_connection_stats();
+
+LOCK TABLE connections IN SHARE MODE;
+
+INSERT INTO user_connection_stats (user_id, accepted, pending_in, pending_out)
+SELECT user_id,
+       COUNT(*) FILTER (WHERE status = 'accepted'),
+       COUNT(*) FILTER (WHERE status = 'pending' AND incoming),
+       COUNT(*) FILTER (WHERE status = 'pending' AND NOT incoming)
+FROM (
+    SELECT user_id, status, false AS incoming FROM connections
+    UNION ALL
+    SELECT con_user_id, status, true FROM connections
+) sides
+WHERE status IN ('pending', 'accepted')
+GROUP BY user_id;
+
+COMMIT;
@@ -0,0 +1,35 @@
+-- One connections row per unordered pair of users.
+-- Status checks probe the pair with a single lookup on
+-- (LEAST(user_id, con_user_id), GREATEST(user_id, con_user_id)) instead of
+-- OR-ing both directions, and crossed or repeated requests are rejected by
+-- the unique index. Existing duplicates are collapsed first, keeping the
+-- accepted row if there is one, else the pending one, else the newest. This
+-- runs in one transaction with writes to connections blocked, so nothing can
+-- recreate a duplicate before the index exists. The user_connection_stats
+-- trigger adjusts the counters for the deleted rows.
+
+BEGIN;
+
+LOCK TABLE connections IN SHARE ROW EXCLUSIVE MODE;
+
+DELETE FROM connections WHERE user_id = con_user_id;
+
+DELETE FROM connections c
+USING (
+    SELECT connection_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY LEAST(user_id, con_user_id), GREATEST(user_id, con_user_id)
+               ORDER BY CASE status WHEN 'accepted' THEN 0 WHEN 'pending' THEN 1 ELSE 2 END,
+                        connection_id DESC
+           ) AS rank
+    FROM connections
+) ranked
+WHERE c.connection_id = ranked.connection_id AND ranked.rank > 1;
+
+ALTER TABLE connections ADD CONSTRAINT connections_not_self CHECK (user_id <> con_user_id);
+
+CREATE UNIQUE INDEX idx_connections_pair ON connections (
+    LEAST(user_id, con_user_id), GREATEST(user_id, con_user_id)
+);
+
+COMMIT;
@@ -0,0 +1,14 @@
+-- Requests page lists (algo/connection_requests.py): received requests scan
+-- (con_user_id, status, connection_id), sent requests scan
+-- (user_id, status, connection_id), and accepted connections merge both,
+-- newest first. The sent index covers every lookup idx_connections_user_con
+-- served since pair checks moved to idx_connections_pair, so that index is
+-- dropped. Built CONCURRENTLY; run this file outside a transaction.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_connections_received
+    ON connections (con_user_id, status, connection_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_connections_sent
+    ON connections (user_id, status, connection_id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_connections_user_con;
@@ -50,6 +50,14 @@ CREATE INDEX idx_users_community ON users(community_id);
 CREATE INDEX idx_users_role ON users(role);
 CREATE INDEX idx_users_verification_status ON users(verification_status);
 
+-- Alumni directory (algo/directory.py): keyset order plus one index per filter
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_users_directory ON users(lastname, firstname, user_id) WHERE verification_status = 'verified';
+CREATE INDEX idx_users_directory_university ON users(university_name, lastname, firstname, user_id) WHERE verification_status = 'verified';
+CREATE INDEX idx_users_directory_year ON users(graduation_year, lastname, firstname, user_id) WHERE verification_status = 'verified';
+CREATE INDEX idx_users_directory_city ON users(current_city, lastname, firstname, user_id) WHERE verification_status = 'verified';
+CREATE INDEX idx_users_name_trgm ON users USING GIN (lower(firstname || ' ' || lastname || ' ' || username) gin_trgm_ops);
+
 CREATE TABLE verification_tokens (
     id SERIAL PRIMARY KEY,
     email TEXT NOT NULL,
@@ -108,9 +116,72 @@ CREATE TABLE connections (
     request TEXT,
     status TEXT CHECK (status IN ('pending','accepted','denied')) DEFAULT 'pending',
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-    FOREIGN KEY (con_user_id) REFERENCES users(user_id) ON DELETE CASCADE
+    FOREIGN KEY (con_user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    CONSTRAINT connections_not_self CHECK (user_id <> con_user_id)
+);
+
+-- Requests page lists, newest first (algo/connection_requests.py)
+CREATE INDEX idx_connections_received ON connections(con_user_id, status, connection_id);
+CREATE INDEX idx_connections_sent ON connections(user_id, status, connection_id);
+-- One row per unordered pair: status checks are a single probe, and crossed
+-- or repeated requests are rejected by the database
+CREATE UNIQUE INDEX idx_connections_pair ON connections (
+    LEAST(user_id, con_user_id), GREATEST(user_id, con_user_id)
+);
+
+-- Accepted connections and pending requests per user, kept in step with
+-- connections by the trigger below; check/repair with: flask connection-counts [--fix]
+CREATE TABLE user_connection_stats (
+    user_id INT PRIMARY KEY,
+    accepted INT NOT NULL DEFAULT 0,
+    pending_in INT NOT NULL DEFAULT 0,
+    pending_out INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
 
+-- Adds delta to the counters one connection row contributes. Decrements
+-- only update existing rows, so cascaded deletes of a user never re-insert it.
+CREATE OR REPLACE FUNCTION bump_connection_stats(sender INT, receiver INT, state TEXT, delta INT) RETURNS VOID AS $$
+BEGIN
+    IF state NOT IN ('pending', 'accepted') THEN
+        RETURN;
+    END IF;
+    IF delta < 0 THEN
+        UPDATE user_connection_stats SET
+            accepted = accepted + CASE WHEN state = 'accepted' THEN delta ELSE 0 END,
+            pending_out = pending_out + CASE WHEN state = 'pending' AND user_id = sender THEN delta ELSE 0 END,
+            pending_in = pending_in + CASE WHEN state = 'pending' AND user_id = receiver THEN delta ELSE 0 END
+        WHERE user_id IN (sender, receiver);
+        RETURN;
+    END IF;
+    INSERT INTO user_connection_stats (user_id, accepted, pending_in, pending_out)
+    VALUES
+        (sender, CASE WHEN state = 'accepted' THEN delta ELSE 0 END, 0, CASE WHEN state = 'pending' THEN delta ELSE 0 END),
+        (receiver, CASE WHEN state = 'accepted' THEN delta ELSE 0 END, CASE WHEN state = 'pending' THEN delta ELSE 0 END, 0)
+    ON CONFLICT (user_id) DO UPDATE SET
+        accepted = user_connection_stats.accepted + EXCLUDED.accepted,
+        pending_in = user_connection_stats.pending_in + EXCLUDED.pending_in,
+        pending_out = user_connection_stats.pending_out + EXCLUDED.pending_out;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_user_connection_stats() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_connection_stats(OLD.user_id, OLD.con_user_id, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_connection_stats(NEW.user_id, NEW.con_user_id, NEW.status, 1);
+        RETURN NEW;
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_connections_stats
+    AFTER INSERT OR DELETE OR UPDATE OF status, user_id, con_user_id ON connections
+    FOR EACH ROW EXECUTE FUNCTION update_user_connection_stats();
+
 CREATE TABLE education_details (
     detail_id SERIAL PRIMARY KEY,
     user_id INT NOT NULL,
@@ -143,16 +214,95 @@ CREATE TABLE work_experience (
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
 
+CREATE INDEX idx_work_experience_current ON work_experience(user_id) WHERE leave_year IS NULL;
+CREATE INDEX idx_work_experience_current_trgm ON work_experience USING GIN (lower(company_name || ' ' || job_title) gin_trgm_ops) WHERE leave_year IS NULL;
+
 CREATE TABLE messages (
     message_id SERIAL PRIMARY KEY,
     sender_id INT NOT NULL,
     receiver_id INT NOT NULL,
     content TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
     FOREIGN KEY (sender_id) REFERENCES users(user_id) ON DELETE CASCADE,
     FOREIGN KEY (receiver_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
 
+-- Full-text search over DMs (algo/search.py)
+CREATE INDEX idx_messages_search ON messages USING GIN (search_vector);
+
+-- Unread DMs from one sender past a read pointer (conversations.mark_read)
+CREATE INDEX idx_messages_receiver_sender ON messages(receiver_id, sender_id, message_id);
+-- DM history is read per conversation pair, newest first (keyset pagination)
+CREATE INDEX idx_messages_pair_created ON messages (
+    LEAST(sender_id, receiver_id), GREATEST(sender_id, receiver_id), created_at DESC, message_id DESC
+);
+
+-- Per-user conversation summaries (one row per user/partner pair), kept
+-- current by the trigger below so the chat list is a single indexed query
+CREATE TABLE conversation_summaries (
+    user_id INT NOT NULL,
+    partner_id INT NOT NULL,
+    last_message_id INT,
+    last_message TEXT,
+    last_sender_id INT,
+    last_message_at TIMESTAMP,
+    unread_count INT NOT NULL DEFAULT 0,
+    last_read_message_id INT,
+    PRIMARY KEY (user_id, partner_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (partner_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_conversation_summaries_recent ON conversation_summaries(user_id, last_message_at DESC);
+
+CREATE OR REPLACE FUNCTION update_conversation_summaries() RETURNS TRIGGER AS $$
+BEGIN
+    -- Sender's side: replying means they have read the conversation
+    INSERT INTO conversation_summaries
+        (user_id, partner_id, last_message_id, last_message, last_sender_id, last_message_at,
+         unread_count, last_read_message_id)
+    VALUES
+        (NEW.sender_id, NEW.receiver_id, NEW.message_id, LEFT(NEW.content, 200), NEW.sender_id, NEW.created_at,
+         0, NEW.message_id)
+    ON CONFLICT (user_id, partner_id) DO UPDATE SET
+        last_message_id = EXCLUDED.last_message_id,
+        last_message = EXCLUDED.last_message,
+        last_sender_id = EXCLUDED.last_sender_id,
+        last_message_at = EXCLUDED.last_message_at,
+        unread_count = 0,
+        last_read_message_id = GREATEST(conversation_summaries.last_read_message_id, EXCLUDED.last_read_message_id)
+    WHERE conversation_summaries.last_message_at IS NULL
+       OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at;
+
+    IF NEW.receiver_id <> NEW.sender_id THEN
+        -- Receiver's side: one more unread message
+        INSERT INTO conversation_summaries
+            (user_id, partner_id, last_message_id, last_message, last_sender_id, last_message_at, unread_count)
+        VALUES
+            (NEW.receiver_id, NEW.sender_id, NEW.message_id, LEFT(NEW.content, 200), NEW.sender_id, NEW.created_at, 1)
+        ON CONFLICT (user_id, partner_id) DO UPDATE SET
+            last_message_id = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                     OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                   THEN EXCLUDED.last_message_id ELSE conversation_summaries.last_message_id END,
+            last_message = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                  OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                THEN EXCLUDED.last_message ELSE conversation_summaries.last_message END,
+            last_sender_id = CASE WHEN conversation_summaries.last_message_at IS NULL
+                                    OR EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                                  THEN EXCLUDED.last_sender_id ELSE conversation_summaries.last_sender_id END,
+            last_message_at = GREATEST(conversation_summaries.last_message_at, EXCLUDED.last_message_at),
+            unread_count = conversation_summaries.unread_count + 1;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_messages_conversation_summaries
+    AFTER INSERT ON messages
+    FOR EACH ROW EXECUTE FUNCTION update_conversation_summaries();
+
 -- Communities table (referenced by admin_permissions)
 CREATE TABLE communities (
     community_id SERIAL PRIMARY KEY,
@@ -295,6 +445,7 @@ CREATE TABLE channel_messages (
     is_deleted BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
     FOREIGN KEY (channel_id) REFERENCES channels(channel_id) ON DELETE CASCADE,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE SET NULL,
     FOREIGN KEY (reply_to_message_id) REFERENCES channel_messages(message_id) ON DELETE SET NULL
@@ -324,6 +475,77 @@ CREATE TABLE message_reactions (
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
 
+-- Per-member read pointer for each channel (public channels have no
+-- channel_members row, so this is its own table); see algo/channel_reads.py
+CREATE TABLE channel_read_state (
+    user_id INT NOT NULL,
+    channel_id INT NOT NULL,
+    last_read_message_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, channel_id),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (channel_id) REFERENCES channels(channel_id) ON DELETE CASCADE
+);
+
+-- Reaction counts per (message, emoji), kept in step with message_reactions
+-- by the trigger below; check/repair with: flask reaction-counts [--fix]
+CREATE TABLE message_reaction_counts (
+    message_id INT NOT NULL,
+    emoji VARCHAR(10) NOT NULL,
+    count INT NOT NULL,
+    PRIMARY KEY (message_id, emoji),
+    FOREIGN KEY (message_id) REFERENCES channel_messages(message_id) ON DELETE CASCADE
+);
+
+CREATE OR REPLACE FUNCTION update_message_reaction_counts() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO message_reaction_counts (message_id, emoji, count)
+        VALUES (NEW.message_id, NEW.emoji, 1)
+        ON CONFLICT (message_id, emoji) DO UPDATE SET count = message_reaction_counts.count + 1;
+        RETURN NEW;
+    END IF;
+
+    UPDATE message_reaction_counts SET count = count - 1
+    WHERE message_id = OLD.message_id AND emoji = OLD.emoji;
+    DELETE FROM message_reaction_counts
+    WHERE message_id = OLD.message_id AND emoji = OLD.emoji AND count <= 0;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_message_reactions_counts
+    AFTER INSERT OR DELETE ON message_reactions
+    FOR EACH ROW EXECUTE FUNCTION update_message_reaction_counts();
+
+-- Transactional outbox for real-time channel events. Rows are written in the
+-- same transaction as the channel data and streamed to the Go WebSocket
+-- server by the outbox relay (flask outbox-relay)
+CREATE TABLE realtime_outbox (
+    outbox_id BIGSERIAL PRIMARY KEY,
+    channel_id INT NOT NULL,
+    event_type VARCHAR(40) NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    delivered_at TIMESTAMP,
+    FOREIGN KEY (channel_id) REFERENCES channels(channel_id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_realtime_outbox_pending ON realtime_outbox(outbox_id) WHERE delivered_at IS NULL;
+CREATE INDEX idx_realtime_outbox_channel ON realtime_outbox(channel_id, outbox_id);
+
+-- Wake the relay (and any in-process listeners) when outbox rows commit
+CREATE OR REPLACE FUNCTION notify_realtime_outbox() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('realtime_outbox', NEW.channel_id || ':' || NEW.outbox_id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_realtime_outbox_notify
+    AFTER INSERT ON realtime_outbox
+    FOR EACH ROW EXECUTE FUNCTION notify_realtime_outbox();
+
 -- Create indexes for community system
 CREATE INDEX idx_community_members_community ON community_members(community_id);
 CREATE INDEX idx_community_members_user ON community_members(user_id);
@@ -341,5 +563,11 @@ CREATE INDEX idx_channels_active ON channels(is_active);
 CREATE INDEX idx_channel_messages_channel ON channel_messages(channel_id);
 CREATE INDEX idx_channel_messages_user ON channel_messages(user_id);
 CREATE INDEX idx_channel_messages_created_at ON channel_messages(created_at);
+-- Keyset pagination of live messages per channel (newest first)
+CREATE INDEX idx_channel_messages_channel_keyset ON channel_messages(channel_id, created_at DESC, message_id DESC) WHERE is_deleted = false;
+-- Full-text search over live channel messages (algo/search.py)
+CREATE INDEX idx_channel_messages_search ON channel_messages USING GIN (search_vector) WHERE is_deleted = false;
+-- "Messages after id N" scans: delta sync and stream replay
+CREATE INDEX idx_channel_messages_channel_id_seq ON channel_messages(channel_id, message_id) WHERE is_deleted = false;
 CREATE INDEX idx_channel_members_user ON channel_members(user_id);
 CREATE INDEX idx_message_reactions_message ON message_reactions(message_id);
@@ -7,7 +7,7 @@ from flask_bcrypt import Bcrypt
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import db and other components that will be initialized
-from algo import db
+from algo import db, sql_metrics, commands
 # Import blueprints that will be registered
 # from .blueprints import core, auth, profile, profile, admin, connections, chat, settings
 from .blueprints import core, auth, profile, dashboard, connections, settings, chat, communities, channels
@@ -42,7 +42,9 @@ def create_app(test_config=None):
 
     # Initialize Flask extensions
     bcrypt.init_app(app)
+    sql_metrics.init_app(app)
     db.init_app(app)
+    commands.init_app(app)
 
     # Register blueprints
     app.register_blueprint(core.bp)
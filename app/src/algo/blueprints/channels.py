@@ -1,7 +1,9 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, request, jsonify, session
 from psycopg2.extras import RealDictCursor
+import os
+import json
+import time
 import logging
-import requests
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,44 +13,89 @@ channels_bp = Blueprint("channels", __name__)
 
 # Import database connection from connection module
 from algo.db import get_db
+from algo.pagination import encode_cursor, decode_time_cursor, page_limit
+from algo import channel_access, outbox, event_hub, reactions, channel_reads, search
 
+# Server-Sent Events stream settings
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 3000
+SSE_REPLAY_LIMIT = 200
+SSE_MAX_STREAM_SECONDS = int(os.getenv("SSE_MAX_STREAM_SECONDS", 300))
 
-# Function to broadcast messages to Go WebSocket server
-def broadcast_to_go_websocket(channel_id, message_data):
-    """Send message to Go WebSocket server for real-time broadcasting"""
-    try:
-        # Go WebSocket server internal API endpoint
-        go_websocket_url = "http://localhost:8080/api/broadcast"
-
-        broadcast_payload = {
-            "type": "new_message",
-            "channel_id": channel_id,
-            "message": message_data,
-        }
-
-        # Send to Go server with short timeout
-        response = requests.post(
-            go_websocket_url,
-            json=broadcast_payload,
-            timeout=1.0,  # Short timeout so we don't block the response
-        )
+# Explicit message columns: channel_messages also carries a search_vector
+# that must not leak into API responses or event payloads
+MESSAGE_FIELDS = (
+    "message_id", "channel_id", "user_id", "content", "message_type",
+    "reply_to_message_id", "is_edited", "is_deleted", "created_at", "updated_at",
+)
+MESSAGE_COLUMNS = ", ".join(f"cm.{field}" for field in MESSAGE_FIELDS)
 
-        if response.status_code == 200:
-            logger.info(
-                f"✅ Broadcasted message to Go WebSocket for channel {channel_id}"
-            )
-        else:
-            logger.warning(f"⚠️ Go WebSocket returned status {response.status_code}")
-
-    except requests.exceptions.RequestException as e:
-        logger.warning(f"⚠️ Failed to reach Go WebSocket server: {e}")
-        # Don't raise - we don't want to fail the message send if WebSocket is down
+# Delta sync caps; beyond these the client is told to refetch instead
+SYNC_MESSAGE_LIMIT = 200
+SYNC_EVENT_LIMIT = 1000
 
 
 def get_db_connection():
     return get_db()
 
 
+def _serialize_message(row):
+    """Copy of a message row with datetimes converted to ISO strings."""
+    message = dict(row)
+    for key, value in message.items():
+        if hasattr(value, "isoformat"):  # datetime object
+            message[key] = value.isoformat()
+    return message
+
+
+def _event_hwm(cursor, channel_id):
+    """
+    Newest outbox id for a channel: the client's starting point for delta sync.
+
+    outbox.enqueue() holds the channel's lock until commit, so no event with
+    a lower id can still commit for this channel after this read.
+    """
+    cursor.execute(
+        "SELECT COALESCE(MAX(outbox_id), 0) AS hwm FROM realtime_outbox WHERE channel_id = %s",
+        (channel_id,),
+    )
+    return cursor.fetchone()["hwm"]
+
+
+def _sse_event(event_type, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _message_keyset(cursor, channel_id, before, after):
+    """
+    Build the keyset clause for channel message pagination.
+
+    ``before``/``after`` may be opaque cursors or plain message ids; a plain
+    id must belong to ``channel_id``. Returns (sql_clause, params, order)
+    where order is the scan direction over (created_at, message_id). Raises
+    ValueError for a malformed cursor or an id not in this channel.
+    """
+    cursor_value, comparator, order = (after, ">", "ASC") if after else (before, "<", "DESC")
+    if not cursor_value:
+        return "", (), "DESC"
+    if cursor_value.isdigit():
+        cursor.execute(
+            "SELECT created_at, message_id FROM channel_messages WHERE message_id = %s AND channel_id = %s",
+            (int(cursor_value), channel_id),
+        )
+        row = cursor.fetchone()
+        if not row:
+            raise ValueError("message not in channel")
+        created_at, message_id = row["created_at"], row["message_id"]
+    else:
+        created_at, message_id = decode_time_cursor(cursor_value)
+    clause = f"AND (cm.created_at, cm.message_id) {comparator} (%s::timestamp, %s)"
+    return clause, (created_at, message_id), order
+
+
 def require_auth(f):
     """Decorator to require authentication"""
 
@@ -102,6 +149,25 @@ def require_community_member(f):
     return decorated_function
 
 
+def authorize_channel(cursor, channel_id, write=False):
+    """
+    Resolve the session user's access to a channel.
+
+    Returns (access, None) when allowed, or (None, error_response) with the
+    same 404/403 responses the channel endpoints have always returned.
+    """
+    access = channel_access.resolve(cursor, session["user_id"], channel_id)
+    if access is None:
+        return None, (jsonify({"error": "Channel not found"}), 404)
+    if access.community_role is None:
+        return None, (jsonify({"error": "Access denied"}), 403)
+    if not access.can_read:
+        return None, (jsonify({"error": "Access denied to private channel"}), 403)
+    if write and not access.can_write:
+        return None, (jsonify({"error": "You cannot send messages in this channel"}), 403)
+    return access, None
+
+
 # Community Management Routes
 
 
@@ -196,6 +262,7 @@ def request_join_community(community_id):
 
         request_id = cursor.fetchone()[0]
         conn.commit()
+        channel_access.invalidate_user(session["user_id"])
 
         return (
             jsonify(
@@ -277,6 +344,7 @@ def invite_user_to_community(community_id):
 
         invitation_id = cursor.fetchone()[0]
         conn.commit()
+        channel_access.invalidate_user(invited_user_id)
 
         return (
             jsonify(
@@ -448,6 +516,7 @@ def create_channel(community_id):
 
         channel = cursor.fetchone()
         conn.commit()
+        channel_access.invalidate_community(community_id)
 
         return (
             jsonify(
@@ -467,7 +536,13 @@ def create_channel(community_id):
 @channels_bp.route("/channels/<int:channel_id>/messages", methods=["GET"])
 @require_auth
 def get_channel_messages(channel_id):
-    """Get messages from a channel"""
+    """
+    Get messages from a channel.
+
+    Supports keyset pagination through ``before``/``after``, each either an
+    opaque cursor from a previous response or a raw message id. ``page``
+    (OFFSET based) is still honoured when no cursor is given.
+    """
     page = request.args.get("page", 1, type=int)
     limit = min(request.args.get("limit", 50, type=int), 100)
     offset = (page - 1) * limit
@@ -477,49 +552,24 @@ def get_channel_messages(channel_id):
 
     try:
         # Check if user has access to channel
-        cursor.execute(
-            """
-            SELECT c.community_id, c.is_private
-            FROM channels c
-            WHERE c.channel_id = %s AND c.is_active = true
-        """,
-            (channel_id,),
-        )
-
-        channel = cursor.fetchone()
-        if not channel:
-            return jsonify({"error": "Channel not found"}), 404
+        access, denied = authorize_channel(cursor, channel_id)
+        if denied:
+            return denied
 
-        # Check community membership
-        cursor.execute(
-            """
-            SELECT role FROM community_members 
-            WHERE community_id = %s AND user_id = %s AND status = 'active'
-        """,
-            (channel["community_id"], session["user_id"]),
-        )
-
-        if not cursor.fetchone():
-            return jsonify({"error": "Access denied"}), 403
-
-        # If private channel, check channel membership
-        if channel["is_private"]:
-            cursor.execute(
-                """
-                SELECT 1 FROM channel_members 
-                WHERE channel_id = %s AND user_id = %s
-            """,
-                (channel_id, session["user_id"]),
+        try:
+            keyset, keyset_params, order = _message_keyset(
+                cursor, channel_id, request.args.get("before"), request.args.get("after")
             )
-
-            if not cursor.fetchone():
-                return jsonify({"error": "Access denied to private channel"}), 403
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        if keyset:
+            offset = 0
 
         # Get messages
         cursor.execute(
             """
             SELECT 
-                cm.*,
+                {columns},
                 u.username,
                 u.pfp_path,
                 reply_msg.content as reply_content,
@@ -529,47 +579,49 @@ def get_channel_messages(channel_id):
             LEFT JOIN channel_messages reply_msg ON cm.reply_to_message_id = reply_msg.message_id
             LEFT JOIN users reply_user ON reply_msg.user_id = reply_user.user_id
             WHERE cm.channel_id = %s AND cm.is_deleted = false
-            ORDER BY cm.created_at DESC
+            {keyset}
+            ORDER BY cm.created_at {order}, cm.message_id {order}
             LIMIT %s OFFSET %s
-        """,
-            (channel_id, limit, offset),
+        """.format(columns=MESSAGE_COLUMNS, keyset=keyset, order=order),
+            (channel_id, *keyset_params, limit + 1, offset),
         )
 
         messages = cursor.fetchall()
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if order == "ASC":
+            # Newer-than-cursor pages are fetched oldest first; normalise to newest first
+            messages.reverse()
 
         # Get reaction counts for messages
-        if messages:
-            message_ids = [msg["message_id"] for msg in messages]
-            cursor.execute(
-                """
-                SELECT message_id, emoji, COUNT(*) as count
-                FROM message_reactions
-                WHERE message_id = ANY(%s)
-                GROUP BY message_id, emoji
-            """,
-                (message_ids,),
-            )
-
-            reactions = cursor.fetchall()
-            reaction_dict = {}
-            for reaction in reactions:
-                msg_id = reaction["message_id"]
-                if msg_id not in reaction_dict:
-                    reaction_dict[msg_id] = []
-                reaction_dict[msg_id].append(
-                    {"emoji": reaction["emoji"], "count": reaction["count"]}
-                )
-
-            # Add reactions to messages
-            for message in messages:
-                message["reactions"] = reaction_dict.get(message["message_id"], [])
-
+        reaction_dict = reactions.counts_for(cursor, [msg["message_id"] for msg in messages])
+        for message in messages:
+            message["reactions"] = reaction_dict.get(message["message_id"], [])
+
+        # next_cursor walks back into older history, prev_cursor forward to newer
+        newest = messages[0] if messages else None
+        oldest = messages[-1] if messages else None
+        has_older = has_more if order == "DESC" else True
+        has_newer = has_more if order == "ASC" else bool(request.args.get("before"))
         return (
             jsonify(
                 {
                     "messages": [dict(msg) for msg in reversed(messages)],
                     "page": page,
                     "limit": limit,
+                    "has_older": has_older,
+                    "has_newer": has_newer,
+                    "next_cursor": (
+                        encode_cursor(oldest["created_at"], oldest["message_id"])
+                        if oldest and has_older
+                        else None
+                    ),
+                    "prev_cursor": (
+                        encode_cursor(newest["created_at"], newest["message_id"])
+                        if newest
+                        else request.args.get("after")
+                    ),
+                    "sync_hwm": _event_hwm(cursor, channel_id),
                 }
             ),
             200,
@@ -598,59 +650,27 @@ def send_message(channel_id):
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
-        # Check if user has access to channel
-        cursor.execute(
-            """
-            SELECT c.community_id, c.is_private
-            FROM channels c
-            WHERE c.channel_id = %s AND c.is_active = true
-        """,
-            (channel_id,),
-        )
+        # Check if user has access to channel and may post in it
+        access, denied = authorize_channel(cursor, channel_id, write=True)
+        if denied:
+            return denied
 
-        channel = cursor.fetchone()
-        if not channel:
-            return jsonify({"error": "Channel not found"}), 404
+        # Locking before the insert keeps message ids in commit order, which
+        # the ``since`` cursor of delta sync relies on
+        outbox.lock_channel(cursor, channel_id)
 
-        # Check community membership
+        # Send message (sender's user info is joined in the same round trip)
         cursor.execute(
             """
-            SELECT role FROM community_members 
-            WHERE community_id = %s AND user_id = %s AND status = 'active'
-        """,
-            (channel["community_id"], session["user_id"]),
-        )
-
-        member = cursor.fetchone()
-        if not member:
-            return jsonify({"error": "Access denied"}), 403
-
-        # If private channel, check channel membership and permissions
-        if channel["is_private"]:
-            cursor.execute(
-                """
-                SELECT can_send_messages FROM channel_members 
-                WHERE channel_id = %s AND user_id = %s
-            """,
-                (channel_id, session["user_id"]),
+            WITH inserted AS (
+                INSERT INTO channel_messages (channel_id, user_id, content, message_type, reply_to_message_id)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING {returning}
             )
-
-            channel_member = cursor.fetchone()
-            if not channel_member:
-                return jsonify({"error": "Access denied to private channel"}), 403
-            if not channel_member["can_send_messages"]:
-                return (
-                    jsonify({"error": "You cannot send messages in this channel"}),
-                    403,
-                )
-
-        # Send message
-        cursor.execute(
-            """
-            INSERT INTO channel_messages (channel_id, user_id, content, message_type, reply_to_message_id)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING *
-        """,
+            SELECT inserted.*, u.username, u.pfp_path
+            FROM inserted
+            JOIN users u ON u.user_id = inserted.user_id
+        """.format(returning=", ".join(MESSAGE_FIELDS)),
             (
                 channel_id,
                 session["user_id"],
@@ -661,38 +681,17 @@ def send_message(channel_id):
         )
 
         message = cursor.fetchone()
-        conn.commit()
-
-        # Get user info for response
-        cursor.execute(
-            """
-            SELECT username, pfp_path FROM users WHERE user_id = %s
-        """,
-            (session["user_id"],),
-        )
-        user_info = cursor.fetchone()
 
         response_message = dict(message)
-        response_message.update(
-            {
-                "username": user_info["username"],
-                "pfp_path": user_info["pfp_path"],
-                "reactions": [],
-            }
-        )
+        response_message["reactions"] = []
 
         # Convert datetime objects to strings for JSON serialization
-        broadcast_message = dict(response_message)
-        for key, value in broadcast_message.items():
-            if hasattr(value, "isoformat"):  # datetime object
-                broadcast_message[key] = value.isoformat()
+        broadcast_message = _serialize_message(response_message)
 
-        # Trigger Go WebSocket broadcast for real-time delivery
-        try:
-            broadcast_to_go_websocket(channel_id, broadcast_message)
-        except Exception as e:
-            logger.warning(f"Failed to broadcast to WebSocket: {e}")
-            # Don't fail the request if WebSocket broadcast fails
+        # Real-time delivery goes through the outbox, committed atomically with
+        # the message; the outbox relay forwards it to the Go WebSocket server
+        outbox.enqueue(cursor, channel_id, "new_message", broadcast_message)
+        conn.commit()
 
         return (
             jsonify({"message": "Message sent successfully", "data": response_message}),
@@ -707,6 +706,232 @@ def send_message(channel_id):
         cursor.close()
 
 
+@channels_bp.route("/channels/search", methods=["GET"])
+@require_auth
+def search_messages():
+    """
+    Full-text search over channel messages the user can read.
+
+    Query params: ``q`` (web-search syntax), optional ``community_id`` and
+    ``channel_id`` filters, ``cursor`` from a previous page and ``limit``
+    (max 50). Results are ranked, with highlighted snippets.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Search query required"}), 400
+    if len(query) > 200:
+        return jsonify({"error": "Search query too long"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        page = search.search_channel_messages(
+            cursor,
+            session["user_id"],
+            query,
+            community_id=request.args.get("community_id", type=int),
+            channel_id=request.args.get("channel_id", type=int),
+            cursor=request.args.get("cursor"),
+            limit=page_limit(request.args.get("limit", type=int), default=20, maximum=50),
+        )
+        return jsonify(page), 200
+
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    except Exception as e:
+        logger.error(f"Error searching messages: {e}")
+        return jsonify({"error": "Failed to search messages"}), 500
+    finally:
+        cursor.close()
+
+
+@channels_bp.route("/channels/<int:channel_id>/sync", methods=["GET"])
+@require_auth
+def sync_channel(channel_id):
+    """
+    Delta sync for a reconnecting client.
+
+    Query params:
+        since: newest message id the client already has
+        hwm: outbox high-water mark (``sync_hwm``) from the previous sync or
+             message page; omit it to receive only new messages
+
+    Returns messages newer than ``since``, messages edited or deleted after
+    ``hwm``, and current reaction counts for messages whose reactions
+    changed. If the gap exceeds the caps, or the outbox was pruned past
+    ``hwm``, the response carries too_far_behind=true and the client should
+    refetch the latest page instead.
+    """
+    since = request.args.get("since", type=int)
+    hwm = request.args.get("hwm", type=int)
+    if since is None:
+        return jsonify({"error": "since is required"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        access, denied = authorize_channel(cursor, channel_id)
+        if denied:
+            return denied
+
+        too_far_behind = {"too_far_behind": True, "messages": [], "edited": [],
+                          "deleted_ids": [], "reactions": []}
+        current_hwm = _event_hwm(cursor, channel_id)
+
+        cursor.execute(
+            """
+            SELECT {columns}, u.username, u.pfp_path
+            FROM channel_messages cm
+            JOIN users u ON cm.user_id = u.user_id
+            WHERE cm.channel_id = %s AND cm.is_deleted = false AND cm.message_id > %s
+            ORDER BY cm.message_id
+            LIMIT %s
+        """.format(columns=MESSAGE_COLUMNS),
+            (channel_id, since, SYNC_MESSAGE_LIMIT + 1),
+        )
+        messages = cursor.fetchall()
+        if len(messages) > SYNC_MESSAGE_LIMIT:
+            return jsonify({**too_far_behind, "sync_hwm": current_hwm}), 200
+
+        edited_ids, deleted_ids, reacted_ids = set(), set(), set()
+        if hwm is not None and hwm < current_hwm:
+            cursor.execute("SELECT MIN(outbox_id) AS oldest FROM realtime_outbox")
+            oldest = cursor.fetchone()["oldest"]
+            if oldest is not None and hwm + 1 < oldest:
+                # Events after hwm may have been pruned
+                return jsonify({**too_far_behind, "sync_hwm": current_hwm}), 200
+
+            cursor.execute(
+                """
+                SELECT event_type, (payload->>'message_id')::int AS message_id
+                FROM realtime_outbox
+                WHERE channel_id = %s AND outbox_id > %s AND outbox_id <= %s
+                  AND event_type <> 'new_message'
+                ORDER BY outbox_id
+                LIMIT %s
+            """,
+                (channel_id, hwm, current_hwm, SYNC_EVENT_LIMIT + 1),
+            )
+            events = cursor.fetchall()
+            if len(events) > SYNC_EVENT_LIMIT:
+                return jsonify({**too_far_behind, "sync_hwm": current_hwm}), 200
+
+            for event in events:
+                # Messages newer than ``since`` are returned whole below
+                if event["message_id"] is None or event["message_id"] > since:
+                    continue
+                if event["event_type"] == "message_deleted":
+                    deleted_ids.add(event["message_id"])
+                elif event["event_type"] == "message_edited":
+                    edited_ids.add(event["message_id"])
+                elif event["event_type"] == "reaction_update":
+                    reacted_ids.add(event["message_id"])
+
+        edited = []
+        if edited_ids - deleted_ids:
+            cursor.execute(
+                """
+                SELECT message_id, content, is_edited, updated_at
+                FROM channel_messages
+                WHERE message_id = ANY(%s) AND is_deleted = false
+            """,
+                (list(edited_ids - deleted_ids),),
+            )
+            edited = [dict(row) for row in cursor.fetchall()]
+
+        reaction_dict = reactions.counts_for(
+            cursor,
+            [msg["message_id"] for msg in messages] + list(reacted_ids - deleted_ids),
+        )
+        for message in messages:
+            message["reactions"] = reaction_dict.get(message["message_id"], [])
+
+        return (
+            jsonify(
+                {
+                    "too_far_behind": False,
+                    "messages": [dict(msg) for msg in messages],
+                    "edited": edited,
+                    "deleted_ids": sorted(deleted_ids),
+                    "reactions": [
+                        {"message_id": message_id, "reactions": reaction_dict.get(message_id, [])}
+                        for message_id in sorted(reacted_ids - deleted_ids)
+                    ],
+                    "sync_hwm": current_hwm,
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        logger.error(f"Error syncing channel: {e}")
+        return jsonify({"error": "Failed to sync channel"}), 500
+    finally:
+        cursor.close()
+
+
+@channels_bp.route("/channels/<int:channel_id>/read", methods=["POST"])
+@require_auth
+def mark_channel_read(channel_id):
+    """
+    Mark a channel read up to ``message_id`` (default: its newest message).
+    Pointers are buffered and only ever move forward.
+    """
+    data = request.get_json(silent=True) or {}
+    message_id = data.get("message_id")
+    if message_id is not None and (
+        isinstance(message_id, bool) or not isinstance(message_id, int) or message_id < 0
+    ):
+        return jsonify({"error": "Invalid message_id"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        access, denied = authorize_channel(cursor, channel_id)
+        if denied:
+            return denied
+
+        # Never past the newest message, or later messages would arrive already read
+        message_id = channel_reads.read_pointer(cursor, channel_id, message_id)
+        channel_reads.mark_read(session["user_id"], channel_id, message_id)
+        return jsonify({"message": "Marked as read", "last_read_message_id": message_id}), 202
+
+    except Exception as e:
+        logger.error(f"Error marking channel read: {e}")
+        return jsonify({"error": "Failed to mark channel read"}), 500
+    finally:
+        cursor.close()
+
+
+@channels_bp.route("/communities/<int:community_id>/unread", methods=["GET"])
+@require_community_member
+def get_unread_counts(community_id):
+    """Unread message counts for every channel of a community the user can see"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        rows = channel_reads.sidebar_channels(cursor, session["user_id"], community_id)
+        return (
+            jsonify(
+                {
+                    "unread": [{"channel_id": row[0], "count": row[7]} for row in rows],
+                    "cap": channel_reads.UNREAD_CAP,
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        logger.error(f"Error fetching unread counts: {e}")
+        return jsonify({"error": "Failed to fetch unread counts"}), 500
+    finally:
+        cursor.close()
+
+
 @channels_bp.route("/channels/<int:channel_id>/members", methods=["GET"])
 @require_auth
 def get_channel_members(channel_id):
@@ -770,89 +995,266 @@ def get_channel_members(channel_id):
 @channels_bp.route("/messages/<int:message_id>/reactions", methods=["POST"])
 @require_auth
 def add_reaction(message_id):
-    """Add a reaction to a message"""
+    """
+    Toggle a reaction on a message.
+
+    Toggles are buffered and applied in batches (see algo.reactions), so the
+    response is 202 and the new counts arrive as a reaction_update event.
+    """
     data = request.get_json()
     emoji = data.get("emoji", "").strip()
 
     if not emoji:
         return jsonify({"error": "Emoji required"}), 400
+    if len(emoji) > 10:
+        return jsonify({"error": "Invalid emoji"}), 400
 
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
         # Check if message exists and user has access
+        channel_id = reactions.channel_of(cursor, message_id)
+        if channel_id is None:
+            return jsonify({"error": "Message not found"}), 404
+
+        access, denied = authorize_channel(cursor, channel_id)
+        if denied:
+            return denied
+
+        reactions.queue_toggle(message_id, session["user_id"], emoji)
+        return jsonify({"message": "Reaction toggled"}), 202
+
+    except Exception as e:
+        logger.error(f"Error managing reaction: {e}")
+        return jsonify({"error": "Failed to manage reaction"}), 500
+    finally:
+        cursor.close()
+
+
+@channels_bp.route("/messages/<int:message_id>", methods=["PATCH"])
+@require_auth
+def edit_message(message_id):
+    """Edit one of your own messages"""
+    data = request.get_json() or {}
+    content = data.get("content", "").strip()
+    if not content:
+        return jsonify({"error": "Message content required"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
         cursor.execute(
             """
-            SELECT cm.channel_id, c.community_id, c.is_private
-            FROM channel_messages cm
-            JOIN channels c ON cm.channel_id = c.channel_id
-            WHERE cm.message_id = %s AND cm.is_deleted = false
+            UPDATE channel_messages
+            SET content = %s, is_edited = true, updated_at = CURRENT_TIMESTAMP
+            WHERE message_id = %s AND user_id = %s AND is_deleted = false
+            RETURNING message_id, channel_id, content, is_edited, updated_at
         """,
-            (message_id,),
+            (content, message_id, session["user_id"]),
         )
+        message = cursor.fetchone()
+        if not message:
+            conn.rollback()
+            return jsonify({"error": "Message not found"}), 404
+
+        access, denied = authorize_channel(cursor, message["channel_id"], write=True)
+        if denied:
+            conn.rollback()
+            return denied
+
+        outbox.enqueue(cursor, message["channel_id"], "message_edited", _serialize_message(message))
+        conn.commit()
+        return jsonify({"message": "Message updated", "data": dict(message)}), 200
 
-        message_info = cursor.fetchone()
-        if not message_info:
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error editing message: {e}")
+        return jsonify({"error": "Failed to edit message"}), 500
+    finally:
+        cursor.close()
+
+
+@channels_bp.route("/messages/<int:message_id>", methods=["DELETE"])
+@require_auth
+def delete_message(message_id):
+    """Delete a message (its author, or a channel/community admin or moderator)"""
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        cursor.execute(
+            """
+            SELECT channel_id, user_id FROM channel_messages
+            WHERE message_id = %s AND is_deleted = false
+        """,
+            (message_id,),
+        )
+        message = cursor.fetchone()
+        if not message:
             return jsonify({"error": "Message not found"}), 404
 
-        channel_id, community_id, is_private = message_info
+        access, denied = authorize_channel(cursor, message["channel_id"])
+        if denied:
+            return denied
+        moderators = ("admin", "moderator")
+        if message["user_id"] != session["user_id"] and not (
+            access.community_role in moderators or access.channel_role in moderators
+        ):
+            return jsonify({"error": "You cannot delete this message"}), 403
 
-        # Check community membership
         cursor.execute(
             """
-            SELECT role FROM community_members 
-            WHERE community_id = %s AND user_id = %s AND status = 'active'
+            UPDATE channel_messages
+            SET is_deleted = true, updated_at = CURRENT_TIMESTAMP
+            WHERE message_id = %s
         """,
-            (community_id, session["user_id"]),
+            (message_id,),
         )
+        outbox.enqueue(cursor, message["channel_id"], "message_deleted", {"message_id": message_id})
+        conn.commit()
+        return jsonify({"message": "Message deleted"}), 200
 
-        if not cursor.fetchone():
-            return jsonify({"error": "Access denied"}), 403
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error deleting message: {e}")
+        return jsonify({"error": "Failed to delete message"}), 500
+    finally:
+        cursor.close()
 
-        # If private channel, check channel membership
-        if is_private:
-            cursor.execute(
-                """
-                SELECT 1 FROM channel_members 
-                WHERE channel_id = %s AND user_id = %s
-            """,
-                (channel_id, session["user_id"]),
-            )
 
-            if not cursor.fetchone():
-                return jsonify({"error": "Access denied to private channel"}), 403
+@channels_bp.route("/channels/<int:channel_id>/stream", methods=["GET"])
+@require_auth
+def stream_channel_events(channel_id):
+    """
+    Server-Sent Events stream of a channel's new messages, reactions and
+    deletions, for clients that cannot keep a WebSocket open.
+
+    Access is checked once when the stream opens. Every new_message event
+    carries its message id as the SSE id, so a reconnecting EventSource
+    sends Last-Event-ID and the missed messages are replayed from the table.
+    Streams end after SSE_MAX_STREAM_SECONDS; the browser then reconnects,
+    which also re-checks access.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    if last_event_id and not last_event_id.isdigit():
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+
+    hub = event_hub.get_hub()
+    subscription = None
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        access, denied = authorize_channel(cursor, channel_id)
+        if denied:
+            return denied
 
-        # Add or remove reaction
+        # Subscribe before reading so nothing committed in between is missed;
+        # duplicates are dropped by message id below
+        subscription = hub.subscribe(channel_id)
         cursor.execute(
             """
-            INSERT INTO message_reactions (message_id, user_id, emoji)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (message_id, user_id, emoji) DO NOTHING
-            RETURNING reaction_id
+            SELECT message_id FROM channel_messages
+            WHERE channel_id = %s AND is_deleted = false
+            ORDER BY created_at DESC, message_id DESC
+            LIMIT 1
         """,
-            (message_id, session["user_id"], emoji),
+            (channel_id,),
         )
+        newest = cursor.fetchone()
+        start_id = newest["message_id"] if newest else 0
 
-        result = cursor.fetchone()
-        if result:
-            conn.commit()
-            return jsonify({"message": "Reaction added"}), 201
-        else:
-            # Reaction already exists, remove it
+        replay = []
+        if last_event_id and int(last_event_id) < start_id:
             cursor.execute(
                 """
-                DELETE FROM message_reactions 
-                WHERE message_id = %s AND user_id = %s AND emoji = %s
-            """,
-                (message_id, session["user_id"], emoji),
+                SELECT
+                    {columns},
+                    u.username,
+                    u.pfp_path,
+                    COALESCE(
+                        (SELECT json_agg(json_build_object('emoji', rc.emoji, 'count', rc.count))
+                         FROM message_reaction_counts rc
+                         WHERE rc.message_id = cm.message_id),
+                        '[]'
+                    ) AS reactions
+                FROM channel_messages cm
+                JOIN users u ON cm.user_id = u.user_id
+                WHERE cm.channel_id = %s AND cm.is_deleted = false
+                  AND cm.message_id > %s AND cm.message_id <= %s
+                ORDER BY cm.message_id
+                LIMIT %s
+            """.format(columns=MESSAGE_COLUMNS),
+                (channel_id, int(last_event_id), start_id, SSE_REPLAY_LIMIT + 1),
             )
-            conn.commit()
-            return jsonify({"message": "Reaction removed"}), 200
-
+            replay = [_serialize_message(row) for row in cursor.fetchall()]
+        conn.commit()
     except Exception as e:
         conn.rollback()
-        logger.error(f"Error managing reaction: {e}")
-        return jsonify({"error": "Failed to manage reaction"}), 500
+        if subscription:
+            hub.unsubscribe(subscription)
+        logger.error(f"❌ Error opening channel stream: {e}")
+        return jsonify({"error": "Failed to open stream"}), 500
+    finally:
+        cursor.close()
+
+    def generate():
+        # Runs after the request context is gone, so the pooled connection has
+        # already been returned; only the hub subscription is held open
+        last_id = start_id
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        if len(replay) > SSE_REPLAY_LIMIT:
+            # Too far behind to replay; the client should reload history
+            yield _sse_event("resync", {"channel_id": channel_id}, last_id)
+        else:
+            for message in replay:
+                yield _sse_event("new_message", message, message["message_id"])
+            yield _sse_event("ready", {"channel_id": channel_id}, last_id)
+
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        while time.monotonic() < deadline and not subscription.overflowed:
+            event = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            if event["type"] == "new_message":
+                message_id = event["message"].get("message_id", 0)
+                if message_id <= last_id:
+                    continue
+                last_id = message_id
+                yield _sse_event("new_message", event["message"], message_id)
+            else:
+                yield _sse_event(event["type"], event["message"])
+
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Also runs when the client goes away before the first chunk is sent
+    response.call_on_close(lambda: hub.unsubscribe(subscription))
+    return response
+
+
+@channels_bp.route("/broadcaster/stats", methods=["GET"])
+@require_auth
+def get_broadcaster_stats():
+    """Real-time delivery health: the outbox backlog the relay has yet to deliver, and this worker's buffers"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        return (
+            jsonify(
+                {
+                    "outbox": outbox.backlog(cursor),
+                    "stream_subscribers": event_hub.get_hub().subscriber_count(),
+                    "reaction_buffer": reactions.toggle_buffer.stats(),
+                    "read_buffer": channel_reads.read_buffer.stats(),
+                }
+            ),
+            200,
+        )
     finally:
         cursor.close()
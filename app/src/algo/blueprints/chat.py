@@ -2,11 +2,13 @@ from flask import Blueprint, render_template, session, redirect, url_for, flash,
 from algo.db import get_db
 from algo.auth.decorators import login_required
 from algo.auth import user_roles
-from algo import utils
-import datetime
+from algo import utils, conversations, search
+from algo.pagination import page_limit
 
 bp = Blueprint('chat', __name__)
 
+HISTORY_PAGE_SIZE = 50
+
 @bp.route("/chat")
 @bp.route("/chat_list")
 @login_required
@@ -16,80 +18,9 @@ def chat_list():
     db = get_db()
     cur = db.cursor()
     try:
-        cur.execute(
-            """
-            SELECT DISTINCT other_user_id FROM (
-                -- Users from message history
-                SELECT CASE 
-                    WHEN m.sender_id = %s THEN m.receiver_id 
-                    ELSE m.sender_id 
-                END as other_user_id
-                FROM messages m
-                WHERE m.sender_id = %s OR m.receiver_id = %s
-                
-                UNION
-                
-                -- Users from accepted connections
-                SELECT CASE 
-                    WHEN c.user_id = %s THEN c.con_user_id 
-                    ELSE c.user_id 
-                END as other_user_id
-                FROM connections c
-                WHERE (c.user_id = %s OR c.con_user_id = %s) AND c.status = 'accepted'
-            ) AS combined_users
-            """,
-            (user_id, user_id, user_id, user_id, user_id, user_id),
-        )
-        user_ids = cur.fetchall()
-        chat_history = []
-        for (other_user_id,) in user_ids:
-            cur.execute(
-                "SELECT username, pfp_path, firstname, lastname FROM users WHERE user_id = %s",
-                (other_user_id,),
-            )
-            user_data = cur.fetchone()
-            if user_data:
-                username, pfp_path, firstname, lastname = user_data
-                if not pfp_path:
-                    full_name = f"{firstname or ''} {lastname or ''}".strip()
-                    pfp_path = utils.generate_default_avatar(full_name or username)
-                cur.execute(
-                    """
-                    SELECT content, created_at 
-                    FROM messages 
-                    WHERE (sender_id = %s AND receiver_id = %s) 
-                       OR (sender_id = %s AND receiver_id = %s)
-                    ORDER BY created_at DESC 
-                    LIMIT 1
-                    """,
-                    (user_id, other_user_id, other_user_id, user_id),
-                )
-                message_data = cur.fetchone()
-                if message_data:
-                    last_message = message_data[0]
-                    last_message_time = message_data[1]
-                else:
-                    cur.execute(
-                        """
-                        SELECT 1 FROM connections 
-                        WHERE ((user_id = %s AND con_user_id = %s) OR (user_id = %s AND con_user_id = %s)) 
-                        AND status = 'accepted'
-                        """,
-                        (user_id, other_user_id, other_user_id, user_id),
-                    )
-                    if cur.fetchone():
-                        last_message = "You're now connected! Start a conversation."
-                        last_message_time = None
-                    else:
-                        last_message = None
-                        last_message_time = None
-                chat_history.append(
-                    (other_user_id, username, pfp_path, last_message, last_message_time)
-                )
-        chat_history.sort(
-            key=lambda x: x[4] if x[4] else datetime.datetime.min, reverse=True
-        )
+        chat_history = conversations.fetch_conversations(cur, user_id)
     except Exception as e:
+        current_app.logger.error(f"Error loading conversations: {e}")
         chat_history = []
     finally:
         cur.close()
@@ -151,74 +82,21 @@ def chat(username):
         other_user_pfp = utils.generate_default_avatar(
             other_full_name or other_user_name
         )
-    cur.execute(
-        """
-        SELECT m.sender_id, m.receiver_id, m.content, m.created_at, u.username
-        FROM messages m
-        JOIN users u ON m.sender_id = u.user_id
-        WHERE (m.sender_id=%s AND m.receiver_id=%s) OR (m.sender_id=%s AND m.receiver_id=%s)
-        ORDER BY m.created_at
-        """,
-        (user_id, other_user_id, other_user_id, user_id),
+    # Only the newest page is rendered; older pages come from chat_history_api
+    history = conversations.fetch_history(
+        cur, user_id, other_user_id, limit=HISTORY_PAGE_SIZE
     )
-    conversation = cur.fetchall()
+    conversation = [row[1:] for row in history["messages"]]
+    received = [row[0] for row in history["messages"] if row[1] == other_user_id]
+    if received:
+        # Opening the conversation shows its newest page, so that page is read
+        conversations.mark_read(user_id, other_user_id, received[-1])
     try:
-        cur.execute(
-            """
-            SELECT DISTINCT 
-                CASE 
-                    WHEN m.sender_id = %s THEN m.receiver_id 
-                    ELSE m.sender_id 
-                END as other_user_id
-            FROM messages m
-            WHERE m.sender_id = %s OR m.receiver_id = %s
-            """,
-            (user_id, user_id, user_id),
-        )
-        user_ids = cur.fetchall()
-        chat_history = []
-        for (chat_user_id,) in user_ids:
-            cur.execute(
-                "SELECT username, pfp_path, firstname, lastname FROM users WHERE user_id = %s",
-                (chat_user_id,),
-            )
-            user_data = cur.fetchone()
-            if user_data:
-                chat_username, pfp_path, chat_firstname, chat_lastname = user_data
-                if not pfp_path:
-                    chat_full_name = (
-                        f"{chat_firstname or ''} {chat_lastname or ''}".strip()
-                    )
-                    pfp_path = utils.generate_default_avatar(
-                        chat_full_name or chat_username
-                    )
-                cur.execute(
-                    """
-                    SELECT content, created_at 
-                    FROM messages 
-                    WHERE (sender_id = %s AND receiver_id = %s) 
-                       OR (sender_id = %s AND receiver_id = %s)
-                    ORDER BY created_at DESC 
-                    LIMIT 1
-                    """,
-                    (user_id, chat_user_id, chat_user_id, user_id),
-                )
-                message_data = cur.fetchone()
-                last_message = message_data[0] if message_data else None
-                last_message_time = message_data[1] if message_data else None
-                chat_history.append(
-                    (
-                        chat_user_id,
-                        chat_username,
-                        pfp_path,
-                        last_message,
-                        last_message_time,
-                    )
-                )
-        chat_history.sort(
-            key=lambda x: x[4] if x[4] else datetime.datetime.min, reverse=True
+        chat_history = conversations.fetch_conversations(
+            cur, user_id, include_connections=False
         )
     except Exception as e:
+        current_app.logger.error(f"Error loading conversations: {e}")
         chat_history = []
     finally:
         cur.close()
@@ -230,4 +108,142 @@ def chat(username):
         other_user_pfp=other_user_pfp or "",
         chat_history=chat_history or [],
         current_user_id=user_id or None,
+        history_cursor=history["next_cursor"],
     )
+
+@bp.route("/api/chat/<username>/messages")
+@login_required
+def chat_history_api(username):
+    """
+    Return a page of DM history with ``username`` as JSON.
+
+    Query params: ``before`` (cursor, older messages), ``after`` (cursor,
+    newer messages) and ``limit`` (max 100). Without a cursor the newest
+    page is returned.
+    """
+    user_id = session["user_id"]
+    limit = page_limit(request.args.get("limit", type=int), default=HISTORY_PAGE_SIZE)
+    db = get_db()
+    cur = db.cursor()
+    try:
+        cur.execute("SELECT user_id FROM users WHERE username = %s", (username,))
+        other_user = cur.fetchone()
+        if not other_user:
+            return jsonify({"error": "User not found"}), 404
+        history = conversations.fetch_history(
+            cur,
+            user_id,
+            other_user[0],
+            before=request.args.get("before"),
+            after=request.args.get("after"),
+            limit=limit,
+        )
+        _, partner_last_read = conversations.read_pointers(cur, user_id, other_user[0])
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    finally:
+        cur.close()
+
+    messages = [
+        {
+            "message_id": message_id,
+            "sender_id": sender_id,
+            "receiver_id": receiver_id,
+            "content": content,
+            "created_at": created_at.isoformat() if created_at else None,
+            "timestamp": utils.format_utc_timestamp(created_at),
+            "username": sender_username,
+        }
+        for message_id, sender_id, receiver_id, content, created_at, sender_username in history["messages"]
+    ]
+    return jsonify(
+        {
+            "messages": messages,
+            "has_older": history["has_older"],
+            "has_newer": history["has_newer"],
+            "next_cursor": history["next_cursor"],
+            "prev_cursor": history["prev_cursor"],
+            "partner_last_read_message_id": partner_last_read,
+        }
+    )
+
+@bp.route("/api/chat/search")
+@login_required
+def search_chat():
+    """
+    Full-text search over the user's direct messages.
+
+    Query params: ``q`` (web-search syntax), optional ``with`` (username of
+    the other participant), ``cursor`` and ``limit`` (max 50).
+    """
+    user_id = session["user_id"]
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Search query required"}), 400
+    if len(query) > 200:
+        return jsonify({"error": "Search query too long"}), 400
+    db = get_db()
+    cur = db.cursor()
+    try:
+        partner_id = None
+        if request.args.get("with"):
+            cur.execute("SELECT user_id FROM users WHERE username = %s", (request.args["with"],))
+            partner = cur.fetchone()
+            if not partner:
+                return jsonify({"error": "User not found"}), 404
+            partner_id = partner[0]
+        page = search.search_direct_messages(
+            cur,
+            user_id,
+            query,
+            partner_id=partner_id,
+            cursor=request.args.get("cursor"),
+            limit=page_limit(request.args.get("limit", type=int), default=20, maximum=50),
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    finally:
+        cur.close()
+    for result in page["results"]:
+        result["timestamp"] = utils.format_utc_timestamp(result["created_at"])
+        result["created_at"] = result["created_at"].isoformat() if result["created_at"] else None
+    return jsonify(page)
+
+@bp.route("/api/chat/<username>/read", methods=["POST"])
+@login_required
+def mark_conversation_read(username):
+    """
+    Mark the DM conversation with ``username`` read up to ``message_id``
+    (default: the newest message they sent). Updates are batched.
+    """
+    user_id = session["user_id"]
+    data = request.get_json(silent=True) or {}
+    message_id = data.get("message_id")
+    if message_id is not None and (
+        isinstance(message_id, bool) or not isinstance(message_id, int) or message_id < 0
+    ):
+        return jsonify({"error": "Invalid message_id"}), 400
+    db = get_db()
+    cur = db.cursor()
+    try:
+        cur.execute("SELECT user_id FROM users WHERE username = %s", (username,))
+        other_user = cur.fetchone()
+        if not other_user:
+            return jsonify({"error": "User not found"}), 404
+        # Never past what was actually received, or new messages would arrive already read
+        message_id = conversations.read_pointer(cur, user_id, other_user[0], message_id)
+    finally:
+        cur.close()
+    conversations.mark_read(user_id, other_user[0], message_id)
+    return jsonify({"last_read_message_id": message_id}), 202
+
+@bp.route("/api/chat/unread")
+@login_required
+def unread_total():
+    """Total unread DMs, for the nav bar badge."""
+    db = get_db()
+    cur = db.cursor()
+    try:
+        return jsonify({"unread": conversations.total_unread(cur, session["user_id"])})
+    finally:
+        cur.close()
@@ -3,7 +3,7 @@ from algo.db import get_db
 from algo.auth.decorators import login_required
 from algo.auth import user_roles
 import datetime
-from algo import utils
+from algo import utils, channel_reads
 
 bp = Blueprint('communities', __name__)
 
@@ -43,21 +43,9 @@ def channels():
             )
         channels_list = []
         if selected_community_id:
-            cur.execute(
-                """
-                SELECT DISTINCT c.channel_id, c.name, c.description, c.channel_type, c.is_private, c.position_order, c.created_at
-                FROM channels c
-                LEFT JOIN channel_members cm ON c.channel_id = cm.channel_id
-                WHERE c.community_id = %s AND c.is_active = true
-                AND (
-                    c.is_private = false OR 
-                    (c.is_private = true AND cm.user_id = %s)
-                )
-                ORDER BY c.position_order, c.created_at
-                """,
-                (selected_community_id, user_id),
+            channels_list = channel_reads.sidebar_channels(
+                cur, user_id, selected_community_id
             )
-            channels_list = cur.fetchall()
         cur.close()
         return render_template(
             "channels.html",
@@ -2,7 +2,8 @@ from flask import Blueprint, render_template, session, redirect, url_for, flash,
 from algo.db import get_db
 from algo.auth.decorators import login_required
 from algo.auth import user_roles
-from algo import utils
+from algo import utils, directory, directory_index, connection_graph, recommendations, profiles, connection_requests
+from algo.pagination import page_limit
 import datetime
 
 bp = Blueprint('connections', __name__)
@@ -15,111 +16,19 @@ def requests_page():
     try:
         db = get_db()
         cur = db.cursor()
-        cur.execute(
-            "SELECT username, firstname, lastname, role, pfp_path FROM users WHERE user_id = %s",
-            (user_id,),
-        )
-        current_user = cur.fetchone()
-        cur.execute(
-            """
-            SELECT c.connection_id, c.user_id, c.request,
-                   u.firstname, u.lastname, u.username, u.pfp_path
-            FROM connections c
-            JOIN users u ON c.user_id = u.user_id
-            WHERE c.con_user_id = %s AND c.status = 'pending'
-            ORDER BY c.connection_id DESC
-            """,
-            (user_id,),
-        )
-        pending_requests = []
-        for row in cur.fetchall():
-            pending_requests.append(
-                {
-                    "connection_id": row[0],
-                    "user_id": row[1],
-                    "message": row[2],
-                    "created_at": "Recently",
-                    "name": f"{row[3]} {row[4]}",
-                    "username": row[5],
-                    "avatar": row[6],
-                }
-            )
-        cur.execute(
-            """
-            SELECT c.connection_id, c.con_user_id, c.request,
-                   u.firstname, u.lastname, u.username, u.pfp_path
-            FROM connections c
-            JOIN users u ON c.con_user_id = u.user_id
-            WHERE c.user_id = %s AND c.status = 'pending'
-            ORDER BY c.connection_id DESC
-            """,
-            (user_id,),
-        )
-        sent_requests = []
-        for row in cur.fetchall():
-            sent_requests.append(
-                {
-                    "connection_id": row[0],
-                    "user_id": row[1],
-                    "message": row[2],
-                    "created_at": "Recently",
-                    "name": f"{row[3]} {row[4]}",
-                    "username": row[5],
-                    "avatar": row[6],
-                }
-            )
-        cur.execute(
-            """
-            SELECT DISTINCT
-                CASE 
-                    WHEN c.user_id = %s THEN c.con_user_id 
-                    ELSE c.user_id 
-                END as other_user_id,
-                CASE 
-                    WHEN c.user_id = %s THEN u2.firstname 
-                    ELSE u1.firstname 
-                END as firstname,
-                CASE 
-                    WHEN c.user_id = %s THEN u2.lastname 
-                    ELSE u1.lastname 
-                END as lastname,
-                CASE 
-                    WHEN c.user_id = %s THEN u2.username 
-                    ELSE u1.username 
-                END as username,
-                CASE 
-                    WHEN c.user_id = %s THEN u2.pfp_path 
-                    ELSE u1.pfp_path 
-                END as avatar,
-                c.connection_id
-            FROM connections c
-            JOIN users u1 ON c.user_id = u1.user_id
-            JOIN users u2 ON c.con_user_id = u2.user_id
-            WHERE (c.user_id = %s OR c.con_user_id = %s) AND c.status = 'accepted'
-            ORDER BY c.connection_id DESC
-            """,
-            (user_id, user_id, user_id, user_id, user_id, user_id, user_id),
-        )
-        connections = []
-        for row in cur.fetchall():
-            connections.append(
-                {
-                    "user_id": row[0],
-                    "name": f"{row[1]} {row[2]}",
-                    "username": row[3],
-                    "avatar": row[4],
-                    "connected_at": "Recently",
-                }
-            )
-        connections_count = len(connections)
-        
+        # Viewer, counters and the first slice of each list in one round trip
+        page = connection_requests.load(cur, user_id)
+        lists = page["lists"]
         return render_template(
             "requests.html",
-            pending_requests=pending_requests,
-            sent_requests=sent_requests,
-            connections=connections,
-            connections_count=connections_count,
-            current_user=current_user,
+            pending_requests=lists["received"]["items"],
+            sent_requests=lists["sent"]["items"],
+            connections=lists["accepted"]["items"],
+            cursors={list_type: lists[list_type]["next_cursor"] for list_type in lists},
+            connections_count=page["counts"]["accepted"],
+            pending_count=page["counts"]["received"],
+            sent_count=page["counts"]["sent"],
+            current_user=page["current_user"],
         )
     except Exception as e:
         flash("Error loading requests page")
@@ -141,118 +50,158 @@ def connect():
             (user_id,),
         )
         current_user = cur.fetchone()
-        cur.execute(
-            """
-            SELECT u.user_id, u.firstname, u.lastname, u.username, u.university_name, 
-                   u.graduation_year, u.current_city, u.pfp_path, u.role,
-                   we.company_name, we.job_title,
-                   STRING_AGG(i.name, ', ') as interests
-            FROM users u
-            LEFT JOIN work_experience we ON u.user_id = we.user_id AND we.leave_year IS NULL
-            LEFT JOIN user_interests ui ON u.user_id = ui.user_id
-            LEFT JOIN interests i ON ui.interest_id = i.interest_id
-            WHERE u.user_id != %s AND u.verification_status = 'verified'
-            GROUP BY u.user_id, u.firstname, u.lastname, u.username, u.university_name, 
-                     u.graduation_year, u.current_city, u.pfp_path, u.role,
-                     we.company_name, we.job_title
-            ORDER BY u.lastname, u.firstname
-            """,
-            (user_id,),
+        first_page = directory.search(cur, user_id, {})
+        facets = directory_index.get_index().counts(cur, user_id)["facets"]
+        return render_template(
+            "connect.html",
+            people=first_page["people"],
+            next_cursor=first_page["next_cursor"],
+            universities=[item["value"] for item in facets["university"]],
+            graduation_years=[str(item["value"]) for item in facets["graduation_year"]],
+            locations=[item["value"] for item in facets["city"]],
+            current_user=current_user,
         )
-        all_users = cur.fetchall()
+    except Exception as e:
+        flash("Error loading connections page")
+        return redirect(url_for("dashboard.user_dashboard"))
+    finally:
+        cur.close()
+
+@bp.route("/api/directory")
+@login_required
+@user_roles.verified_user_required
+def directory_page():
+    """One page of the alumni directory, filtered server-side"""
+    filters = {
+        name: request.args.get(name, "").strip()
+        for name in ("q", "university", "city", "role", "company", "interest")
+    }
+    filters["graduation_year"] = request.args.get("graduation_year", type=int)
+    if request.args.get("graduation_year") and filters["graduation_year"] is None:
+        return ({"success": False, "message": "Invalid graduation year"}, 400)
+    limit = page_limit(request.args.get("limit", type=int), default=directory.DIRECTORY_PAGE_SIZE, maximum=50)
+    db = get_db()
+    cur = db.cursor()
+    try:
+        page = directory.search(cur, session["user_id"], filters, request.args.get("cursor"), limit)
+        return {"success": True, **page}
+    except ValueError:
+        return ({"success": False, "message": "Invalid cursor"}, 400)
+    except Exception as e:
+        return ({"success": False, "message": "Error loading directory"}, 500)
+    finally:
+        cur.close()
+
+@bp.route("/api/directory/facets")
+@login_required
+@user_roles.verified_user_required
+def directory_facets():
+    """Filter dropdown counts for the current selection"""
+    selected = {name: request.args.get(name, "").strip() for name in ("university", "city", "role")}
+    selected["graduation_year"] = request.args.get("graduation_year", type=int)
+    db = get_db()
+    cur = db.cursor()
+    try:
+        return {"success": True, **directory_index.get_index().counts(cur, session["user_id"], selected)}
+    except Exception as e:
+        return ({"success": False, "message": "Error loading filters"}, 500)
+    finally:
+        cur.close()
+
+@bp.route("/api/people_you_may_know")
+@login_required
+@user_roles.verified_user_required
+def people_you_may_know():
+    """Friend-of-friend suggestions ranked by mutual connections"""
+    user_id = session["user_id"]
+    limit = page_limit(request.args.get("limit", type=int), default=10, maximum=50)
+    db = get_db()
+    cur = db.cursor()
+    try:
+        # Over-fetch: candidates with a pending request or no verification are dropped below
+        ranked = connection_graph.get_graph().suggestions(cur, user_id, limit * 2)
+        if not ranked:
+            return {"success": True, "people": []}
+        cards = directory.people_by_ids(cur, user_id, [suggested for suggested, _ in ranked])
+        people = []
+        for suggested, mutual_count in ranked:
+            person = cards.get(suggested)
+            if person and person["connection_status"] == "none":
+                people.append({**person, "mutual_count": mutual_count})
+        return {"success": True, "people": people[:limit]}
+    except Exception as e:
+        return ({"success": False, "message": "Error loading suggestions"}, 500)
+    finally:
+        cur.close()
+
+@bp.route("/api/recommendations")
+@login_required
+@user_roles.verified_user_required
+def recommended_people():
+    """Alumni (mode=peers) or mentors (mode=mentors) ranked by profile similarity"""
+    user_id = session["user_id"]
+    mode = request.args.get("mode", "peers")
+    if mode not in recommendations.MODES:
+        return ({"success": False, "message": "Invalid mode"}, 400)
+    limit = page_limit(request.args.get("limit", type=int), default=10, maximum=50)
+    db = get_db()
+    cur = db.cursor()
+    try:
+        # Over-fetch: candidates with a pending request either way are dropped below
+        ranked = recommendations.get_model().recommend(cur, user_id, mode, limit * 2)
+        if not ranked:
+            return {"success": True, "people": []}
+        cards = directory.people_by_ids(cur, user_id, [match["user_id"] for match in ranked])
+        people = []
+        for match in ranked:
+            person = cards.get(match["user_id"])
+            if person and person["connection_status"] == "none":
+                people.append({**person, "score": match["score"], "reasons": match["reasons"]})
+        return {"success": True, "people": people[:limit]}
+    except Exception as e:
+        return ({"success": False, "message": "Error loading recommendations"}, 500)
+    finally:
+        cur.close()
+
+@bp.route("/api/connection_path/<username>")
+@login_required
+@user_roles.verified_user_required
+def connection_path(username):
+    """Shortest chains of connections from the current user to another user"""
+    user_id = session["user_id"]
+    db = get_db()
+    cur = db.cursor()
+    try:
         cur.execute(
-            """
-            SELECT con_user_id, status, connection_id FROM connections 
-            WHERE user_id = %s
-            """,
-            (user_id,),
+            "SELECT user_id FROM users WHERE username = %s AND verification_status = 'verified'",
+            (username,),
         )
-        connections = {
-            row[0]: {"status": row[1], "connection_id": row[2]}
-            for row in cur.fetchall()
-        }
+        target = cur.fetchone()
+        if not target:
+            return ({"success": False, "message": "User not found"}, 404)
+        result = connection_graph.get_graph().paths(cur, user_id, target[0])
+        hops = {hop for path in result["paths"] for hop in path}
         cur.execute(
-            """
-            SELECT user_id, status, connection_id FROM connections 
-            WHERE con_user_id = %s
-            """,
-            (user_id,),
+            "SELECT user_id, firstname, lastname, username, pfp_path FROM users WHERE user_id = ANY(%s)",
+            (list(hops),),
         )
-        reverse_connections = {
-            row[0]: {"status": row[1], "connection_id": row[2]}
-            for row in cur.fetchall()
-        }
-        people_data = []
-        for user in all_users:
-            name = f"{user[1]} {user[2]}"
-            avatar = user[7] if user[7] else utils.generate_default_avatar(name)
-            user_data = {
-                "id": user[0],
+        people = {}
+        for row in cur.fetchall():
+            name = f"{row[1]} {row[2]}"
+            people[row[0]] = {
+                "id": row[0],
                 "name": name,
-                "username": user[3],
-                "university": user[4] or "Not specified",
-                "graduation_year": user[5] or "Not specified",
-                "location": user[6] or "Not specified",
-                "avatar": avatar,
-                "role": user[8] or "unverified",
-                "company": user[9] or "Not specified",
-                "title": user[10] or "Not specified",
-                "interests": user[11].split(", ") if user[11] else [],
-                "connection_status": "none",
+                "username": row[3],
+                "avatar": row[4] or utils.generate_default_avatar(name),
             }
-            if user[0] in connections:
-                user_data["connection_status"] = connections[user[0]]["status"]
-                user_data["connection_id"] = connections[user[0]]["connection_id"]
-            elif user[0] in reverse_connections:
-                if reverse_connections[user[0]]["status"] == "accepted":
-                    user_data["connection_status"] = "connected"
-                elif reverse_connections[user[0]]["status"] == "pending":
-                    user_data["connection_status"] = "received_request"
-                    user_data["connection_id"] = reverse_connections[user[0]][
-                        "connection_id"
-                    ]
-            people_data.append(user_data)
-        universities = list(
-            set(
-                [
-                    user["university"]
-                    for user in people_data
-                    if user["university"] != "Not specified"
-                ]
-            )
-        )
-        graduation_years = list(
-            set(
-                [
-                    str(user["graduation_year"])
-                    for user in people_data
-                    if user["graduation_year"] != "Not specified"
-                ]
-            )
-        )
-        locations = list(
-            set(
-                [
-                    user["location"]
-                    for user in people_data
-                    if user["location"] != "Not specified"
-                ]
-            )
-        )
-        universities.sort()
-        graduation_years.sort(reverse=True)
-        locations.sort()
-        return render_template(
-            "connect.html",
-            people=people_data,
-            universities=universities,
-            graduation_years=graduation_years,
-            locations=locations,
-            current_user=current_user,
-        )
+        return {
+            "success": True,
+            "degree": result["degree"],
+            "truncated": result["truncated"],
+            "paths": [[people[hop] for hop in path if hop in people] for path in result["paths"]],
+        }
     except Exception as e:
-        flash("Error loading connections page")
-        return redirect(url_for("dashboard.user_dashboard"))
+        return ({"success": False, "message": "Error finding connection path"}, 500)
     finally:
         cur.close()
 
@@ -273,30 +222,43 @@ def send_connection_request():
             
         db = get_db()
         cur = db.cursor()
+        # One row per pair: a denied request may be re-sent, anything else conflicts
         cur.execute(
             """
-            SELECT connection_id, status FROM connections 
-            WHERE (user_id = %s AND con_user_id = %s) OR (user_id = %s AND con_user_id = %s)
+            INSERT INTO connections (user_id, con_user_id, request, status)
+            VALUES (%s, %s, %s, 'pending')
+            ON CONFLICT ((LEAST(user_id, con_user_id)), (GREATEST(user_id, con_user_id)))
+            DO UPDATE SET user_id = EXCLUDED.user_id, con_user_id = EXCLUDED.con_user_id,
+                          request = EXCLUDED.request, status = 'pending'
+            WHERE connections.status = 'denied'
+            RETURNING connection_id
             """,
-            (user_id, target_user_id, target_user_id, user_id),
+            (user_id, target_user_id, message),
         )
-        existing_connection = cur.fetchone()
-        if existing_connection:
-            status = existing_connection[1]
-            if status == "accepted":
+        inserted = cur.fetchone()
+        if not inserted:
+            cur.execute(
+                """
+                SELECT user_id, status FROM connections
+                WHERE LEAST(user_id, con_user_id) = LEAST(%s, %s)
+                  AND GREATEST(user_id, con_user_id) = GREATEST(%s, %s)
+                """,
+                (user_id, target_user_id, user_id, target_user_id),
+            )
+            existing_connection = cur.fetchone()
+            if existing_connection and existing_connection[1] == "accepted":
                 return ({"success": False, "message": "Already connected"}, 400)
-            elif status == "pending":
+            elif existing_connection and existing_connection[0] == user_id:
                 return (
                     {"success": False, "message": "Connection request already sent"},
                     400,
                 )
-        cur.execute(
-            """
-            INSERT INTO connections (user_id, con_user_id, request, status)
-            VALUES (%s, %s, %s, 'pending')
-            """,
-            (user_id, target_user_id, message),
-        )
+            elif existing_connection:
+                return (
+                    {"success": False, "message": "This user has already sent you a request"},
+                    400,
+                )
+            return ({"success": False, "message": "Please try again"}, 409)
         db.commit()
         cur.execute(
             "SELECT firstname, lastname FROM users WHERE user_id = %s",
@@ -308,6 +270,7 @@ def send_connection_request():
             "success": True,
             "message": f"Connection request sent to {target_name}",
             "status": "pending",
+            "connection_id": inserted[0],
         }
     except Exception as e:
         return ({"success": False, "message": "Error sending connection request"}, 500)
@@ -345,7 +308,11 @@ def respond_connection_request():
             """,
             (new_status, connection_id),
         )
+        if new_status == "accepted":
+            connection_graph.notify_changed(cur, connection_record[0], user_id)
         db.commit()
+        if new_status == "accepted":
+            profiles.get_cache().invalidate(connection_record[0], user_id)
         return {
             "success": True,
             "message": f"Connection request {action}ed",
@@ -356,6 +323,28 @@ def respond_connection_request():
     finally:
         cur.close()
 
+@bp.route("/api/connection_requests")
+@login_required
+def connection_requests_page():
+    """One page of received or sent requests, or accepted connections, with counts"""
+    list_type = request.args.get("type", "received")
+    if list_type not in connection_requests.LIST_TYPES:
+        return ({"success": False, "message": "Invalid list type"}, 400)
+    limit = page_limit(
+        request.args.get("limit", type=int), default=connection_requests.REQUESTS_PAGE_SIZE, maximum=50
+    )
+    db = get_db()
+    cur = db.cursor()
+    try:
+        page = connection_requests.load(cur, session["user_id"], (list_type,), request.args.get("cursor"), limit)
+        return {"success": True, "counts": page["counts"], **page["lists"][list_type]}
+    except ValueError:
+        return ({"success": False, "message": "Invalid cursor"}, 400)
+    except Exception as e:
+        return ({"success": False, "message": "Error loading requests"}, 500)
+    finally:
+        cur.close()
+
 @bp.route("/api/get_connection_requests")
 @login_required
 def get_connection_requests():
@@ -364,31 +353,16 @@ def get_connection_requests():
         user_id = session["user_id"]
         db = get_db()
         cur = db.cursor()
-        cur.execute(
-            """
-            SELECT c.connection_id, c.user_id, c.request,
-                   u.firstname, u.lastname, u.username, u.pfp_path
-            FROM connections c
-            JOIN users u ON c.user_id = u.user_id
-            WHERE c.con_user_id = %s AND c.status = 'pending'
-            ORDER BY c.connection_id DESC
-            """,
-            (user_id,),
-        )
-        requests = []
-        for row in cur.fetchall():
-            requests.append(
-                {
-                    "connection_id": row[0],
-                    "user_id": row[1],
-                    "message": row[2],
-                    "created_at": "Recently",
-                    "name": f"{row[3]} {row[4]}",
-                    "username": row[5],
-                    "avatar": row[6],
-                }
-            )
-        return {"success": True, "requests": requests}
+        page = connection_requests.load(cur, user_id, ("received",), request.args.get("cursor"))
+        received = page["lists"]["received"]
+        return {
+            "success": True,
+            "requests": received["items"],
+            "has_more": received["has_more"],
+            "next_cursor": received["next_cursor"],
+        }
+    except ValueError:
+        return ({"success": False, "message": "Invalid cursor"}, 400)
     except Exception as e:
         return ({"success": False, "message": "Error loading requests"}, 500)
     finally:
@@ -423,8 +397,93 @@ def cancel_connection_request():
             (connection_id,),
         )
         db.commit()
+        profiles.get_cache().invalidate(user_id, connection[1])
         return {"success": True, "message": "Connection request cancelled successfully"}
     except Exception as e:
         return ({"success": False, "message": "Error cancelling request"}, 500)
     finally:
         cur.close()
+
+def _bulk_ids(data, key):
+    """A non-empty list of at most BULK_LIMIT integer ids from ``data[key]``, or None."""
+    ids = (data or {}).get(key)
+    if not isinstance(ids, list) or not ids or len(ids) > connection_requests.BULK_LIMIT:
+        return None
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+        return None
+    return ids
+
+def _bulk_response(results):
+    succeeded = sum(1 for result in results if result["success"])
+    return {"success": True, "results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+@bp.route("/api/connection_requests/respond", methods=["POST"])
+@login_required
+def respond_connection_requests():
+    """Accept or reject many connection requests in one transaction"""
+    data = request.get_json(silent=True)
+    connection_ids = _bulk_ids(data, "connection_ids")
+    action = (data or {}).get("action")
+    if connection_ids is None or action not in ["accept", "reject"]:
+        return (
+            {"success": False, "message": f"Send an action and 1-{connection_requests.BULK_LIMIT} connection ids"},
+            400,
+        )
+    user_id = session["user_id"]
+    db = get_db()
+    cur = db.cursor()
+    try:
+        results, pairs = connection_requests.respond_many(cur, user_id, connection_ids, action)
+        connection_graph.notify_pairs_changed(cur, pairs)
+        db.commit()
+        if pairs:
+            profiles.get_cache().invalidate(user_id, *(sender for sender, _ in pairs))
+        return _bulk_response(results)
+    except Exception as e:
+        db.rollback()
+        return ({"success": False, "message": "Error processing requests"}, 500)
+    finally:
+        cur.close()
+
+@bp.route("/api/connection_requests/cancel", methods=["POST"])
+@login_required
+def cancel_connection_requests():
+    """Cancel many sent connection requests in one transaction"""
+    connection_ids = _bulk_ids(request.get_json(silent=True), "connection_ids")
+    if connection_ids is None:
+        return ({"success": False, "message": f"Send 1-{connection_requests.BULK_LIMIT} connection ids"}, 400)
+    user_id = session["user_id"]
+    db = get_db()
+    cur = db.cursor()
+    try:
+        results, recipients = connection_requests.cancel_many(cur, user_id, connection_ids)
+        db.commit()
+        if recipients:
+            profiles.get_cache().invalidate(user_id, *recipients)
+        return _bulk_response(results)
+    except Exception as e:
+        db.rollback()
+        return ({"success": False, "message": "Error cancelling requests"}, 500)
+    finally:
+        cur.close()
+
+@bp.route("/api/connection_requests/send", methods=["POST"])
+@login_required
+@user_roles.verified_user_required
+def send_connection_requests():
+    """Send connection requests to many users in one transaction"""
+    data = request.get_json(silent=True)
+    user_ids = _bulk_ids(data, "user_ids")
+    if user_ids is None:
+        return ({"success": False, "message": f"Send 1-{connection_requests.BULK_LIMIT} user ids"}, 400)
+    db = get_db()
+    cur = db.cursor()
+    try:
+        results = connection_requests.send_many(cur, session["user_id"], user_ids, data.get("message", ""))
+        db.commit()
+        return _bulk_response(results)
+    except Exception as e:
+        db.rollback()
+        return ({"success": False, "message": "Error sending connection requests"}, 500)
+    finally:
+        cur.close()
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, flash, redirect, url_for
 
 bp = Blueprint('core', __name__)
 
@@ -29,4 +29,5 @@ def thanks():
 
 @bp.route("/recommendations")
 def recommendations():
-    return render_template("recommendations.html")
+    # Recommendations are served on the connect page (see /api/recommendations)
+    return redirect(url_for("connections.connect"))
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, session, redirect, url_for, flash,
 from algo.db import get_db
 from algo.auth.decorators import login_required
 from algo.auth import user_roles
+from algo import directory_index
 
 bp = Blueprint('dashboard', __name__)
 
@@ -273,6 +274,7 @@ def handle_verification_request():
                 (admin_id, user_id),
             )
             message = f"Verification request rejected for {username}"
+        directory_index.notify_changed(cur, user_id)
         db.commit()
         return {
             "success": True,
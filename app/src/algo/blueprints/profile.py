@@ -8,9 +8,12 @@ from algo.auth.decorators import login_required
 from algo.utils import is_safe_url
 from algo import utils
 from algo import validators
+from algo import directory_index, connection_graph, profiles
 
 bp = Blueprint('profile', __name__)
 
+MUTUAL_PREVIEW = 6
+
 @bp.route('/')
 @login_required
 def profile_redirect():
@@ -23,101 +26,57 @@ def user_profile(username):
     cur = db.cursor()
     user_id = session.get('user_id')
 
-    cur.execute(
-        """
-        SELECT user_id, firstname, lastname, email, username, dob, graduation_year, 
-               university_name, department, college, current_city, pfp_path, 
-               registration_date, role, enrollment_number, community_id, last_login, login_count
-        FROM users 
-        WHERE username = %s OR user_id = %s
-    """,
-        (username, user_id),
-    )
-
-    user_data = cur.fetchone()
-    if not user_data:
+    # One aggregated query per profile, served from the per-worker cache
+    cache = profiles.get_cache()
+    profile = cache.profile(cur, username, user_id)
+    if not profile:
+        cur.close()
         flash('User not found')
         return redirect(url_for('core.home'))
-
-    cur.execute(
-        """
-        SELECT i.name 
-        FROM interests i
-        JOIN user_interests ui ON i.interest_id = ui.interest_id
-        WHERE ui.user_id = %s
-    """,
-        (user_data[0],),
-    )
-
-    user_interests = [row[0] for row in cur.fetchall()]
-
-    cur.execute(
-        """
-        SELECT degree_type, university_name, college_name, major, graduation_year
-        FROM education_details 
-        WHERE user_id = %s
-    """,
-        (user_data[0],),
-    )
-
-    education_data = cur.fetchone()
-
-    cur.execute(
-        """
-        SELECT company_name, job_title, join_year, leave_year
-        FROM work_experience 
-        WHERE user_id = %s
-        ORDER BY join_year DESC
-    """,
-        (user_data[0],),
-    )
-
-    work_experience = cur.fetchall()
-
-    cur.execute(
-        """
-        SELECT COUNT(*) 
-        FROM connections 
-        WHERE (user_id = %s OR con_user_id = %s) AND status = 'accepted'
-    """,
-        (user_data[0], user_data[0]),
-    )
-
-    connections_count = cur.fetchone()[0]
-    
-    # Get community name if exists
-    community_name = None
-    if user_data[15]:
-        cur.execute(
-            "SELECT name FROM communities WHERE community_id = %s", (user_data[15],)
-        )
-        community_result = cur.fetchone()
-        if community_result:
-            community_name = community_result[0]
+    user_data = profile["user_data"]
 
     # Get current logged-in user's info for the dropdown
     current_user_info = None
     if user_id != user_data[0]:  # If viewing someone else's profile
-        cur.execute(
-            """
-            SELECT user_id, firstname, lastname, email, username, pfp_path, role
-            FROM users 
-            WHERE user_id = %s
-        """,
-            (user_id,),
-        )
-        current_user_info = cur.fetchone()
+        current_user_info = cache.viewer(cur, user_id)
+
+    # Mutual connections come from the in-memory graph; only the first few are looked up
+    mutual_connections, mutual_count = [], 0
+    if user_id != user_data[0]:
+        mutual_ids = connection_graph.get_graph().mutual(cur, user_id, user_data[0])
+        mutual_count = len(mutual_ids)
+        if mutual_ids:
+            cur.execute(
+                """
+                SELECT username, firstname, lastname, pfp_path
+                FROM users
+                WHERE user_id = ANY(%s)
+                ORDER BY lastname, firstname
+                LIMIT %s
+            """,
+                (mutual_ids, MUTUAL_PREVIEW),
+            )
+            mutual_connections = [
+                {
+                    "username": row[0],
+                    "name": f"{row[1]} {row[2]}",
+                    "avatar": row[3] or utils.generate_default_avatar(f"{row[1]} {row[2]}"),
+                }
+                for row in cur.fetchall()
+            ]
 
     cur.close()
 
     return render_template(
         'profile.html',
         user_data=user_data,
-        user_interests=user_interests,
-        education_data=education_data,
-        work_experience=work_experience,
-        connections_count=connections_count,
-        community_name=community_name,
+        user_interests=profile["user_interests"],
+        education_data=profile["education_data"],
+        work_experience=profile["work_experience"],
+        connections_count=profile["connections_count"],
+        mutual_connections=mutual_connections,
+        mutual_count=mutual_count,
+        community_name=profile["community_name"],
         current_user_info=current_user_info,
         user_bio=None,
         user_skills=[],
@@ -255,6 +214,7 @@ def complete_profile():
                     user_id,
                 ),
             )
+            directory_index.notify_changed(cur, user_id)
 
             # Insert education details if provided
             if degree or major or gpa:
@@ -354,6 +314,7 @@ def complete_profile():
             )
 
             db.commit()
+            profiles.get_cache().invalidate(user_id)
 
             # Redirect to interests page to complete profile setup
             return redirect(url_for("profile.interests"))
@@ -387,7 +348,9 @@ def interests():
                     "INSERT INTO user_interests (user_id,interest_id) VALUES (%s,%s) ",
                     (user_id, interest_id),
                 )
+            directory_index.notify_changed(cur, user_id)
             db.commit()
+            profiles.get_cache().invalidate(user_id)
 
             # Check for saved redirect URL after profile completion
             post_profile_redirect = session.pop("post_profile_redirect", None)
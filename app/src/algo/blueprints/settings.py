@@ -2,7 +2,7 @@ from flask import Blueprint, render_template, session, redirect, url_for, flash,
 from algo.db import get_db
 from algo.auth.decorators import login_required
 import datetime
-from algo import utils
+from algo import utils, directory_index, connection_graph, profiles
 
 bp = Blueprint('settings', __name__)
 
@@ -109,7 +109,9 @@ def update_account():
             update_values.append(user_id)
             query = f"UPDATE users SET {', '.join(update_fields)} WHERE user_id = %s"
             cur.execute(query, update_values)
+            directory_index.notify_changed(cur, user_id)
             db.commit()
+            profiles.get_cache().invalidate(user_id)
             if data.get("username"):
                 session["username"] = data["username"]
         return {"success": True, "message": "Account updated successfully"}
@@ -124,6 +126,10 @@ def update_privacy():
     try:
         data = request.get_json()
         user_id = session["user_id"]
+        # The settings form sends the switch state as a boolean
+        visibility = data.get("profileVisibility", "public")
+        if isinstance(visibility, bool):
+            visibility = "public" if visibility else "private"
         db = get_db()
         cur = db.cursor()
         cur.execute(
@@ -132,8 +138,9 @@ def update_privacy():
                 profile_visibility = %s
             WHERE user_id = %s
             """,
-            (data.get("profileVisibility", "public"), user_id),
+            (visibility, user_id),
         )
+        connection_graph.notify_visibility_changed(cur, user_id)
         db.commit()
         return {"success": True, "message": "Privacy settings updated successfully"}
     except Exception as e:
@@ -212,7 +219,9 @@ def update_profile_picture():
                     "UPDATE users SET pfp_path = %s WHERE user_id = %s",
                     (pfp_url, user_id),
                 )
+                directory_index.notify_changed(cur, user_id)
                 db.commit()
+                profiles.get_cache().invalidate(user_id)
                 session["pfp_path"] = pfp_url
                 return {"success": True, "pfp_url": pfp_url}
         return ({"success": False, "message": "Failed to upload image"}, 400)
@@ -254,6 +263,8 @@ def delete_account():
         cur.execute("DELETE FROM education_details WHERE user_id = %s", (user_id,))
         cur.execute("DELETE FROM work_experience WHERE user_id = %s", (user_id,))
         cur.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
+        directory_index.notify_changed(cur, user_id)
+        connection_graph.notify_changed(cur, user_id)
         db.commit()
         session.clear()
         return {"success": True, "message": "Account deleted successfully"}
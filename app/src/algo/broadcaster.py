@@ -0,0 +1,73 @@
+"""
+Batch sender for the Go WebSocket server's broadcast endpoint.
+
+The outbox relay (algo.outbox) is the only caller: it hands each batch of
+outbox rows to Broadcaster.send_batch(), which POSTs them over a keep-alive
+HTTP session ({"type": "batch", "events": [...]} for more than one event)
+and retries failures with exponential backoff. Web workers never post to
+the Go server themselves.
+"""
+
+import os
+import time
+import logging
+import threading
+import requests
+
+logger = logging.getLogger(__name__)
+
+GO_BROADCAST_URL = os.getenv("GO_BROADCAST_URL", "http://localhost:8080/api/broadcast")
+
+
+class Broadcaster:
+    """
+    Synchronous HTTP batch sender.
+
+    Args:
+        url: Go broadcast endpoint
+        max_retries: Attempts per batch before it is counted as failed
+        backoff: Base delay in seconds, doubled on every retry
+        timeout: HTTP timeout per POST
+    """
+
+    def __init__(self, url=GO_BROADCAST_URL, max_retries=3, backoff=0.2, timeout=2.0):
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"sent": 0, "batches": 0, "retries": 0, "failed": 0}
+
+    def send_batch(self, events):
+        """POST events, retrying with backoff. Returns True once the Go server acknowledged them."""
+        payload = events[0] if len(events) == 1 else {"type": "batch", "events": events}
+        for attempt in range(self.max_retries):
+            if attempt:
+                self._count("retries")
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                response = self._session().post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code == 200:
+                    self._count("batches")
+                    self._count("sent", len(events))
+                    return True
+                logger.warning(f"⚠️ Go WebSocket returned status {response.status_code}")
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"⚠️ Failed to reach Go WebSocket server: {e}")
+        self._count("failed", len(events))
+        return False
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
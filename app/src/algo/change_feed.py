@@ -0,0 +1,163 @@
+"""
+Cross-worker change notifications for in-memory indexes.
+
+Writers call notify() inside their transaction. PostgreSQL delivers the
+payload to every LISTENing connection once the transaction commits, and
+drops it on rollback. Each in-memory index holds a ChangeFeed and drains
+it without blocking before it answers a request. In-memory state is
+therefore patched lazily on the next read, with no listener thread.
+
+All feeds in a worker share one LISTEN connection, the Listener returned
+by get_listener(). algo.db reserves that connection in the worker's pool
+budget.
+"""
+
+import os
+import logging
+import threading
+
+from algo import db
+
+logger = logging.getLogger(__name__)
+
+
+def notify(cur, channel, payload):
+    """Queue ``payload`` on ``channel``; delivered when the caller commits."""
+    cur.execute("SELECT pg_notify(%s, %s)", (channel, str(payload)))
+
+
+def notify_many(cur, channel, payloads):
+    """notify() for several payloads in one statement; each is still delivered separately."""
+    payloads = [str(payload) for payload in payloads]
+    if payloads:
+        cur.execute("SELECT pg_notify(%s, p) FROM unnest(%s::text[]) AS p", (channel, payloads))
+
+
+class Listener:
+    """
+    One LISTEN connection shared by every feed in a worker.
+
+    Notifications are read whenever any feed drains and are handed to each
+    feed listening on their channel. If the connection is lost or the worker
+    forks, every feed's next drain raises, so each index rebuilds itself.
+
+    Args:
+        connect: Zero-argument callable returning a dedicated connection
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._channels = set()
+        self._feeds = []
+        self._generation = 0  # bumped whenever the connection is dropped
+
+    def feed(self, *channels):
+        """A ChangeFeed for ``channels`` on the shared connection."""
+        return ChangeFeed(self, channels)
+
+    def _listen(self, feed):
+        """LISTEN on the feed's channels. Returns the connection generation, or None."""
+        with self._lock:
+            self._check_pid()
+            try:
+                if self._conn is None:
+                    conn = self._connect()
+                    conn.autocommit = True
+                    self._conn = conn
+                missing = [channel for channel in feed.channels if channel not in self._channels]
+                if missing:
+                    cur = self._conn.cursor()
+                    for channel in missing:
+                        cur.execute(f"LISTEN {channel}")
+                    cur.close()
+                    self._channels.update(missing)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not LISTEN on {', '.join(feed.channels)}: {e}")
+                self._drop()
+                return None
+            if feed not in self._feeds:
+                self._feeds.append(feed)
+            feed._pending = []
+            return self._generation
+
+    def _drain(self, feed):
+        with self._lock:
+            self._check_pid()
+            if feed._generation != self._generation or self._conn is None:
+                raise ConnectionError("change feed connection was replaced")
+            try:
+                self._conn.poll()
+            except Exception:
+                self._drop()
+                raise
+            for notification in self._conn.notifies:
+                for other in self._feeds:
+                    if other._generation == self._generation and notification.channel in other.channels:
+                        other._pending.append(notification.payload)
+            self._conn.notifies.clear()
+            payloads, feed._pending = feed._pending, []
+            return payloads
+
+    def _check_pid(self):
+        # The connection does not survive fork(); the child starts clean
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._drop()
+
+    def _drop(self):
+        self._conn = None
+        self._channels = set()
+        self._generation += 1
+
+
+class ChangeFeed:
+    """One index's view of a Listener: the payloads of its channels since the last drain."""
+
+    def __init__(self, listener, channels):
+        self._listener = listener
+        self.channels = channels
+        self._generation = None
+        self._pending = []
+
+    @property
+    def listening(self):
+        return self._generation is not None
+
+    def listen(self):
+        """Start listening if not already. Returns False if no connection could be made."""
+        if self._generation is None:
+            self._generation = self._listener._listen(self)
+        return self._generation is not None
+
+    def drain(self):
+        """
+        Payloads received since the last drain, without blocking. Raises if
+        the shared connection was lost or replaced since listen(); the feed
+        is then reset and the caller should rebuild its state from scratch.
+        """
+        if self._generation is None:
+            return []
+        try:
+            return self._listener._drain(self)
+        except Exception:
+            self.reset()
+            raise
+
+    def reset(self):
+        """Stop receiving payloads until the next listen()."""
+        self._generation = None
+        self._pending = []
+
+
+_listener = None
+
+
+def get_listener():
+    """The worker's shared Listener, connected through algo.db.connect()."""
+    global _listener
+    if _listener is None:
+        _listener = Listener(db.connect)
+    return _listener
@@ -0,0 +1,111 @@
+"""
+Channel access control.
+
+Answers "can user U read/write channel C, and with what role" with a single
+query (channel, community membership and private-channel membership joined
+together) and keeps the answer in a short-lived per-process cache keyed by
+(user_id, channel_id). Flows that change membership or channel state call
+the invalidate_* helpers so revocations take effect immediately in this
+worker; other workers converge within CHANNEL_ACCESS_TTL seconds.
+"""
+
+import os
+import threading
+from collections import namedtuple
+from cachetools import TTLCache
+
+CACHE_TTL = float(os.getenv("CHANNEL_ACCESS_TTL", 30))
+CACHE_SIZE = int(os.getenv("CHANNEL_ACCESS_CACHE_SIZE", 10000))
+
+ChannelAccess = namedtuple(
+    "ChannelAccess",
+    [
+        "channel_id",
+        "community_id",
+        "is_private",
+        "community_role",
+        "channel_role",
+        "is_channel_member",
+        "can_read",
+        "can_write",
+    ],
+)
+
+_cache = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+_lock = threading.Lock()
+_MISSING = object()
+
+
+def resolve(cur, user_id, channel_id):
+    """
+    Return the user's ChannelAccess for a channel, or None if the channel
+    does not exist or is inactive.
+    """
+    key = (user_id, channel_id)
+    with _lock:
+        cached = _cache.get(key, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
+    cur.execute(
+        """
+        SELECT c.community_id, c.is_private,
+               cm.role AS community_role, chm.role AS channel_role,
+               chm.user_id IS NOT NULL AS is_channel_member, chm.can_send_messages
+        FROM channels c
+        LEFT JOIN community_members cm
+               ON cm.community_id = c.community_id AND cm.user_id = %s AND cm.status = 'active'
+        LEFT JOIN channel_members chm
+               ON chm.channel_id = c.channel_id AND chm.user_id = %s
+        WHERE c.channel_id = %s AND c.is_active = true
+        """,
+        (user_id, user_id, channel_id),
+    )
+    row = cur.fetchone()
+    access = None
+    if row:
+        # Works for both tuple and RealDict cursors
+        values = list(row.values()) if isinstance(row, dict) else list(row)
+        community_id, is_private, community_role, channel_role, is_channel_member, can_send = values
+        can_read = community_role is not None and (not is_private or is_channel_member)
+        can_write = can_read and (not is_private or bool(can_send))
+        access = ChannelAccess(
+            channel_id=channel_id,
+            community_id=community_id,
+            is_private=bool(is_private),
+            community_role=community_role,
+            channel_role=channel_role,
+            is_channel_member=bool(is_channel_member),
+            can_read=can_read,
+            can_write=can_write,
+        )
+
+    with _lock:
+        _cache[key] = access
+    return access
+
+
+def _invalidate(predicate):
+    with _lock:
+        for key in [k for k, v in _cache.items() if predicate(k, v)]:
+            _cache.pop(key, None)
+
+
+def invalidate_user(user_id):
+    """Drop cached access for a user (e.g. after joining or leaving)."""
+    _invalidate(lambda key, access: key[0] == user_id)
+
+
+def invalidate_channel(channel_id):
+    """Drop cached access for every user of a channel."""
+    _invalidate(lambda key, access: key[1] == channel_id)
+
+
+def invalidate_community(community_id):
+    """Drop cached access for all channels of a community (and unknown channels)."""
+    _invalidate(lambda key, access: access is None or access.community_id == community_id)
+
+
+def clear():
+    with _lock:
+        _cache.clear()
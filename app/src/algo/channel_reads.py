@@ -0,0 +1,113 @@
+"""
+Channel read state: last-read pointers and unread counts.
+
+channel_read_state keeps one row per (user, channel) with the newest message
+id the user has read. Mark-read calls go through a write-behind buffer that
+keeps the highest id per (user, channel), so scrolling or switching channels
+in several tabs becomes one upsert per flush. A flush that fails (e.g. the
+pool is exhausted) is requeued and retried with backoff by the buffer, so an
+accepted mark-read is not lost. Unread counts for a whole
+community sidebar come from one query. For each channel it does a capped
+index scan over (channel_id, message_id), so a busy channel costs at most
+UNREAD_CAP index entries.
+"""
+
+import os
+
+from algo import db
+from algo.write_behind import WriteBehindBuffer
+
+UNREAD_CAP = 100  # badges show "99+" beyond this
+FLUSH_INTERVAL = float(os.getenv("READ_STATE_FLUSH_INTERVAL", 1.0))
+
+
+def sidebar_channels(cur, user_id, community_id):
+    """
+    Channels of a community visible to the user, in sidebar order, with
+    unread counts: (channel_id, name, description, channel_type, is_private,
+    position_order, created_at, unread_count).
+    """
+    cur.execute(
+        """
+        SELECT c.channel_id, c.name, c.description, c.channel_type, c.is_private,
+               c.position_order, c.created_at, unread.count AS unread_count
+        FROM channels c
+        LEFT JOIN channel_members chm
+               ON chm.channel_id = c.channel_id AND chm.user_id = %(user_id)s
+        LEFT JOIN channel_read_state rs
+               ON rs.channel_id = c.channel_id AND rs.user_id = %(user_id)s
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) AS count
+            FROM (
+                SELECT 1
+                FROM channel_messages m
+                WHERE m.channel_id = c.channel_id
+                  AND m.is_deleted = false
+                  AND m.message_id > COALESCE(rs.last_read_message_id, 0)
+                  AND m.user_id <> %(user_id)s
+                LIMIT %(cap)s
+            ) capped
+        ) unread
+        WHERE c.community_id = %(community_id)s AND c.is_active = true
+          AND (c.is_private = false OR chm.user_id IS NOT NULL)
+        ORDER BY c.position_order, c.created_at
+        """,
+        {"user_id": user_id, "community_id": community_id, "cap": UNREAD_CAP},
+    )
+    return cur.fetchall()
+
+
+def newest_message_id(cur, channel_id):
+    cur.execute(
+        """
+        SELECT COALESCE(MAX(message_id), 0) FROM channel_messages
+        WHERE channel_id = %s AND is_deleted = false
+        """,
+        (channel_id,),
+    )
+    row = cur.fetchone()
+    return list(row.values())[0] if isinstance(row, dict) else row[0]
+
+
+def read_pointer(cur, channel_id, message_id=None):
+    """
+    The id to mark read: ``message_id`` capped at the channel's newest
+    message, or that newest message when ``message_id`` is None.
+    """
+    newest = newest_message_id(cur, channel_id)
+    return newest if message_id is None else min(message_id, newest)
+
+
+def _flush_read_pointers(batch):
+    rows = sorted((user_id, channel_id, message_id) for (user_id, channel_id), message_id in batch.items())
+    user_ids, channel_ids, message_ids = (list(column) for column in zip(*rows))
+    with db.borrow() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                """
+                INSERT INTO channel_read_state (user_id, channel_id, last_read_message_id)
+                SELECT * FROM unnest(%s::int[], %s::int[], %s::int[])
+                ON CONFLICT (user_id, channel_id) DO UPDATE SET
+                    last_read_message_id = EXCLUDED.last_read_message_id,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE EXCLUDED.last_read_message_id > channel_read_state.last_read_message_id
+                """,
+                (user_ids, channel_ids, message_ids),
+            )
+        finally:
+            cur.close()
+
+
+# Read pointers only move forward, so the highest pending id wins
+read_buffer = WriteBehindBuffer(
+    _flush_read_pointers,
+    merge=max,
+    interval=FLUSH_INTERVAL,
+    name="channel-read-buffer",
+)
+
+
+def mark_read(user_id, channel_id, message_id):
+    """Advance the user's read pointer; written by the next buffer flush."""
+    read_buffer.add((user_id, channel_id), message_id)
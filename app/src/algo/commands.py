@@ -0,0 +1,115 @@
+"""
+Flask CLI maintenance commands.
+
+Run with the app configured through FLASK_APP, e.g.:
+    flask --app app/src/run.py backfill-conversations
+"""
+
+import json
+import click
+from flask.cli import with_appcontext
+
+from algo import db as database
+from algo.db import get_db
+from algo import conversations, outbox, reactions, connection_stats
+
+
+@click.command("backfill-conversations")
+@with_appcontext
+def backfill_conversations_command():
+    """Rebuild conversation summaries from the messages table."""
+    db = get_db()
+    cur = db.cursor()
+    try:
+        written = conversations.backfill_summaries(cur)
+        db.commit()
+        click.echo(f"Backfilled {written} conversation summaries.")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+@click.command("reaction-counts")
+@click.option("--fix", is_flag=True, help="Rebuild counters that disagree with message_reactions.")
+@with_appcontext
+def reaction_counts_command(fix):
+    """Check reaction counters against message_reactions (and optionally repair them)."""
+    db = get_db()
+    cur = db.cursor()
+    try:
+        drift = reactions.find_drift(cur)
+        for message_id, emoji, actual, stored in drift:
+            click.echo(f"message {message_id} {emoji}: counted {stored}, actual {actual}")
+        if not drift:
+            click.echo("Reaction counters are consistent.")
+        elif fix:
+            removed, written = reactions.rebuild_counts(cur)
+            db.commit()
+            click.echo(f"Rebuilt reaction counters: {written} written, {removed} removed.")
+        else:
+            click.echo("Run with --fix to rebuild them.")
+            raise SystemExit(1)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+@click.command("connection-counts")
+@click.option("--fix", is_flag=True, help="Rebuild counters that disagree with connections.")
+@with_appcontext
+def connection_counts_command(fix):
+    """Check per-user connection counters against connections (and optionally repair them)."""
+    db = get_db()
+    cur = db.cursor()
+    try:
+        drift = connection_stats.find_drift(cur)
+        for user_id, actual, stored in drift:
+            click.echo(
+                f"user {user_id}: counted {'/'.join(map(str, stored))}, "
+                f"actual {'/'.join(map(str, actual))} (accepted/pending in/pending out)"
+            )
+        if not drift:
+            click.echo("Connection counters are consistent.")
+        elif fix:
+            removed, written = connection_stats.rebuild_counts(cur)
+            db.commit()
+            click.echo(f"Rebuilt connection counters: {written} written, {removed} removed.")
+        else:
+            click.echo("Run with --fix to rebuild them.")
+            raise SystemExit(1)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+@click.command("outbox-relay")
+@click.option("--once", is_flag=True, help="Deliver the current backlog and exit.")
+@click.option("--stdout", is_flag=True, help="Print events instead of posting them to the Go server.")
+@with_appcontext
+def outbox_relay_command(once, stdout):
+    """Stream real-time outbox events to the Go WebSocket server."""
+    sender = None
+    if stdout:
+        def sender(events):
+            for event in events:
+                click.echo(json.dumps(event, default=str))
+            return True
+    relay = outbox.OutboxRelay(database.connect, sender=sender)
+    try:
+        relay.run(once=once)
+    except KeyboardInterrupt:
+        click.echo("Outbox relay stopped.")
+
+
+def init_app(app):
+    """Register CLI commands with the Flask app."""
+    app.cli.add_command(backfill_conversations_command)
+    app.cli.add_command(reaction_counts_command)
+    app.cli.add_command(connection_counts_command)
+    app.cli.add_command(outbox_relay_command)
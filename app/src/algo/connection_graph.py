@@ -0,0 +1,357 @@
+"""
+In-memory index of accepted connections.
+
+Each worker keeps the undirected connection graph in CSR form. Users are
+mapped to dense node ids. ``indptr[n]:indptr[n + 1]`` slices ``indices``
+to give node n's neighbours, sorted. Neighbour lists, mutual connections
+and friend-of-friend suggestions are therefore array slices and set
+operations in NumPy, with no recursive SQL.
+
+Reads take the caller's cursor, and loads and patches run through it, so
+a request never needs a second pooled connection. Changes arrive through
+algo.change_feed. Endpoints that accept or remove a
+connection call notify_changed() inside their transaction. On its next
+read, each worker re-checks only the notified pairs and records the result
+in small per-node added/removed delta sets layered over the CSR arrays. The
+arrays are rebuilt from the database once the deltas grow past
+COMPACT_AFTER edges, and every REFRESH_SECONDS as a safety net.
+
+paths() answers "how am I connected to this person?" with a level-synchronous
+bidirectional BFS. Each level expands the smaller frontier with one vectorized
+CSR gather. The search stops at PATH_MAX_DEPTH hops or after
+PATH_TIME_BUDGET seconds. Users whose profile_visibility hides them are
+never used as intermediate hops, unless they are the viewer's own
+connections.
+"""
+
+import os
+import time
+import logging
+import threading
+
+import numpy as np
+
+from algo.change_feed import get_listener, notify, notify_many
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "connection_changes"
+REFRESH_SECONDS = int(os.getenv("CONNECTION_GRAPH_REFRESH_SECONDS", 900))
+COMPACT_AFTER = int(os.getenv("CONNECTION_GRAPH_COMPACT_AFTER", 5000))
+PATH_MAX_DEPTH = 6
+PATH_TIME_BUDGET = float(os.getenv("CONNECTION_PATH_TIME_BUDGET", 0.05))
+HIDDEN_VISIBILITY = ("private", "false")
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+def notify_changed(cur, user_id, other_id=None):
+    """
+    Queue a graph refresh for the pair (user_id, other_id), or for every
+    edge of ``user_id`` when other_id is None (e.g. account deletion).
+    Delivered when the caller commits.
+    """
+    notify(cur, NOTIFY_CHANNEL, user_id if other_id is None else f"{user_id}:{other_id}")
+
+
+def notify_pairs_changed(cur, pairs):
+    """notify_changed() for many (user_id, other_id) pairs in one statement."""
+    notify_many(cur, NOTIFY_CHANNEL, [f"{user_id}:{other_id}" for user_id, other_id in pairs])
+
+
+def notify_visibility_changed(cur, user_id):
+    """Queue a re-read of ``user_id``'s profile_visibility; delivered when the caller commits."""
+    notify(cur, NOTIFY_CHANNEL, f"v{user_id}")
+
+
+def build_csr(left, right):
+    """
+    CSR arrays for the undirected graph with edges (left[i], right[i]).
+    Returns (user_ids, indptr, indices); duplicate edges are merged.
+    """
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    user_ids, inverse = np.unique(np.concatenate([left, right, right, left]), return_inverse=True)
+    src, dst = inverse[: 2 * len(left)], inverse[2 * len(left):]
+    order = np.lexsort((dst, src))
+    src, dst = src[order], dst[order]
+    keep = np.ones(len(src), dtype=bool)
+    keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    src, dst = src[keep], dst[keep]
+    indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(user_ids)), out=indptr[1:])
+    return user_ids, indptr, dst.astype(np.int32)
+
+
+class ConnectionGraph:
+    """
+    Every read takes the request's cursor ``cur``, which loads and patches the
+    graph when it is stale. It should not carry uncommitted writes.
+
+    Args:
+        listener: change_feed.Listener whose shared connection delivers changes
+        refresh_seconds: Age after which the graph is reloaded from scratch
+    """
+
+    def __init__(self, listener, refresh_seconds=REFRESH_SECONDS):
+        self._feed = listener.feed(NOTIFY_CHANNEL)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loaded_at = None
+        self._counters = {"full_loads": 0, "patched_pairs": 0}
+
+    def neighbors(self, cur, user_id):
+        """User ids of ``user_id``'s accepted connections, ascending."""
+        with self._lock:
+            self._ensure_fresh(cur)
+            node = self._nodes.get(user_id)
+            if node is None:
+                return []
+            return self._user_ids[self._row(node)].tolist()
+
+    def mutual(self, cur, user_id, other_id):
+        """User ids connected to both users, ascending."""
+        with self._lock:
+            self._ensure_fresh(cur)
+            a, b = self._nodes.get(user_id), self._nodes.get(other_id)
+            if a is None or b is None:
+                return []
+            common = np.intersect1d(self._row(a), self._row(b), assume_unique=True)
+            return self._user_ids[common].tolist()
+
+    def suggestions(self, cur, user_id, limit=20):
+        """
+        Friends of friends who are not already connected to ``user_id``,
+        as [(user_id, mutual_count)] ranked by mutual count, then user id.
+        """
+        with self._lock:
+            self._ensure_fresh(cur)
+            node = self._nodes.get(user_id)
+            if node is None:
+                return []
+            friends = self._row(node)
+            if not len(friends):
+                return []
+            reach = self._expand(friends)
+            candidates, counts = np.unique(reach, return_counts=True)
+            keep = (candidates != node) & ~np.isin(candidates, friends, assume_unique=True)
+            candidates, counts = candidates[keep], counts[keep]
+            order = np.lexsort((candidates, -counts))[:limit]
+            return list(zip(self._user_ids[candidates[order]].tolist(), counts[order].tolist()))
+
+    def paths(self, cur, viewer_id, target_id, max_paths=3, max_depth=PATH_MAX_DEPTH, budget=PATH_TIME_BUDGET):
+        """
+        Shortest connection paths from ``viewer_id`` to ``target_id``.
+
+        Returns {"degree", "paths", "truncated"}. degree is the number of hops,
+        or None if no path was found within max_depth hops. paths holds up to
+        ``max_paths`` user-id lists from viewer to target, each through a
+        different meeting point. truncated is True if the time budget ran
+        out first.
+        """
+        deadline = time.monotonic() + budget
+        with self._lock:
+            self._ensure_fresh(cur)
+            source, target = self._nodes.get(viewer_id), self._nodes.get(target_id)
+            if source is None or target is None:
+                return {"degree": 0 if viewer_id == target_id else None, "paths": [], "truncated": False}
+            if source == target:
+                return {"degree": 0, "paths": [[viewer_id]], "truncated": False}
+
+            allowed = ~self._hidden
+            allowed[[source, target]] = True
+            allowed[self._row(source)] = True
+            dist = [np.full(len(self._user_ids), -1, dtype=np.int16) for _ in range(2)]
+            frontiers = [np.array([source]), np.array([target])]
+            dist[0][source] = dist[1][target] = 0
+            depths = [0, 0]
+
+            while depths[0] + depths[1] < max_depth and len(frontiers[0]) and len(frontiers[1]):
+                if time.monotonic() > deadline:
+                    return {"degree": None, "paths": [], "truncated": True}
+                side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+                reached = np.unique(self._expand(frontiers[side]))
+                reached = reached[allowed[reached] & (dist[side][reached] < 0)]
+                depths[side] += 1
+                dist[side][reached] = depths[side]
+                frontiers[side] = reached
+                meeting = reached[dist[1 - side][reached] >= 0]
+                if len(meeting):
+                    total = dist[0][meeting] + dist[1][meeting]
+                    meeting = meeting[total == total.min()][:max_paths]
+                    paths = [
+                        self._walk(m, dist[0], allowed)[::-1][:-1] + self._walk(m, dist[1], allowed)
+                        for m in meeting.tolist()
+                    ]
+                    return {
+                        "degree": int(total.min()),
+                        "paths": [self._user_ids[path].tolist() for path in paths],
+                        "truncated": False,
+                    }
+            return {"degree": None, "paths": [], "truncated": False}
+
+    def stats(self):
+        with self._lock:
+            loaded = self._loaded_at is not None and self._pid == os.getpid()
+            return {
+                **self._counters,
+                "users": len(self._nodes) if loaded else 0,
+                "edges": int(len(self._indices) // 2) if loaded else 0,
+                "delta_edges": self._delta_edges if loaded else 0,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if loaded else None,
+            }
+
+    def _row(self, node):
+        base = self._indices[self._indptr[node]:self._indptr[node + 1]] if node < self._csr_nodes else _EMPTY
+        added, removed = self._added.get(node), self._removed.get(node)
+        if not added and not removed:
+            return base
+        row = (set(base.tolist()) - (removed or set())) | (added or set())
+        return np.array(sorted(row), dtype=np.int32)
+
+    def _expand(self, frontier):
+        """Concatenated neighbour lists of ``frontier`` nodes, duplicates kept."""
+        frontier = np.asarray(frontier)
+        plain = (frontier < self._csr_nodes) & ~np.isin(frontier, self._delta_nodes())
+        base = frontier[plain]
+        starts, ends = self._indptr[base], self._indptr[base + 1]
+        lengths = ends - starts
+        # Gather every slice indices[start:end] at once
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        parts = [self._indices[offsets]] + [self._row(node) for node in frontier[~plain].tolist()]
+        return np.concatenate(parts)
+
+    def _walk(self, node, dist, allowed):
+        """Nodes from ``node`` back to the BFS root of ``dist``, following decreasing distance."""
+        path = [node]
+        while dist[node] > 0:
+            row = self._row(node)
+            steps = row[(dist[row] == dist[node] - 1) & allowed[row]]
+            node = int(steps.min())
+            path.append(node)
+        return path
+
+    def _delta_nodes(self):
+        return np.fromiter(set(self._added) | set(self._removed), dtype=np.int64)
+
+    def _node(self, user_id):
+        node = self._nodes.get(user_id)
+        if node is None:
+            node = self._nodes[user_id] = len(self._user_ids)
+            self._user_ids = np.append(self._user_ids, user_id)
+            self._hidden = np.append(self._hidden, user_id in self._private)
+        return node
+
+    def _set_edge(self, a, b, connected):
+        for x, y in ((a, b), (b, a)):
+            add, drop = (self._added, self._removed) if connected else (self._removed, self._added)
+            pending = drop.get(x)
+            if pending and y in pending:
+                pending.discard(y)
+                self._delta_edges -= 1
+            else:
+                add.setdefault(x, set()).add(y)
+                self._delta_edges += 1
+
+    def _ensure_fresh(self, cur):
+        # Connections and arrays do not survive fork(), so each worker loads its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._feed.reset()
+            self._loaded_at = None
+        if (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_seconds
+            or self._delta_edges > COMPACT_AFTER
+        ):
+            self._load_all(cur)
+            return
+        try:
+            payloads = self._feed.drain()
+        except Exception as e:
+            logger.warning(f"⚠️ Connection graph listener lost, reloading: {e}")
+            self._load_all(cur)
+            return
+        if payloads:
+            self._patch(cur, payloads)
+
+    def _load_all(self, cur):
+        # LISTEN first so changes committed while loading are patched in afterwards
+        self._feed.listen()
+        cur.execute("SELECT user_id, con_user_id FROM connections WHERE status = 'accepted'")
+        rows = cur.fetchall()
+        cur.execute("SELECT user_id FROM users WHERE profile_visibility = ANY(%s)", (list(HIDDEN_VISIBILITY),))
+        self._private = {row[0] for row in cur.fetchall()}
+        user_ids, self._indptr, self._indices = build_csr([r[0] for r in rows], [r[1] for r in rows])
+        self._user_ids = user_ids
+        self._csr_nodes = len(user_ids)
+        self._nodes = {user_id: node for node, user_id in enumerate(user_ids.tolist())}
+        self._hidden = np.isin(user_ids, np.fromiter(self._private, dtype=np.int64))
+        self._added, self._removed, self._delta_edges = {}, {}, 0
+        self._loaded_at = time.monotonic()
+        self._counters["full_loads"] += 1
+
+    def _patch(self, cur, payloads):
+        pairs, dropped, visibility = set(), set(), set()
+        for payload in payloads:
+            if payload.startswith("v") and payload[1:].isdigit():
+                visibility.add(int(payload[1:]))
+                continue
+            ids = payload.split(":")
+            if not all(part.isdigit() for part in ids):
+                continue
+            if len(ids) == 2:
+                pairs.add(tuple(sorted(int(part) for part in ids)))
+            else:
+                dropped.add(int(ids[0]))
+
+        for user_id in dropped:
+            node = self._nodes.get(user_id)
+            if node is not None:
+                for other in self._row(node).tolist():
+                    self._set_edge(node, other, False)
+        if visibility:
+            self._patch_visibility(cur, visibility)
+        if pairs:
+            left, right = (list(column) for column in zip(*sorted(pairs)))
+            cur.execute(
+                """
+                SELECT p.a, p.b, EXISTS (
+                    SELECT 1 FROM connections c
+                    WHERE LEAST(c.user_id, c.con_user_id) = LEAST(p.a, p.b)
+                      AND GREATEST(c.user_id, c.con_user_id) = GREATEST(p.a, p.b)
+                      AND c.status = 'accepted'
+                )
+                FROM unnest(%s::int[], %s::int[]) AS p(a, b)
+                """,
+                (left, right),
+            )
+            rows = cur.fetchall()
+            for a, b, connected in rows:
+                node_a, node_b = self._node(a), self._node(b)
+                if (node_b in set(self._row(node_a).tolist())) != connected:
+                    self._set_edge(node_a, node_b, connected)
+        self._counters["patched_pairs"] += len(pairs) + len(dropped) + len(visibility)
+
+    def _patch_visibility(self, cur, user_ids):
+        cur.execute(
+            "SELECT user_id FROM users WHERE user_id = ANY(%s) AND profile_visibility = ANY(%s)",
+            (sorted(user_ids), list(HIDDEN_VISIBILITY)),
+        )
+        private = {row[0] for row in cur.fetchall()}
+        self._private = (self._private - user_ids) | private
+        for user_id in user_ids:
+            node = self._nodes.get(user_id)
+            if node is not None:
+                self._hidden[node] = user_id in private
+
+
+_graph = None
+
+
+def get_graph():
+    global _graph
+    if _graph is None:
+        _graph = ConnectionGraph(get_listener())
+    return _graph
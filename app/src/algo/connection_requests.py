@@ -0,0 +1,304 @@
+"""
+Requests page lists: incoming and sent pending requests, and accepted connections.
+
+Each list is keyset-paginated on connection_id, newest first, and served
+by an index range scan: (con_user_id, status, connection_id) for received,
+(user_id, status, connection_id) for sent. Accepted connections merge both
+scans. load() returns any combination of lists together with the viewer's
+row and counters (algo.connection_stats) in one statement. The requests
+page therefore renders the first slice of every list in a single round
+trip, and /api/connection_requests pages through one list.
+
+respond_many(), cancel_many() and send_many() act on many requests with one
+set-based statement each (plus one probe to explain failed sends). Each
+returns a result per requested id. The caller commits once and emits the
+graph notifications for the whole batch together.
+
+The connections trigger updates two user_connection_stats rows per changed
+request, in whatever order the statement visits them. Two overlapping batches
+could therefore lock the same counters in opposite orders and deadlock. Each
+bulk call first creates any missing counters row it can touch, then locks
+them all in user_id order, and feeds its ids to the statement sorted. Rows
+the trigger would otherwise insert mid-statement are never left unlocked.
+"""
+
+from algo.pagination import encode_cursor, decode_cursor
+
+REQUESTS_PAGE_SIZE = 20
+LIST_TYPES = ("received", "sent", "accepted")
+BULK_LIMIT = 500
+
+_COLUMNS = "c.connection_id, u.user_id, c.request, u.firstname, u.lastname, u.username, u.pfp_path"
+
+# List type -> rows (newest first) of _COLUMNS; {after} is an optional cursor predicate
+_LIST_SQL = {
+    "received": f"""
+        SELECT {_COLUMNS}
+        FROM connections c
+        JOIN users u ON u.user_id = c.user_id
+        WHERE c.con_user_id = %(user_id)s AND c.status = 'pending' {{after}}
+        ORDER BY c.connection_id DESC
+        LIMIT %(limit)s
+    """,
+    "sent": f"""
+        SELECT {_COLUMNS}
+        FROM connections c
+        JOIN users u ON u.user_id = c.con_user_id
+        WHERE c.user_id = %(user_id)s AND c.status = 'pending' {{after}}
+        ORDER BY c.connection_id DESC
+        LIMIT %(limit)s
+    """,
+    "accepted": f"""
+        SELECT {_COLUMNS}
+        FROM (
+            (SELECT c.connection_id, c.con_user_id AS other_id, c.request
+             FROM connections c
+             WHERE c.user_id = %(user_id)s AND c.status = 'accepted' {{after}}
+             ORDER BY c.connection_id DESC
+             LIMIT %(limit)s)
+            UNION ALL
+            (SELECT c.connection_id, c.user_id, c.request
+             FROM connections c
+             WHERE c.con_user_id = %(user_id)s AND c.status = 'accepted' {{after}}
+             ORDER BY c.connection_id DESC
+             LIMIT %(limit)s)
+        ) c
+        JOIN users u ON u.user_id = c.other_id
+        ORDER BY c.connection_id DESC
+        LIMIT %(limit)s
+    """,
+}
+
+# Counters rows of the given users and of both sides of the given connections
+# Users whose counters a bulk statement can touch
+_STATS_USERS_SQL = """
+    SELECT unnest(%(user_ids)s::int[])
+    UNION
+    SELECT c.user_id FROM connections c WHERE c.connection_id = ANY(%(connection_ids)s::int[])
+    UNION
+    SELECT c.con_user_id FROM connections c WHERE c.connection_id = ANY(%(connection_ids)s::int[])
+"""
+
+_CREATE_STATS_SQL = f"""
+    INSERT INTO user_connection_stats (user_id)
+    SELECT u.user_id FROM users u
+    WHERE u.user_id IN ({_STATS_USERS_SQL})
+    ORDER BY u.user_id
+    ON CONFLICT (user_id) DO NOTHING
+"""
+
+_LOCK_STATS_SQL = f"""
+    SELECT s.user_id
+    FROM user_connection_stats s
+    WHERE s.user_id IN ({_STATS_USERS_SQL})
+    ORDER BY s.user_id
+    FOR UPDATE OF s
+"""
+
+_LOAD_SQL = """
+    SELECT me.username, me.firstname, me.lastname, me.role, me.pfp_path,
+           COALESCE(s.accepted, 0), COALESCE(s.pending_in, 0), COALESCE(s.pending_out, 0)
+           {lists}
+    FROM users me
+    LEFT JOIN user_connection_stats s ON s.user_id = me.user_id
+    WHERE me.user_id = %(user_id)s
+"""
+
+
+def _item(list_type, row):
+    """Card data for one json row, in the shape requests.ts expects."""
+    name = f"{row['firstname']} {row['lastname']}"
+    if list_type == "accepted":
+        return {
+            "connection_id": row["connection_id"],
+            "user_id": row["user_id"],
+            "name": name,
+            "username": row["username"],
+            "avatar": row["pfp_path"],
+            "connected_at": "Recently",
+        }
+    return {
+        "connection_id": row["connection_id"],
+        "user_id": row["user_id"],
+        "message": row["request"],
+        "created_at": "Recently",
+        "name": name,
+        "username": row["username"],
+        "avatar": row["pfp_path"],
+    }
+
+
+def load(cur, user_id, list_types=LIST_TYPES, cursor=None, limit=REQUESTS_PAGE_SIZE):
+    """
+    The viewer's row, counters and one page of each of ``list_types``.
+
+    ``cursor`` continues a single list and is only accepted with one list
+    type. Returns {"current_user", "counts", "lists": {type: {"items",
+    "has_more", "next_cursor"}}}, or None if the user does not exist.
+    Raises ValueError for an unknown list type or a malformed cursor.
+    """
+    if any(list_type not in LIST_TYPES for list_type in list_types):
+        raise ValueError("unknown list type")
+    params = {"user_id": user_id, "limit": limit + 1}
+    after = ""
+    if cursor:
+        if len(list_types) != 1:
+            raise ValueError("a cursor continues a single list")
+        (connection_id,) = decode_cursor(cursor, size=1)
+        try:
+            params["after"] = int(connection_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError("invalid cursor") from e
+        after = "AND c.connection_id < %(after)s"
+    lists = "".join(
+        f",\n(SELECT COALESCE(json_agg(r ORDER BY r.connection_id DESC), '[]') "
+        f"FROM ({_LIST_SQL[list_type].format(after=after)}) r) AS {list_type}"
+        for list_type in list_types
+    )
+    cur.execute(_LOAD_SQL.format(lists=lists), params)
+    row = cur.fetchone()
+    if not row:
+        return None
+    pages = {}
+    for list_type, rows in zip(list_types, row[8:]):
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        pages[list_type] = {
+            "items": [_item(list_type, r) for r in rows],
+            "has_more": has_more,
+            "next_cursor": encode_cursor(rows[-1]["connection_id"]) if has_more else None,
+        }
+    return {
+        "current_user": tuple(row[:5]),
+        "counts": {"accepted": row[5], "received": row[6], "sent": row[7]},
+        "lists": pages,
+    }
+
+
+def _unique(ids):
+    """``ids`` without repeats, in first-seen order."""
+    return list(dict.fromkeys(ids))
+
+
+def _lock_stats(cur, user_ids=(), connection_ids=()):
+    """Create, then lock, the counters rows a bulk statement will touch, in user_id order."""
+    params = {"user_ids": sorted(user_ids), "connection_ids": sorted(connection_ids)}
+    cur.execute(_CREATE_STATS_SQL, params)
+    cur.execute(_LOCK_STATS_SQL, params)
+
+
+def respond_many(cur, user_id, connection_ids, action):
+    """
+    Accept or reject pending requests sent to ``user_id``.
+
+    Returns (results, accepted_pairs): one {"connection_id", "success",
+    "status" or "message"} per id, and the (sender, user_id) pairs that became
+    connections.
+    """
+    new_status = "accepted" if action == "accept" else "denied"
+    connection_ids = _unique(connection_ids)
+    _lock_stats(cur, [user_id], connection_ids)
+    cur.execute(
+        """
+        UPDATE connections c SET status = %s
+        FROM unnest(%s::int[]) AS r(connection_id)
+        WHERE c.connection_id = r.connection_id AND c.con_user_id = %s AND c.status = 'pending'
+        RETURNING c.connection_id, c.user_id
+        """,
+        (new_status, sorted(connection_ids), user_id),
+    )
+    senders = dict(cur.fetchall())
+    results = [
+        {"connection_id": cid, "success": True, "status": new_status}
+        if cid in senders
+        else {"connection_id": cid, "success": False, "message": "Connection request not found"}
+        for cid in connection_ids
+    ]
+    pairs = [(senders[cid], user_id) for cid in connection_ids if cid in senders] if new_status == "accepted" else []
+    return results, pairs
+
+
+def cancel_many(cur, user_id, connection_ids):
+    """
+    Withdraw pending requests sent by ``user_id``.
+
+    Returns (results, recipients): one result per id, and the user ids whose
+    pending requests were withdrawn.
+    """
+    connection_ids = _unique(connection_ids)
+    _lock_stats(cur, [user_id], connection_ids)
+    cur.execute(
+        """
+        DELETE FROM connections
+        WHERE connection_id = ANY(%s) AND user_id = %s AND status = 'pending'
+        RETURNING connection_id, con_user_id
+        """,
+        (sorted(connection_ids), user_id),
+    )
+    recipients = dict(cur.fetchall())
+    results = [
+        {"connection_id": cid, "success": True}
+        if cid in recipients
+        else {"connection_id": cid, "success": False, "message": "Connection request not found"}
+        for cid in connection_ids
+    ]
+    return results, list(recipients.values())
+
+
+def send_many(cur, user_id, target_ids, message=""):
+    """
+    Send ``user_id``'s request to each of ``target_ids``.
+
+    Follows send_connection_request: a denied request is re-opened, while an
+    existing pending or accepted pair is reported as a failure. Returns one
+    {"user_id", "success", "connection_id" or "message"} per target.
+    """
+    target_ids = _unique(target_ids)
+    _lock_stats(cur, [user_id, *target_ids])
+    cur.execute(
+        """
+        INSERT INTO connections (user_id, con_user_id, request, status)
+        SELECT %(user_id)s, u.user_id, %(message)s, 'pending'
+        FROM unnest(%(targets)s::int[]) AS t(user_id)
+        JOIN users u ON u.user_id = t.user_id
+        WHERE u.user_id <> %(user_id)s
+        ON CONFLICT ((LEAST(user_id, con_user_id)), (GREATEST(user_id, con_user_id)))
+        DO UPDATE SET user_id = EXCLUDED.user_id, con_user_id = EXCLUDED.con_user_id,
+                      request = EXCLUDED.request, status = 'pending'
+        WHERE connections.status = 'denied'
+        RETURNING con_user_id, connection_id
+        """,
+        {"user_id": user_id, "message": message, "targets": sorted(target_ids)},
+    )
+    sent = dict(cur.fetchall())
+    failed = [target for target in target_ids if target not in sent]
+    existing = {}
+    if failed:
+        cur.execute(
+            """
+            SELECT t.user_id, c.user_id, c.status
+            FROM unnest(%(targets)s::int[]) AS t(user_id)
+            JOIN connections c
+              ON LEAST(c.user_id, c.con_user_id) = LEAST(%(user_id)s, t.user_id)
+             AND GREATEST(c.user_id, c.con_user_id) = GREATEST(%(user_id)s, t.user_id)
+            """,
+            {"user_id": user_id, "targets": failed},
+        )
+        existing = {row[0]: row[1:] for row in cur.fetchall()}
+    results = []
+    for target in target_ids:
+        if target in sent:
+            results.append({"user_id": target, "success": True, "connection_id": sent[target]})
+            continue
+        if target == user_id:
+            reason = "Cannot connect to yourself"
+        elif target not in existing:
+            reason = "User not found"
+        elif existing[target][1] == "accepted":
+            reason = "Already connected"
+        elif existing[target][0] == user_id:
+            reason = "Connection request already sent"
+        else:
+            reason = "This user has already sent you a request"
+        results.append({"user_id": target, "success": False, "message": reason})
+    return results
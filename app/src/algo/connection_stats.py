@@ -0,0 +1,99 @@
+"""
+Per-user connection counters: accepted connections and pending requests.
+
+user_connection_stats holds one row per user who has ever had a pending or
+accepted connection. A trigger on connections (see app/db/schema.sql) keeps
+it in step inside the same transaction as every send, respond and cancel,
+so profile and requests pages read their counts with a primary-key lookup
+instead of counting connections with an OR over both columns.
+find_drift() and rebuild_counts() back the `flask connection-counts`
+command, which checks the counters against connections and repairs them.
+"""
+
+COUNTERS = ("accepted", "pending_in", "pending_out")
+
+# Actual counters per user, computed from connections
+_ACTUAL_SQL = """
+    SELECT user_id,
+           COUNT(*) FILTER (WHERE status = 'accepted') AS accepted,
+           COUNT(*) FILTER (WHERE status = 'pending' AND incoming) AS pending_in,
+           COUNT(*) FILTER (WHERE status = 'pending' AND NOT incoming) AS pending_out
+    FROM (
+        SELECT user_id, status, false AS incoming FROM connections
+        UNION ALL
+        SELECT con_user_id, status, true FROM connections
+    ) sides
+    WHERE status IN ('pending', 'accepted')
+    GROUP BY user_id
+"""
+
+
+def _value(row, key, index):
+    return row[key] if isinstance(row, dict) else row[index]
+
+
+def counts_for(cur, user_id):
+    """{"accepted", "pending_in", "pending_out"} for one user; zeros if they have no row."""
+    cur.execute(
+        "SELECT accepted, pending_in, pending_out FROM user_connection_stats WHERE user_id = %s",
+        (user_id,),
+    )
+    row = cur.fetchone()
+    return {name: _value(row, name, i) if row else 0 for i, name in enumerate(COUNTERS)}
+
+
+def find_drift(cur, limit=100):
+    """
+    Users whose counters disagree with connections:
+    (user_id, actual (accepted, pending_in, pending_out), stored (...)).
+    """
+    cur.execute(
+        f"""
+        SELECT COALESCE(a.user_id, s.user_id) AS user_id,
+               COALESCE(a.accepted, 0), COALESCE(a.pending_in, 0), COALESCE(a.pending_out, 0),
+               COALESCE(s.accepted, 0), COALESCE(s.pending_in, 0), COALESCE(s.pending_out, 0)
+        FROM ({_ACTUAL_SQL}) a
+        FULL OUTER JOIN user_connection_stats s ON s.user_id = a.user_id
+        WHERE (COALESCE(a.accepted, 0), COALESCE(a.pending_in, 0), COALESCE(a.pending_out, 0))
+           <> (COALESCE(s.accepted, 0), COALESCE(s.pending_in, 0), COALESCE(s.pending_out, 0))
+        ORDER BY 1
+        LIMIT %s
+        """,
+        (limit,),
+    )
+    drift = []
+    for row in cur.fetchall():
+        row = tuple(row.values()) if isinstance(row, dict) else tuple(row)
+        drift.append((row[0], row[1:4], row[4:7]))
+    return drift
+
+
+def rebuild_counts(cur):
+    """
+    Recompute counters from connections, touching only rows that drifted.
+
+    Takes a SHARE lock on connections for the rest of the caller's
+    transaction so connections cannot change underneath the rebuild.
+    Returns (rows_removed, rows_written).
+    """
+    cur.execute("LOCK TABLE connections IN SHARE MODE")
+    cur.execute(
+        f"""
+        DELETE FROM user_connection_stats s
+        WHERE NOT EXISTS (SELECT 1 FROM ({_ACTUAL_SQL}) a WHERE a.user_id = s.user_id)
+        """
+    )
+    removed = cur.rowcount
+    cur.execute(
+        f"""
+        INSERT INTO user_connection_stats (user_id, accepted, pending_in, pending_out)
+        {_ACTUAL_SQL}
+        ON CONFLICT (user_id) DO UPDATE SET
+            accepted = EXCLUDED.accepted,
+            pending_in = EXCLUDED.pending_in,
+            pending_out = EXCLUDED.pending_out
+        WHERE (user_connection_stats.accepted, user_connection_stats.pending_in, user_connection_stats.pending_out)
+           <> (EXCLUDED.accepted, EXCLUDED.pending_in, EXCLUDED.pending_out)
+        """
+    )
+    return removed, cur.rowcount
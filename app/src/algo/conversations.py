@@ -0,0 +1,283 @@
+"""
+Direct-message conversations: summaries and paginated history.
+
+conversation_summaries keeps one row per (user, partner) with the latest
+message snippet, its timestamp and the user's unread count. Rows are
+maintained by a trigger on messages (see app/db/schema.sql), so messages
+written by either the Flask app or the Go WebSocket server keep it current,
+and the conversation list renders from a single indexed query.
+
+Read receipts live on the same rows: last_read_message_id is the newest
+message the user has seen in that conversation. Mark-read calls from open
+tabs are coalesced in a write-behind buffer (highest id wins); a failed
+flush is requeued and retried with backoff, so accepted receipts are not
+lost when the pool is exhausted. Each flush recounts unread messages past
+the pointer with the (receiver_id, sender_id, message_id) index, which only
+visits messages that are still unread.
+"""
+
+import os
+
+from algo import db, utils
+from algo.pagination import encode_cursor, decode_time_cursor
+from algo.write_behind import WriteBehindBuffer
+
+CONNECTED_PLACEHOLDER = "You're now connected! Start a conversation."
+READ_FLUSH_INTERVAL = float(os.getenv("READ_STATE_FLUSH_INTERVAL", 1.0))
+
+
+def fetch_conversations(cur, user_id, include_connections=True):
+    """
+    Return the user's conversations, most recent first.
+
+    Each row is (partner_id, username, pfp_path, last_message,
+    last_message_time, unread_count). With ``include_connections``, accepted
+    connections that have no messages yet are appended with a placeholder.
+    """
+    if include_connections:
+        cur.execute(
+            """
+            SELECT u.user_id, u.username, u.pfp_path, u.firstname, u.lastname,
+                   cs.last_message, cs.last_message_at, cs.unread_count, false AS connection_only
+            FROM conversation_summaries cs
+            JOIN users u ON u.user_id = cs.partner_id
+            WHERE cs.user_id = %s
+
+            UNION
+
+            SELECT u.user_id, u.username, u.pfp_path, u.firstname, u.lastname,
+                   NULL, NULL, 0, true
+            FROM connections c
+            JOIN users u ON u.user_id = CASE WHEN c.user_id = %s THEN c.con_user_id ELSE c.user_id END
+            WHERE (c.user_id = %s OR c.con_user_id = %s) AND c.status = 'accepted'
+              AND NOT EXISTS (
+                  SELECT 1 FROM conversation_summaries cs
+                  WHERE cs.user_id = %s AND cs.partner_id = u.user_id
+              )
+
+            ORDER BY 7 DESC NULLS LAST
+            """,
+            (user_id, user_id, user_id, user_id, user_id),
+        )
+    else:
+        cur.execute(
+            """
+            SELECT u.user_id, u.username, u.pfp_path, u.firstname, u.lastname,
+                   cs.last_message, cs.last_message_at, cs.unread_count, false AS connection_only
+            FROM conversation_summaries cs
+            JOIN users u ON u.user_id = cs.partner_id
+            WHERE cs.user_id = %s
+            ORDER BY cs.last_message_at DESC NULLS LAST
+            """,
+            (user_id,),
+        )
+
+    conversations = []
+    for (partner_id, username, pfp_path, firstname, lastname,
+         last_message, last_message_time, unread_count, connection_only) in cur.fetchall():
+        if not pfp_path:
+            full_name = f"{firstname or ''} {lastname or ''}".strip()
+            pfp_path = utils.generate_default_avatar(full_name or username)
+        if connection_only:
+            last_message = CONNECTED_PLACEHOLDER
+        conversations.append(
+            (partner_id, username, pfp_path, last_message, last_message_time, unread_count)
+        )
+    return conversations
+
+
+def backfill_summaries(cur):
+    """
+    Rebuild conversation_summaries from the messages table.
+
+    Existing rows are overwritten with the latest message per pair; unread
+    counts are left untouched because messages carry no read state.
+    Returns the number of summary rows written.
+    """
+    cur.execute(
+        """
+        INSERT INTO conversation_summaries
+            (user_id, partner_id, last_message_id, last_message, last_sender_id, last_message_at)
+        SELECT DISTINCT ON (owner_id, partner_id)
+               owner_id, partner_id, message_id, LEFT(content, 200), sender_id, created_at
+        FROM (
+            SELECT m.sender_id AS owner_id, m.receiver_id AS partner_id, m.*
+            FROM messages m
+            UNION ALL
+            SELECT m.receiver_id, m.sender_id, m.*
+            FROM messages m
+            WHERE m.sender_id <> m.receiver_id
+        ) AS pairs
+        ORDER BY owner_id, partner_id, created_at DESC, message_id DESC
+        ON CONFLICT (user_id, partner_id) DO UPDATE SET
+            last_message_id = EXCLUDED.last_message_id,
+            last_message = EXCLUDED.last_message,
+            last_sender_id = EXCLUDED.last_sender_id,
+            last_message_at = EXCLUDED.last_message_at
+        """
+    )
+    return cur.rowcount
+
+
+def fetch_history(cur, user_id, other_user_id, before=None, after=None, limit=50):
+    """
+    Return one page of the DM history between two users.
+
+    Pages are keyset-paginated on (created_at, message_id) using the
+    pair index on messages, so every page costs O(limit) regardless of how
+    long the conversation is. ``before``/``after`` are cursors from a
+    previous page; with neither, the newest page is returned.
+
+    Returns a dict with ``messages`` (oldest first, as
+    (message_id, sender_id, receiver_id, content, created_at, username)
+    tuples), ``has_older``/``has_newer`` and the cursors to fetch them:
+    ``next_cursor`` (pass as ``before``) and ``prev_cursor`` (pass as ``after``).
+    """
+    low, high = min(user_id, other_user_id), max(user_id, other_user_id)
+    params = [low, high]
+    keyset = ""
+    if after:
+        created_at, message_id = decode_time_cursor(after)
+        keyset = "AND (m.created_at, m.message_id) > (%s::timestamp, %s)"
+        order = "ASC"
+        params += [created_at, message_id]
+    else:
+        if before:
+            created_at, message_id = decode_time_cursor(before)
+            keyset = "AND (m.created_at, m.message_id) < (%s::timestamp, %s)"
+            params += [created_at, message_id]
+        order = "DESC"
+    params.append(limit + 1)
+
+    cur.execute(
+        f"""
+        SELECT m.message_id, m.sender_id, m.receiver_id, m.content, m.created_at, u.username
+        FROM messages m
+        JOIN users u ON m.sender_id = u.user_id
+        WHERE LEAST(m.sender_id, m.receiver_id) = %s
+          AND GREATEST(m.sender_id, m.receiver_id) = %s
+          {keyset}
+        ORDER BY m.created_at {order}, m.message_id {order}
+        LIMIT %s
+        """,
+        params,
+    )
+    rows = cur.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if order == "DESC":
+        rows.reverse()
+        has_older, has_newer = has_more, bool(before)
+    else:
+        # A forward page can't tell from its own rows whether older history
+        # exists: look below its oldest row, or at the cursor if it is empty
+        if rows:
+            comparator, created_at, message_id = "<", rows[0][4], rows[0][0]
+        else:
+            comparator = "<="
+        cur.execute(
+            f"""
+            SELECT EXISTS (
+                SELECT 1 FROM messages m
+                WHERE LEAST(m.sender_id, m.receiver_id) = %s
+                  AND GREATEST(m.sender_id, m.receiver_id) = %s
+                  AND (m.created_at, m.message_id) {comparator} (%s::timestamp, %s)
+            )
+            """,
+            (low, high, created_at, message_id),
+        )
+        has_older, has_newer = cur.fetchone()[0], has_more
+
+    oldest, newest = (rows[0], rows[-1]) if rows else (None, None)
+    return {
+        "messages": rows,
+        "has_older": has_older,
+        "has_newer": has_newer,
+        "next_cursor": encode_cursor(oldest[4], oldest[0]) if oldest and has_older else None,
+        "prev_cursor": encode_cursor(newest[4], newest[0]) if newest else after,
+    }
+
+
+def read_pointers(cur, user_id, partner_id):
+    """(user's last read message id, partner's last read message id) for a conversation."""
+    cur.execute(
+        """
+        SELECT
+            (SELECT last_read_message_id FROM conversation_summaries
+             WHERE user_id = %s AND partner_id = %s),
+            (SELECT last_read_message_id FROM conversation_summaries
+             WHERE user_id = %s AND partner_id = %s)
+        """,
+        (user_id, partner_id, partner_id, user_id),
+    )
+    return tuple(cur.fetchone())
+
+
+def total_unread(cur, user_id):
+    """Unread DMs across all of the user's conversations."""
+    cur.execute(
+        "SELECT COALESCE(SUM(unread_count), 0) FROM conversation_summaries WHERE user_id = %s",
+        (user_id,),
+    )
+    return int(cur.fetchone()[0])
+
+
+def newest_message_id(cur, user_id, partner_id):
+    """Newest message the partner sent to the user, or 0."""
+    cur.execute(
+        """
+        SELECT COALESCE(MAX(message_id), 0) FROM messages
+        WHERE receiver_id = %s AND sender_id = %s
+        """,
+        (user_id, partner_id),
+    )
+    return cur.fetchone()[0]
+
+
+def read_pointer(cur, user_id, partner_id, message_id=None):
+    """
+    The id to mark read: ``message_id`` capped at the newest message the
+    partner sent, or that newest message when ``message_id`` is None.
+    """
+    newest = newest_message_id(cur, user_id, partner_id)
+    return newest if message_id is None else min(message_id, newest)
+
+
+def _flush_read_pointers(batch):
+    rows = sorted((user_id, partner_id, message_id) for (user_id, partner_id), message_id in batch.items())
+    user_ids, partner_ids, message_ids = (list(column) for column in zip(*rows))
+    with db.borrow() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                """
+                UPDATE conversation_summaries cs
+                SET last_read_message_id = v.message_id,
+                    unread_count = (
+                        SELECT COUNT(*) FROM messages m
+                        WHERE m.receiver_id = v.user_id
+                          AND m.sender_id = v.partner_id
+                          AND m.message_id > v.message_id
+                    )
+                FROM unnest(%s::int[], %s::int[], %s::int[]) AS v(user_id, partner_id, message_id)
+                WHERE cs.user_id = v.user_id AND cs.partner_id = v.partner_id
+                  AND v.message_id > COALESCE(cs.last_read_message_id, 0)
+                """,
+                (user_ids, partner_ids, message_ids),
+            )
+        finally:
+            cur.close()
+
+
+# Read pointers only move forward, so the highest pending id wins
+read_buffer = WriteBehindBuffer(
+    _flush_read_pointers,
+    merge=max,
+    interval=READ_FLUSH_INTERVAL,
+    name="dm-read-buffer",
+)
+
+
+def mark_read(user_id, partner_id, message_id):
+    """Advance the user's read pointer for a conversation; written by the next flush."""
+    read_buffer.add((user_id, partner_id), message_id)
@@ -2,38 +2,109 @@
 Centralized Database Connection Management
 """
 import os
-import psycopg2.pool
-from flask import g
+import functools
+import contextlib
+import psycopg2
+from flask import g, current_app, jsonify
 from dotenv import load_dotenv
 
+from algo.pool import ConnectionPool, PoolTimeout
+from algo import sql_metrics
+
 load_dotenv()
 
 pool = None
 
-def init_db_pool():
+# Pool settings, overridable through app.config or environment variables
+POOL_DEFAULTS = {
+    "DB_POOL_MIN": 1,
+    "DB_POOL_MAX": 20,
+    "DB_POOL_TIMEOUT": 10.0,  # seconds a request waits for a free connection
+    "DB_POOL_MAX_AGE": 1800.0,  # seconds before a connection is recycled
+    "DB_POOL_PING_AFTER": 30.0,  # idle seconds before checkout runs SELECT 1
+}
+
+
+# Connections each worker opens outside the pool with connect(): the
+# change-feed listener shared by the in-memory indexes (algo.change_feed)
+# and the event hub's listener (algo.event_hub). The pool is sized so that,
+# with them, a worker stays within DB_POOL_MAX.
+DEDICATED_CONNECTIONS = 2
+
+
+def _pool_setting(name, config=None):
+    """Read a pool setting from app config, then env, then the default."""
+    default = POOL_DEFAULTS[name]
+    value = None
+    if config is not None:
+        value = config.get(name)
+    if value is None:
+        value = os.getenv(name)
+    if value is None:
+        return default
+    return type(default)(value)
+
+
+def _connect_kwargs():
+    kwargs = {}
+    if sql_metrics.ENABLED:
+        kwargs["connection_factory"] = sql_metrics.InstrumentedConnection
+    db_url = os.getenv("DATABASE_URL")
+    if db_url:
+        kwargs["dsn"] = db_url
+        return kwargs
+    kwargs.update({
+        "host": os.getenv("DB_HOST"),
+        "dbname": os.getenv("DB_NAME"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+        "port": os.getenv("DB_PORT", 5432),
+        "sslmode": "require",
+    })
+    return kwargs
+
+
+def init_db_pool(config=None):
     """
     Initializes the database connection pool.
-    This should be called once when the application starts.
+    This should be called once when the application starts. Connections
+    checked out of a replaced pool go back to it, which closes them.
     """
     global pool
-    db_url = os.getenv("DATABASE_URL")
-    if db_url:
-        pool = psycopg2.pool.SimpleConnectionPool(
-            1,  # minconn
-            20, # maxconn
-            dsn=db_url
-        )
-    else:
-        pool = psycopg2.pool.SimpleConnectionPool(
-            1,  # minconn
-            20, # maxconn
-            host=os.getenv("DB_HOST"),
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            port=os.getenv("DB_PORT", 5432),
-            sslmode="require"
-        )
+    if pool is not None:
+        pool.closeall()
+    maxconn = max(1, _pool_setting("DB_POOL_MAX", config) - DEDICATED_CONNECTIONS)
+    pool = ConnectionPool(
+        functools.partial(psycopg2.connect, **_connect_kwargs()),
+        minconn=min(_pool_setting("DB_POOL_MIN", config), maxconn),
+        maxconn=maxconn,
+        timeout=_pool_setting("DB_POOL_TIMEOUT", config),
+        max_age=_pool_setting("DB_POOL_MAX_AGE", config),
+        ping_after=_pool_setting("DB_POOL_PING_AFTER", config),
+    )
+
+def connect():
+    """Open a standalone connection outside the pool, for long-running workers."""
+    return psycopg2.connect(**_connect_kwargs())
+
+@contextlib.contextmanager
+def borrow():
+    """
+    Check a pooled connection out for work outside a request (e.g. background
+    flush threads). Commits on success, rolls back on error, always returns it.
+    """
+    source = pool
+    if source is None:
+        raise RuntimeError("database pool is not initialized; call init_db_pool() first")
+    conn = source.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        source.putconn(conn)
 
 def get_db():
     """
@@ -42,8 +113,10 @@ def get_db():
     """
     if 'db' not in g:
         if not pool:
-            init_db_pool()
-        g.db = pool.getconn()
+            init_db_pool(current_app.config)
+        source = pool
+        g.db = source.getconn()
+        g.db_pool = source  # close_db() returns it here even if the pool was replaced
     return g.db
 
 def close_db(e=None):
@@ -52,11 +125,21 @@ def close_db(e=None):
     at the end of each request.
     """
     db = g.pop('db', None)
-    if db is not None and pool is not None:
-        pool.putconn(db)
+    source = g.pop('db_pool', None)
+    if db is not None and source is not None:
+        source.putconn(db)
+
+def handle_pool_timeout(e):
+    """Answer with 503 instead of a generic 500 when the pool is exhausted."""
+    current_app.logger.warning(f"Database pool exhausted: {e} {pool.stats() if pool else ''}")
+    response = jsonify({"error": "Service temporarily busy, please retry"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
 
 def init_app(app):
     """Register database functions with the Flask app."""
     app.teardown_appcontext(close_db)
+    app.register_error_handler(PoolTimeout, handle_pool_timeout)
     with app.app_context():
-        init_db_pool()
+        init_db_pool(app.config)
@@ -0,0 +1,172 @@
+"""
+Alumni directory: filtered, keyset-paginated listing of verified users.
+
+Pages are ordered by (lastname, firstname, user_id) and continue from an
+opaque cursor, so each page is an index range scan no matter how deep the
+client scrolls. Each filter is a sargable predicate with its own index
+(see app/db/schema.sql). Free text is matched per word against names,
+current job and interests through pg_trgm indexes.
+"""
+
+from algo import utils
+from algo.pagination import encode_cursor, decode_cursor
+
+DIRECTORY_PAGE_SIZE = 24
+
+# Filter name -> SQL predicate; values are bound as %(name)s
+_FILTERS = {
+    "university": "u.university_name = %(university)s",
+    "graduation_year": "u.graduation_year = %(graduation_year)s",
+    "city": "u.current_city = %(city)s",
+    "role": "u.role = %(role)s",
+    "company": """EXISTS (
+        SELECT 1 FROM work_experience w
+        WHERE w.user_id = u.user_id AND w.leave_year IS NULL
+          AND lower(w.company_name || ' ' || w.job_title) LIKE %(company)s
+    )""",
+    "interest": """EXISTS (
+        SELECT 1 FROM user_interests ui
+        JOIN interests i ON i.interest_id = ui.interest_id
+        WHERE ui.user_id = u.user_id AND i.name = %(interest)s
+    )""",
+}
+
+# Card columns for one user as seen by %(viewer_id)s; see person_from_row
+_PEOPLE_SQL = """
+    SELECT u.user_id, u.firstname, u.lastname, u.username, u.university_name,
+           u.graduation_year, u.current_city, u.pfp_path, u.role,
+           job.company_name, job.job_title, ints.names AS interests,
+           CASE WHEN link.user_id = %(viewer_id)s THEN link.status END,
+           CASE WHEN link.user_id = %(viewer_id)s THEN link.connection_id END,
+           CASE WHEN link.con_user_id = %(viewer_id)s THEN link.status END,
+           CASE WHEN link.con_user_id = %(viewer_id)s THEN link.connection_id END
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT company_name, job_title FROM work_experience
+        WHERE user_id = u.user_id AND leave_year IS NULL
+        ORDER BY join_year DESC
+        LIMIT 1
+    ) job ON true
+    LEFT JOIN LATERAL (
+        SELECT STRING_AGG(i.name, ', ' ORDER BY i.name) AS names
+        FROM user_interests ui
+        JOIN interests i ON i.interest_id = ui.interest_id
+        WHERE ui.user_id = u.user_id
+    ) ints ON true
+    LEFT JOIN connections link
+           ON LEAST(link.user_id, link.con_user_id) = LEAST(%(viewer_id)s, u.user_id)
+          AND GREATEST(link.user_id, link.con_user_id) = GREATEST(%(viewer_id)s, u.user_id)
+    WHERE {where}
+    ORDER BY {order}
+    LIMIT %(limit)s
+"""
+
+_TEXT_WORD = """(
+    lower(u.firstname || ' ' || u.lastname || ' ' || u.username) LIKE %({key})s
+    OR EXISTS (
+        SELECT 1 FROM work_experience w
+        WHERE w.user_id = u.user_id AND w.leave_year IS NULL
+          AND lower(w.company_name || ' ' || w.job_title) LIKE %({key})s
+    )
+    OR EXISTS (
+        SELECT 1 FROM user_interests ui
+        JOIN interests i ON i.interest_id = ui.interest_id
+        WHERE ui.user_id = u.user_id AND lower(i.name) LIKE %({key})s
+    )
+)"""
+
+
+def _contains(text):
+    """LIKE pattern matching ``text`` anywhere, with wildcards escaped."""
+    escaped = text.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _where(viewer_id, filters, cursor):
+    clauses = ["u.verification_status = 'verified'", "u.user_id <> %(viewer_id)s"]
+    params = {"viewer_id": viewer_id}
+    for name, predicate in _FILTERS.items():
+        value = filters.get(name)
+        if value in (None, ""):
+            continue
+        clauses.append(predicate)
+        params[name] = _contains(value) if name == "company" else value
+    for index, word in enumerate((filters.get("q") or "").split()[:5]):
+        key = f"word_{index}"
+        clauses.append(_TEXT_WORD.format(key=key))
+        params[key] = _contains(word)
+    if cursor:
+        lastname, firstname, user_id = decode_cursor(cursor, size=3)
+        clauses.append("(u.lastname, u.firstname, u.user_id) > (%(c_last)s, %(c_first)s, %(c_id)s)")
+        params.update(c_last=lastname, c_first=firstname, c_id=int(user_id))
+    return " AND ".join(clauses), params
+
+
+def search(cur, viewer_id, filters, cursor=None, limit=DIRECTORY_PAGE_SIZE):
+    """
+    One page of the directory as seen by ``viewer_id``.
+
+    ``filters`` may hold university, graduation_year, city, role, company
+    (substring of current company or title), interest (exact name) and q
+    (free text). Returns {"people": [...], "has_more", "next_cursor"}; raises
+    ValueError for a malformed cursor.
+    """
+    where, params = _where(viewer_id, filters, cursor)
+    params["limit"] = limit + 1
+    cur.execute(
+        _PEOPLE_SQL.format(where=where, order="u.lastname, u.firstname, u.user_id"),
+        params,
+    )
+    rows = cur.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    return {
+        "people": [person_from_row(row) for row in rows],
+        "has_more": has_more,
+        "next_cursor": encode_cursor(last[2], last[1], last[0]) if last and has_more else None,
+    }
+
+
+def people_by_ids(cur, viewer_id, user_ids):
+    """Directory cards for verified ``user_ids`` as seen by ``viewer_id``, keyed by user id."""
+    if not user_ids:
+        return {}
+    cur.execute(
+        _PEOPLE_SQL.format(
+            where="u.verification_status = 'verified' AND u.user_id = ANY(%(ids)s)",
+            order="u.user_id",
+        ),
+        {"viewer_id": viewer_id, "ids": list(user_ids), "limit": len(user_ids)},
+    )
+    return {row[0]: person_from_row(row) for row in cur.fetchall()}
+
+
+def person_from_row(row):
+    """Directory card data, in the shape connect.ts expects."""
+    (user_id, firstname, lastname, username, university, graduation_year, city, pfp_path, role,
+     company, title, interests, out_status, out_id, in_status, in_id) = row
+    name = f"{firstname} {lastname}"
+    person = {
+        "id": user_id,
+        "name": name,
+        "username": username,
+        "university": university or "Not specified",
+        "graduation_year": graduation_year or "Not specified",
+        "location": city or "Not specified",
+        "avatar": pfp_path or utils.generate_default_avatar(name),
+        "role": role or "unverified",
+        "company": company or "Not specified",
+        "title": title or "Not specified",
+        "interests": interests.split(", ") if interests else [],
+        "connection_status": "none",
+    }
+    if out_status:
+        person["connection_status"] = out_status
+        person["connection_id"] = out_id
+    elif in_status == "accepted":
+        person["connection_status"] = "connected"
+    elif in_status == "pending":
+        person["connection_status"] = "received_request"
+        person["connection_id"] = in_id
+    return person
@@ -0,0 +1,211 @@
+"""
+In-memory facet counts for the alumni directory filters.
+
+Each worker keeps a columnar snapshot of verified users' filterable
+attributes: one int32 array of dictionary codes per facet (university,
+graduation year, city, role), plus an "active" mask. Facet counts for any
+combination of selected filters are a few vectorized comparisons and a
+bincount over these arrays. Each facet is counted with every other
+selection applied but not its own, so a dropdown shows what picking each
+value would return. Like the directory list, counts leave out the viewer.
+
+The snapshot is loaded once and then patched incrementally. Writes that
+change a user's filterable fields call notify_changed() inside their
+transaction (see algo.change_feed). Before answering, a worker drains its
+feed and reloads only the users named in the notifications. A full reload
+happens every REFRESH_SECONDS as a safety net, or whenever the listener
+connection is lost. Loads and patches run through the request's cursor, so
+a request never needs a second pooled connection. Free-text search is not part of the snapshot, so
+counts reflect the dropdown filters only.
+"""
+
+import os
+import time
+import logging
+import threading
+
+import numpy as np
+
+from algo.change_feed import get_listener, notify
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "directory_changes"
+REFRESH_SECONDS = int(os.getenv("DIRECTORY_INDEX_REFRESH_SECONDS", 900))
+
+# Facet name -> users column
+FACETS = {
+    "university": "university_name",
+    "graduation_year": "graduation_year",
+    "city": "current_city",
+    "role": "role",
+}
+_DESCENDING = {"graduation_year"}
+_SELECT = f"SELECT user_id, verification_status, {', '.join(FACETS.values())} FROM users"
+
+
+def notify_changed(cur, user_id):
+    """Queue a directory refresh for ``user_id``; delivered when the caller commits."""
+    notify(cur, NOTIFY_CHANNEL, user_id)
+
+
+class CodeDictionary:
+    """Value <-> int code mapping for one facet. NULL is code -1."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value, add=True):
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            if not add:
+                return None
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class FacetIndex:
+    """
+    Args:
+        listener: change_feed.Listener whose shared connection delivers changes
+        refresh_seconds: Age after which the snapshot is rebuilt from scratch
+    """
+
+    def __init__(self, listener, refresh_seconds=REFRESH_SECONDS):
+        self._feed = listener.feed(NOTIFY_CHANNEL)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loaded_at = None
+        self._counters = {"full_loads": 0, "patched_users": 0}
+
+    def counts(self, cur, viewer_id, selected=None):
+        """
+        Facet counts for ``viewer_id`` under ``selected`` ({facet: value};
+        empty values ignored). ``cur`` is the request's cursor, used to load
+        or patch the snapshot.
+
+        Returns {"total": n, "facets": {facet: [{"value", "count"}, ...]}}. A
+        selected value is always listed, even when its count is zero.
+        """
+        selected = {k: v for k, v in (selected or {}).items() if k in FACETS and v not in (None, "")}
+        with self._lock:
+            self._ensure_fresh(cur)
+            active = self._active.copy()
+            viewer = self._positions.get(viewer_id)
+            if viewer is not None:
+                active[viewer] = False
+            matches = {}
+            for facet, value in selected.items():
+                code = self._dicts[facet].code(value, add=False)
+                matches[facet] = self._codes[facet] == code if code is not None else np.zeros_like(active)
+
+            total = active.copy()
+            for match in matches.values():
+                total &= match
+
+            facets = {}
+            for facet in FACETS:
+                mask = active.copy()
+                for other, match in matches.items():
+                    if other != facet:
+                        mask &= match
+                codes = self._codes[facet][mask]
+                values = self._dicts[facet].values
+                tally = np.bincount(codes[codes >= 0], minlength=len(values))
+                keep = set(np.flatnonzero(tally).tolist())
+                if facet in selected:
+                    code = self._dicts[facet].code(selected[facet], add=False)
+                    if code is not None:
+                        keep.add(code)
+                    else:
+                        facets.setdefault(facet, []).append({"value": selected[facet], "count": 0})
+                facets.setdefault(facet, []).extend(
+                    {"value": values[code], "count": int(tally[code])} for code in keep
+                )
+                facets[facet].sort(key=lambda item: item["value"], reverse=facet in _DESCENDING)
+            return {"total": int(total.sum()), "facets": facets}
+
+    def stats(self):
+        with self._lock:
+            loaded = self._loaded_at is not None and self._pid == os.getpid()
+            return {
+                **self._counters,
+                "users": int(self._active.sum()) if loaded else 0,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if loaded else None,
+            }
+
+    def _ensure_fresh(self, cur):
+        # Connections and snapshots do not survive fork(), so each worker loads its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._feed.reset()
+            self._loaded_at = None
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self._load_all(cur)
+            return
+        try:
+            dirty = {int(payload) for payload in self._feed.drain() if payload.isdigit()}
+        except Exception as e:
+            logger.warning(f"⚠️ Directory index listener lost, reloading: {e}")
+            self._load_all(cur)
+            return
+        if dirty:
+            self._patch(cur, dirty)
+
+    def _load_all(self, cur):
+        # LISTEN first so changes committed while loading are patched in afterwards.
+        # Without a feed the snapshot is only as fresh as refresh_seconds.
+        self._feed.listen()
+        cur.execute(_SELECT + " WHERE verification_status = 'verified' ORDER BY user_id")
+        rows = cur.fetchall()
+        self._dicts = {facet: CodeDictionary() for facet in FACETS}
+        self._user_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._codes = {
+            facet: np.array([self._dicts[facet].code(row[2 + i]) for row in rows], dtype=np.int32)
+            for i, facet in enumerate(FACETS)
+        }
+        self._active = np.ones(len(rows), dtype=bool)
+        self._positions = {user_id: i for i, user_id in enumerate(self._user_ids.tolist())}
+        self._loaded_at = time.monotonic()
+        self._counters["full_loads"] += 1
+
+    def _patch(self, cur, user_ids):
+        cur.execute(_SELECT + " WHERE user_id = ANY(%s)", (sorted(user_ids),))
+        rows = {row[0]: row for row in cur.fetchall()}
+        for user_id in user_ids:
+            row = rows.get(user_id)
+            verified = row is not None and row[1] == "verified"
+            position = self._positions.get(user_id)
+            if position is None:
+                if not verified:
+                    continue
+                position = self._append(user_id)
+            self._active[position] = verified
+            if verified:
+                for i, facet in enumerate(FACETS):
+                    self._codes[facet][position] = self._dicts[facet].code(row[2 + i])
+        self._counters["patched_users"] += len(user_ids)
+
+    def _append(self, user_id):
+        position = len(self._user_ids)
+        self._user_ids = np.append(self._user_ids, user_id)
+        self._active = np.append(self._active, False)
+        for facet in FACETS:
+            self._codes[facet] = np.append(self._codes[facet], np.int32(-1))
+        self._positions[user_id] = position
+        return position
+
+
+_index = None
+
+
+def get_index():
+    global _index
+    if _index is None:
+        _index = FacetIndex(get_listener())
+    return _index
@@ -0,0 +1,165 @@
+"""
+In-process fan-out hub for channel events.
+
+Each worker process runs a single listener thread on a dedicated
+connection. The thread LISTENs for realtime_outbox notifications (see
+algo.outbox). For each burst of notifications it loads the new outbox rows
+in one query and pushes them to every local subscriber of that channel.
+However many clients are streaming a channel, the database sees one
+notification and one fetch per event per worker.
+"""
+
+import os
+import queue
+import select
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "realtime_outbox"
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_HUB_QUEUE_SIZE", 500))
+
+
+class Subscription:
+    """A subscriber's bounded event queue. Overflow closes the subscription."""
+
+    def __init__(self, channel_id):
+        self.channel_id = channel_id
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def get(self, timeout):
+        """Next event dict, or None if nothing arrived within ``timeout``."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventHub:
+    """
+    Args:
+        connect: Zero-argument callable returning a dedicated connection
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel_id -> set of Subscription
+        self._pid = None
+
+    def subscribe(self, channel_id):
+        self._ensure_started()
+        subscription = Subscription(channel_id)
+        with self._lock:
+            self._subscribers.setdefault(channel_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, event):
+        """Fan an event ({"channel_id", "type", "message", ...}) out to local subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["channel_id"], ()))
+        for subscription in subscribers:
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: let it reconnect and resume via Last-Event-ID
+                subscription.overflowed = True
+
+    # --- Listener thread ---
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._listen_forever, name="event-hub", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _listen_forever(self):
+        delay = 1.0
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning(f"⚠️ Event hub listener error, reconnecting in {delay:.0f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            else:
+                delay = 1.0
+
+    def _listen(self):
+        conn = self._connect()
+        conn.autocommit = True
+        cur = conn.cursor()
+        try:
+            cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            logger.info("📡 Event hub listening for channel events")
+            while True:
+                if select.select([conn], [], [], 30.0) == ([], [], []):
+                    continue
+                conn.poll()
+                outbox_ids = []
+                with self._lock:
+                    for notify in conn.notifies:
+                        channel_id, _, outbox_id = notify.payload.partition(":")
+                        if channel_id.isdigit() and int(channel_id) in self._subscribers:
+                            outbox_ids.append(int(outbox_id))
+                conn.notifies.clear()
+                if outbox_ids:
+                    self._dispatch(cur, outbox_ids)
+        finally:
+            cur.close()
+            conn.close()
+
+    def _dispatch(self, cur, outbox_ids):
+        cur.execute(
+            """
+            SELECT outbox_id, channel_id, event_type, payload
+            FROM realtime_outbox
+            WHERE outbox_id = ANY(%s)
+            ORDER BY outbox_id
+            """,
+            (outbox_ids,),
+        )
+        for outbox_id, channel_id, event_type, payload in cur.fetchall():
+            self.publish(
+                {
+                    "outbox_id": outbox_id,
+                    "channel_id": channel_id,
+                    "type": event_type,
+                    "message": payload,
+                }
+            )
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """Process-wide hub, created on first use."""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                from algo import db
+                _hub = EventHub(db.connect)
+    return _hub
@@ -0,0 +1,163 @@
+"""
+Transactional outbox for real-time channel events.
+
+Endpoints call enqueue() inside the same transaction that writes the
+channel data, so an event exists if and only if the write committed. It
+also holds a per-channel lock until commit, so a channel's events commit
+in outbox_id order and the relay never sees a later id before an earlier
+one. A trigger on realtime_outbox fires pg_notify('realtime_outbox', ...)
+for each row, which takes effect at commit. OutboxRelay, run as its own process
+(`flask outbox-relay`), wakes on those notifications and posts pending rows
+to the Go broadcast endpoint in outbox_id order. It marks them delivered
+only after the Go server acknowledges them, so delivery is at-least-once.
+
+Only one relay streams at a time: relays take a PostgreSQL advisory lock,
+and standbys block on it until the leader's connection goes away. That
+keeps per-channel ordering, and throughput no longer depends on how many
+web workers are running.
+"""
+
+import os
+import time
+import select
+import logging
+from psycopg2.extras import Json
+
+from algo.broadcaster import Broadcaster
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "realtime_outbox"
+RELAY_LOCK_KEY = 74_201_001  # pg_advisory_lock key held by the active relay
+ENQUEUE_LOCK_SPACE = 74_201  # first key of the per-channel (space, channel_id) enqueue locks
+RETENTION_HOURS = int(os.getenv("OUTBOX_RETENTION_HOURS", 24))
+
+
+def lock_channel(cur, channel_id):
+    """
+    Serialize writers to a channel until the caller's transaction ends.
+
+    Ids taken after the lock (outbox_id, and message_id when the caller
+    locks before inserting the message) commit in the same order they were
+    assigned within the channel, so readers may use them as high-water marks.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", (ENQUEUE_LOCK_SPACE, channel_id))
+
+
+def enqueue(cur, channel_id, event_type, payload):
+    """Write an event to the outbox as part of the caller's transaction."""
+    lock_channel(cur, channel_id)
+    cur.execute(
+        """
+        INSERT INTO realtime_outbox (channel_id, event_type, payload)
+        VALUES (%s, %s, %s)
+        RETURNING outbox_id
+        """,
+        (channel_id, event_type, Json(payload)),
+    )
+    row = cur.fetchone()
+    return row["outbox_id"] if isinstance(row, dict) else row[0]
+
+
+def backlog(cur):
+    """Number of undelivered events and the age in seconds of the oldest one."""
+    cur.execute(
+        """
+        SELECT COUNT(*), EXTRACT(EPOCH FROM NOW() - MIN(created_at))
+        FROM realtime_outbox
+        WHERE delivered_at IS NULL
+        """
+    )
+    row = cur.fetchone()
+    values = list(row.values()) if isinstance(row, dict) else list(row)
+    return {"pending": values[0], "oldest_pending_seconds": float(values[1] or 0)}
+
+
+class OutboxRelay:
+    """
+    Streams outbox rows to the Go broadcast endpoint.
+
+    Args:
+        connect: Zero-argument callable returning a dedicated connection
+        sender: Callable taking a list of events, returning True on delivery
+        batch_size: Maximum rows per POST
+        poll_interval: Seconds to wait for a notification before re-checking
+    """
+
+    def __init__(self, connect, sender=None, batch_size=100, poll_interval=5.0):
+        self._connect = connect
+        self.sender = sender or Broadcaster().send_batch
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._last_prune = 0.0
+
+    def run(self, once=False):
+        """Take leadership, then deliver events until interrupted."""
+        conn = self._connect()
+        conn.autocommit = True
+        cur = conn.cursor()
+        try:
+            logger.info("📮 Outbox relay waiting for leadership lock...")
+            cur.execute("SELECT pg_advisory_lock(%s)", (RELAY_LOCK_KEY,))
+            cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            logger.info("📮 Outbox relay is leader, streaming events")
+            while True:
+                self.drain(cur)
+                self._maybe_prune(cur)
+                if once:
+                    return
+                # Sleep until a commit notifies us (or poll_interval passes)
+                if select.select([conn], [], [], self.poll_interval) != ([], [], []):
+                    conn.poll()
+                    conn.notifies.clear()
+        finally:
+            cur.close()
+            conn.close()
+
+    def drain(self, cur):
+        """Deliver pending rows in outbox_id order. Returns how many were sent."""
+        delivered = 0
+        while True:
+            cur.execute(
+                """
+                SELECT outbox_id, channel_id, event_type, payload
+                FROM realtime_outbox
+                WHERE delivered_at IS NULL
+                ORDER BY outbox_id
+                LIMIT %s
+                """,
+                (self.batch_size,),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                return delivered
+
+            events = [
+                {"type": event_type, "channel_id": channel_id, "message": payload}
+                for _, channel_id, event_type, payload in rows
+            ]
+            if not self.sender(events):
+                # Keep order: retry the same head-of-line batch after a pause
+                logger.warning(f"⚠️ Outbox delivery failed for {len(events)} events, will retry")
+                time.sleep(1.0)
+                return delivered
+
+            cur.execute(
+                "UPDATE realtime_outbox SET delivered_at = NOW() WHERE outbox_id = ANY(%s)",
+                ([row[0] for row in rows],),
+            )
+            delivered += len(rows)
+
+    def _maybe_prune(self, cur):
+        # Delivered rows are kept for a while so reconnecting clients can sync
+        if time.monotonic() - self._last_prune < 600:
+            return
+        self._last_prune = time.monotonic()
+        cur.execute(
+            """
+            DELETE FROM realtime_outbox
+            WHERE delivered_at IS NOT NULL
+              AND created_at < NOW() - make_interval(hours => %s)
+            """,
+            (RETENTION_HOURS,),
+        )
@@ -0,0 +1,59 @@
+"""
+Opaque keyset-pagination cursors.
+
+A cursor is the sort key of the last row a client saw, e.g.
+(created_at, message_id), serialized as URL-safe base64 JSON so clients
+treat it as an opaque token. Datetimes round-trip as ISO strings, which
+PostgreSQL accepts when the query casts them (``%s::timestamp``).
+"""
+
+import json
+import base64
+import datetime
+
+
+def encode_cursor(*values):
+    """Serialize a row's sort key into an opaque token."""
+    payload = [
+        value.isoformat() if isinstance(value, (datetime.datetime, datetime.date)) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, size=None):
+    """
+    Decode a token produced by encode_cursor.
+
+    Raises ValueError if the token is malformed or does not hold ``size`` values.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        raise ValueError("invalid cursor")
+    return values
+
+
+def decode_time_cursor(token):
+    """
+    Decode a (created_at, id) cursor into (datetime, int).
+
+    Raises ValueError if the token is malformed or its values do not parse,
+    so a tampered cursor never reaches SQL.
+    """
+    created_at, row_id = decode_cursor(token, size=2)
+    try:
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
+
+
+def page_limit(value, default=50, maximum=100):
+    """Clamp a requested page size to 1..maximum."""
+    if value is None:
+        return default
+    return max(1, min(value, maximum))
@@ -0,0 +1,198 @@
+"""
+Thread-safe PostgreSQL connection pool.
+
+Replaces psycopg2's SimpleConnectionPool, which is not safe to share between
+threads and raises PoolError as soon as every connection is checked out.
+Callers here wait (up to a timeout) for a connection to be returned, broken
+connections are discarded on checkout, and connections are recycled once
+they exceed a maximum age.
+"""
+
+import threading
+import time
+from collections import deque
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    """Raised when no connection became available within the wait timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe connection pool.
+
+    Args:
+        connect: Zero-argument callable returning a new DB-API connection
+        minconn: Connections opened eagerly when the pool is created
+        maxconn: Upper bound on open connections (idle + checked out)
+        timeout: Seconds a caller waits for a free connection before PoolTimeout
+        max_age: Seconds after which a connection is closed and replaced
+        ping_after: Idle seconds after which a connection is pinged on checkout
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=20, timeout=10.0,
+                 max_age=1800.0, ping_after=30.0):
+        if maxconn < 1 or minconn > maxconn:
+            raise ValueError("invalid pool size: minconn=%s maxconn=%s" % (minconn, maxconn))
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_age = max_age
+        self.ping_after = ping_after
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, returned_at), most recently used on the right
+        self._born = {}  # id(conn) -> creation time
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+
+        for _ in range(minconn):
+            conn = self._open()
+            self._size += 1
+            self._idle.append((conn, time.monotonic()))
+
+    # --- Public API ---
+
+    def getconn(self, timeout=None):
+        """Check out a healthy connection, waiting up to ``timeout`` seconds."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn, returned_at = self._acquire_slot(deadline)
+            if conn is None:
+                # A slot was reserved for a brand new connection
+                try:
+                    return self._open()
+                except Exception:
+                    self._release_slot()
+                    raise
+            if self._is_healthy(conn, returned_at):
+                return conn
+            self._discard(conn)
+
+    def putconn(self, conn, close=False):
+        """Return a connection to the pool, discarding it if it is unusable."""
+        if id(conn) not in self._born:
+            raise psycopg2.pool.PoolError("trying to put unkeyed connection")
+
+        if close or conn.closed or self._expired(conn):
+            self._discard(conn)
+            return
+
+        # Never hand the next caller a connection with an open transaction
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+                return
+
+        with self._cond:
+            if self._closed:
+                self._close_quietly(conn)
+                self._born.pop(id(conn), None)
+                self._size -= 1
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close_quietly(conn)
+                self._born.pop(id(conn), None)
+                self._size -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        """Snapshot of pool occupancy, used for logging and diagnostics."""
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "maxconn": self.maxconn,
+            }
+
+    # --- Internals ---
+
+    def _acquire_slot(self, deadline):
+        """
+        Block until an idle connection or a free slot exists.
+
+        Returns (conn, returned_at) for an idle connection, or (None, None)
+        when the caller reserved a slot and must open a new connection.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.pool.PoolError("connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.maxconn:
+                    self._size += 1
+                    return None, None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        "no database connection available after %.1fs "
+                        "(maxconn=%d)" % (self.timeout, self.maxconn)
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _open(self):
+        conn = self._connect()
+        self._born[id(conn)] = time.monotonic()
+        return conn
+
+    def _expired(self, conn):
+        born = self._born.get(id(conn))
+        return born is not None and self.max_age and time.monotonic() - born > self.max_age
+
+    def _is_healthy(self, conn, returned_at):
+        if conn.closed or self._expired(conn):
+            return False
+        if self.ping_after is not None and time.monotonic() - returned_at >= self.ping_after:
+            try:
+                cur = conn.cursor()
+                try:
+                    cur.execute("SELECT 1")
+                finally:
+                    cur.close()
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        self._born.pop(id(conn), None)
+        self._release_slot()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            if not conn.closed:
+                conn.close()
+        except psycopg2.Error:
+            pass
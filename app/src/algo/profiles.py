@@ -0,0 +1,187 @@
+"""
+Profile page data: one query per profile, cached per worker.
+
+load_profile() assembles everything profile.html needs in a single round
+trip. Interests, education and work history come back as JSON aggregates
+alongside the user row, with the community name and the accepted-connection
+counter (algo.connection_stats) joined in.
+
+ProfileCache keeps results in a TTLCache per worker. Profile writes
+(complete_profile, interests, settings.update_account) and connection
+accept/cancel call invalidate() for the affected users, which drops this
+worker's copy straight away. Those writes also notify the directory and
+connection-graph channels (see algo.change_feed). The cache drains both
+channels before each read, so other workers drop their copies too. It
+listens on the worker's shared change-feed connection.
+"""
+
+import os
+import logging
+import threading
+from cachetools import TTLCache
+
+from algo import directory_index, connection_graph
+from algo.change_feed import get_listener
+
+logger = logging.getLogger(__name__)
+
+CACHE_SECONDS = int(os.getenv("PROFILE_CACHE_SECONDS", 300))
+
+# Columns 0-17 are the users row profile.html indexes into (user_data[0..17])
+_PROFILE_SQL = """
+    SELECT u.user_id, u.firstname, u.lastname, u.email, u.username, u.dob, u.graduation_year,
+           u.university_name, u.department, u.college, u.current_city, u.pfp_path,
+           u.registration_date, u.role, u.enrollment_number, u.community_id, u.last_login, u.login_count,
+           COALESCE((
+               SELECT json_agg(i.name ORDER BY i.name)
+               FROM user_interests ui
+               JOIN interests i ON i.interest_id = ui.interest_id
+               WHERE ui.user_id = u.user_id
+           ), '[]') AS interests,
+           (
+               SELECT json_build_array(degree_type, university_name, college_name, major, graduation_year)
+               FROM education_details
+               WHERE user_id = u.user_id
+               ORDER BY detail_id
+               LIMIT 1
+           ) AS education,
+           COALESCE((
+               SELECT json_agg(json_build_array(company_name, job_title, join_year, leave_year)
+                               ORDER BY join_year DESC)
+               FROM work_experience
+               WHERE user_id = u.user_id
+           ), '[]') AS work_experience,
+           COALESCE(s.accepted, 0) AS connections_count,
+           c.name AS community_name
+    FROM users u
+    LEFT JOIN user_connection_stats s ON s.user_id = u.user_id
+    LEFT JOIN communities c ON c.community_id = u.community_id
+    WHERE u.username = %(username)s OR u.user_id = %(fallback_id)s
+    ORDER BY (u.username = %(username)s) DESC
+    LIMIT 1
+"""
+
+
+def load_profile(cur, username, fallback_id=None):
+    """
+    Profile data for ``username``, or for user ``fallback_id`` when no such
+    username exists (the session may hold a display name rather than a
+    username). Returns None if neither matches.
+    """
+    cur.execute(_PROFILE_SQL, {"username": username, "fallback_id": fallback_id})
+    row = cur.fetchone()
+    if not row:
+        return None
+    return {
+        "user_data": tuple(row[:18]),
+        "user_interests": row[18],
+        "education_data": row[19],
+        "work_experience": row[20],
+        "connections_count": row[21],
+        "community_name": row[22],
+    }
+
+
+def load_viewer(cur, user_id):
+    """The signed-in user's row for the navigation dropdown."""
+    cur.execute(
+        """
+        SELECT user_id, firstname, lastname, email, username, pfp_path, role
+        FROM users
+        WHERE user_id = %s
+        """,
+        (user_id,),
+    )
+    return cur.fetchone()
+
+
+class ProfileCache:
+    """
+    Args:
+        listener: change_feed.Listener whose shared connection delivers changes
+        cache_seconds: How long an entry may be served without a change notification
+    """
+
+    def __init__(self, listener, cache_seconds=CACHE_SECONDS):
+        self._feed = listener.feed(directory_index.NOTIFY_CHANNEL, connection_graph.NOTIFY_CHANNEL)
+        self._profiles = TTLCache(maxsize=5000, ttl=cache_seconds)
+        self._viewers = TTLCache(maxsize=10000, ttl=cache_seconds)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def profile(self, cur, username, fallback_id=None):
+        """Cached load_profile(); only lookups that matched the username are cached."""
+        self._sync()
+        with self._lock:
+            cached = self._profiles.get(username)
+            self._counters["hits" if cached else "misses"] += 1
+        if cached:
+            return cached
+        profile = load_profile(cur, username, fallback_id)
+        if profile and profile["user_data"][4] == username:
+            with self._lock:
+                self._profiles[username] = profile
+        return profile
+
+    def viewer(self, cur, user_id):
+        """Cached load_viewer()."""
+        self._sync()
+        with self._lock:
+            cached = self._viewers.get(user_id)
+        if cached:
+            return cached
+        row = load_viewer(cur, user_id)
+        if row:
+            with self._lock:
+                self._viewers[user_id] = row
+        return row
+
+    def invalidate(self, *user_ids):
+        """Drop cached entries for these users in this worker."""
+        user_ids = set(user_ids)
+        with self._lock:
+            for username, profile in list(self._profiles.items()):
+                if profile["user_data"][0] in user_ids:
+                    del self._profiles[username]
+            for user_id in user_ids:
+                self._viewers.pop(user_id, None)
+            self._counters["invalidations"] += len(user_ids)
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "profiles": len(self._profiles), "viewers": len(self._viewers)}
+
+    def _sync(self):
+        # The LISTEN connection does not survive fork(); start clean in each worker
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._feed.reset()
+            with self._lock:
+                self._profiles.clear()
+                self._viewers.clear()
+        if not self._feed.listening:
+            self._feed.listen()
+            return
+        try:
+            payloads = self._feed.drain()
+        except Exception as e:
+            logger.warning(f"⚠️ Profile cache listener lost, clearing: {e}")
+            with self._lock:
+                self._profiles.clear()
+                self._viewers.clear()
+            return
+        # Payloads are "user", "user:other" or "v<user>"
+        user_ids = {int(part) for payload in payloads for part in payload.lstrip("v").split(":") if part.isdigit()}
+        if user_ids:
+            self.invalidate(*user_ids)
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ProfileCache(get_listener())
+    return _cache
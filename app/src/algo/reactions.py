@@ -0,0 +1,224 @@
+"""
+Channel message reactions: denormalized per-(message, emoji) counters.
+
+message_reaction_counts holds one row per (message, emoji) with a non-zero
+count. A trigger on message_reactions (see app/db/schema.sql) keeps it in
+step inside the same transaction as each add/remove, so listings read the
+counts with a primary-key lookup instead of aggregating every reaction row.
+find_drift() and rebuild_counts() back the `flask reaction-counts` command,
+which checks the counters against message_reactions and repairs them.
+
+Toggles from the API go through a write-behind buffer: repeated clicks on
+the same (message, user, emoji) cancel out in memory, and each flush applies
+the net toggles with one statement and enqueues a single reaction_update
+event per affected message.
+"""
+
+import os
+import threading
+from cachetools import LRUCache
+
+from algo import db, outbox
+from algo.write_behind import WriteBehindBuffer
+
+FLUSH_INTERVAL = float(os.getenv("REACTION_FLUSH_INTERVAL", 0.25))
+
+_message_channels = LRUCache(maxsize=50000)
+_message_channels_lock = threading.Lock()
+
+
+def _value(row, key, index):
+    return row[key] if isinstance(row, dict) else row[index]
+
+
+def counts_for(cur, message_ids):
+    """Map message_id -> [{"emoji", "count"}] for the given messages."""
+    if not message_ids:
+        return {}
+    cur.execute(
+        """
+        SELECT message_id, emoji, count
+        FROM message_reaction_counts
+        WHERE message_id = ANY(%s)
+        ORDER BY message_id, emoji
+        """,
+        (list(message_ids),),
+    )
+    counts = {}
+    for row in cur.fetchall():
+        counts.setdefault(_value(row, "message_id", 0), []).append(
+            {"emoji": _value(row, "emoji", 1), "count": _value(row, "count", 2)}
+        )
+    return counts
+
+
+def find_drift(cur, limit=100):
+    """Counter rows that disagree with message_reactions: (message_id, emoji, actual, stored)."""
+    cur.execute(
+        """
+        SELECT COALESCE(a.message_id, c.message_id) AS message_id,
+               COALESCE(a.emoji, c.emoji) AS emoji,
+               COALESCE(a.actual, 0) AS actual,
+               COALESCE(c.count, 0) AS stored
+        FROM (
+            SELECT message_id, emoji, COUNT(*) AS actual
+            FROM message_reactions
+            GROUP BY message_id, emoji
+        ) a
+        FULL OUTER JOIN message_reaction_counts c
+             ON c.message_id = a.message_id AND c.emoji = a.emoji
+        WHERE COALESCE(a.actual, 0) <> COALESCE(c.count, 0)
+        ORDER BY 1, 2
+        LIMIT %s
+        """,
+        (limit,),
+    )
+    return [
+        tuple(row.values()) if isinstance(row, dict) else tuple(row)
+        for row in cur.fetchall()
+    ]
+
+
+def rebuild_counts(cur):
+    """
+    Recompute counters from message_reactions, touching only rows that drifted.
+
+    Takes a SHARE lock on message_reactions for the rest of the caller's
+    transaction so reactions cannot change underneath the rebuild.
+    Returns (rows_removed, rows_written).
+    """
+    cur.execute("LOCK TABLE message_reactions IN SHARE MODE")
+    cur.execute(
+        """
+        DELETE FROM message_reaction_counts c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM message_reactions r
+            WHERE r.message_id = c.message_id AND r.emoji = c.emoji
+        )
+        """
+    )
+    removed = cur.rowcount
+    cur.execute(
+        """
+        INSERT INTO message_reaction_counts (message_id, emoji, count)
+        SELECT message_id, emoji, COUNT(*)
+        FROM message_reactions
+        GROUP BY message_id, emoji
+        ON CONFLICT (message_id, emoji) DO UPDATE SET count = EXCLUDED.count
+        WHERE message_reaction_counts.count <> EXCLUDED.count
+        """
+    )
+    return removed, cur.rowcount
+
+
+def channel_of(cur, message_id):
+    """Channel of a live message, or None. Message -> channel never changes, so it is cached."""
+    with _message_channels_lock:
+        channel_id = _message_channels.get(message_id)
+    if channel_id is not None:
+        return channel_id
+    cur.execute(
+        "SELECT channel_id FROM channel_messages WHERE message_id = %s AND is_deleted = false",
+        (message_id,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    channel_id = _value(row, "channel_id", 0)
+    with _message_channels_lock:
+        _message_channels[message_id] = channel_id
+    return channel_id
+
+
+def apply_toggles(cur, toggles):
+    """
+    Apply net toggles [(message_id, user_id, emoji), ...] in one statement:
+    existing reactions are removed, absent ones added (on live messages only).
+    Returns [(channel_id, message_id, reactions)] for every touched message,
+    with reactions read back from the counters.
+    """
+    if not toggles:
+        return []
+    message_ids, user_ids, emojis = (list(column) for column in zip(*toggles))
+    cur.execute(
+        """
+        WITH toggles(message_id, user_id, emoji) AS (
+            SELECT * FROM unnest(%s::int[], %s::int[], %s::varchar[])
+        ),
+        removed AS (
+            DELETE FROM message_reactions r
+            USING toggles t
+            WHERE r.message_id = t.message_id AND r.user_id = t.user_id AND r.emoji = t.emoji
+            RETURNING r.message_id
+        ),
+        added AS (
+            INSERT INTO message_reactions (message_id, user_id, emoji)
+            SELECT t.message_id, t.user_id, t.emoji
+            FROM toggles t
+            JOIN channel_messages cm ON cm.message_id = t.message_id AND cm.is_deleted = false
+            WHERE NOT EXISTS (
+                SELECT 1 FROM message_reactions r
+                WHERE r.message_id = t.message_id AND r.user_id = t.user_id AND r.emoji = t.emoji
+            )
+            ON CONFLICT (message_id, user_id, emoji) DO NOTHING
+            RETURNING message_id
+        )
+        SELECT message_id FROM removed
+        UNION
+        SELECT message_id FROM added
+        """,
+        (message_ids, user_ids, emojis),
+    )
+    touched = [_value(row, "message_id", 0) for row in cur.fetchall()]
+    if not touched:
+        return []
+
+    # Counters were updated by the trigger; read them back in the same transaction
+    cur.execute(
+        """
+        SELECT cm.channel_id, cm.message_id,
+               COALESCE(
+                   json_agg(json_build_object('emoji', rc.emoji, 'count', rc.count) ORDER BY rc.emoji)
+                       FILTER (WHERE rc.emoji IS NOT NULL),
+                   '[]'
+               ) AS reactions
+        FROM channel_messages cm
+        LEFT JOIN message_reaction_counts rc ON rc.message_id = cm.message_id
+        WHERE cm.message_id = ANY(%s)
+        GROUP BY cm.channel_id, cm.message_id
+        ORDER BY cm.channel_id, cm.message_id
+        """,
+        (touched,),
+    )
+    return [
+        (_value(row, "channel_id", 0), _value(row, "message_id", 1), _value(row, "reactions", 2))
+        for row in cur.fetchall()
+    ]
+
+
+def _flush_toggles(batch):
+    with db.borrow() as conn:
+        cur = conn.cursor()
+        try:
+            # Rows come back in channel order, so concurrent flushes take
+            # the outbox channel locks in the same order
+            for channel_id, message_id, counts in apply_toggles(cur, sorted(batch)):
+                outbox.enqueue(
+                    cur, channel_id, "reaction_update", {"message_id": message_id, "reactions": counts}
+                )
+        finally:
+            cur.close()
+
+
+# Two pending toggles of the same reaction cancel out
+toggle_buffer = WriteBehindBuffer(
+    _flush_toggles,
+    merge=lambda pending, new: None,
+    interval=FLUSH_INTERVAL,
+    name="reaction-buffer",
+)
+
+
+def queue_toggle(message_id, user_id, emoji):
+    """Toggle a user's reaction; applied by the next buffer flush."""
+    toggle_buffer.add((message_id, user_id, emoji))
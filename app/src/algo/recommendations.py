@@ -0,0 +1,306 @@
+"""
+Alumni and mentor recommendations, scored against everyone at once.
+
+Each worker keeps a FeatureMatrix with one row per user: a dense 0/1
+interest matrix, dictionary codes for university, city and current
+employer, graduation year, and verification and mentor flags. Scoring one
+user is a single matrix-vector product for shared interests (cosine
+normalized) plus vectorized equality tests and a year-proximity term over
+the whole population. Mutual connections from algo.connection_graph add a
+capped bonus. The best candidates are picked with argpartition, so the cost
+does not depend on per-pair SQL.
+
+Results are cached per (user, mode) for CACHE_SECONDS. Profile, interest
+and verification writes already notify algo.directory_index's channel; the
+model listens on the same channel, patches only the notified users' rows
+and drops their cached results. Existing connections are filtered out again
+at read time, so a fresh connection disappears from suggestions at once.
+Loads and patches run through the request's cursor, and the model's LISTEN
+shares the worker's change-feed connection with the other indexes.
+"""
+
+import os
+import time
+import logging
+import threading
+
+import numpy as np
+from cachetools import TTLCache
+
+from algo import connection_graph
+from algo.change_feed import get_listener
+from algo.directory_index import NOTIFY_CHANNEL, CodeDictionary
+
+logger = logging.getLogger(__name__)
+
+MODES = ("peers", "mentors")
+MENTOR_ROLES = ("alumni", "staff")
+WEIGHTS = {"interests": 3.0, "university": 2.0, "employer": 2.0, "city": 1.0, "year": 1.0, "mutual": 1.5}
+YEAR_SPAN = 5  # years apart at which the graduation-year term reaches zero
+MUTUAL_CAP = 5  # mutual connections beyond this add nothing
+CACHED_RESULTS = 50
+CACHE_SECONDS = int(os.getenv("RECOMMENDATION_CACHE_SECONDS", 600))
+REFRESH_SECONDS = int(os.getenv("RECOMMENDATION_REFRESH_SECONDS", 900))
+
+# Categorical feature -> index in a user row
+_CATEGORICAL = {"university": 3, "city": 4, "employer": 6}
+
+_USER_SQL = """
+    SELECT u.user_id, u.verification_status, u.role, u.university_name,
+           u.current_city, u.graduation_year, job.employer
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT lower(trim(company_name)) AS employer FROM work_experience
+        WHERE user_id = u.user_id AND leave_year IS NULL
+        ORDER BY join_year DESC
+        LIMIT 1
+    ) job ON true
+"""
+
+
+class FeatureMatrix:
+    """
+    Feature columns for every user; row i describes user_ids[i].
+
+    User rows are (user_id, verification_status, role, university_name,
+    current_city, graduation_year, employer).
+    """
+
+    def __init__(self, users=(), interests=()):
+        self.user_ids = np.zeros(0, dtype=np.int64)
+        self.positions = {}
+        self.active = np.zeros(0, dtype=bool)
+        self.mentor = np.zeros(0, dtype=bool)
+        self.year = np.zeros(0, dtype=np.int32)  # 0 when unknown
+        self.codes = {name: np.zeros(0, dtype=np.int32) for name in _CATEGORICAL}
+        self.dicts = {name: CodeDictionary() for name in _CATEGORICAL}
+        self.interests = np.zeros((0, 0), dtype=np.float32)
+        self.interest_counts = np.zeros(0, dtype=np.float32)
+        self.update(users, interests)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def update(self, users, interests):
+        """
+        Insert or replace the given users' rows. ``interests`` holds
+        (user_id, interest_id) pairs and replaces those users' interests.
+        """
+        users = list(users)
+        if not users:
+            return
+        new_ids = [row[0] for row in users if row[0] not in self.positions]
+        if new_ids:
+            self._grow(new_ids)
+        interests = list(interests)
+        width = max((interest_id for _, interest_id in interests), default=-1) + 1
+        if width > self.interests.shape[1]:
+            self.interests = np.pad(self.interests, ((0, 0), (0, width - self.interests.shape[1])))
+
+        rows = np.array([self.positions[row[0]] for row in users], dtype=np.int64)
+        self.active[rows] = [row[1] == "verified" for row in users]
+        self.mentor[rows] = [row[2] in MENTOR_ROLES for row in users]
+        self.year[rows] = [row[5] or 0 for row in users]
+        for name, index in _CATEGORICAL.items():
+            self.codes[name][rows] = [self.dicts[name].code(row[index] or None) for row in users]
+        self.interests[rows] = 0
+        if interests:
+            owners = np.array([self.positions[user_id] for user_id, _ in interests], dtype=np.int64)
+            self.interests[owners, [interest_id for _, interest_id in interests]] = 1
+        self.interest_counts[rows] = self.interests[rows].sum(axis=1)
+
+    def deactivate(self, user_ids):
+        rows = [self.positions[user_id] for user_id in user_ids if user_id in self.positions]
+        self.active[rows] = False
+
+    def score(self, row, mutual=None):
+        """
+        Similarity of every user to the user in ``row``, as float32. Inactive
+        users and the user themself score -inf. ``mutual`` maps user_id to
+        mutual-connection count.
+        """
+        shared = self.interests @ self.interests[row]
+        norm = np.sqrt(self.interest_counts * self.interest_counts[row])
+        score = WEIGHTS["interests"] * np.divide(shared, norm, out=np.zeros_like(shared), where=norm > 0)
+        for name in _CATEGORICAL:
+            mine = self.codes[name][row]
+            if mine >= 0:
+                score += WEIGHTS[name] * (self.codes[name] == mine)
+        if self.year[row]:
+            closeness = np.clip(1 - np.abs(self.year - self.year[row]) / YEAR_SPAN, 0, 1)
+            score += WEIGHTS["year"] * np.where(self.year > 0, closeness, 0).astype(np.float32)
+        if mutual:
+            known = [(self.positions[u], c) for u, c in mutual.items() if u in self.positions]
+            if known:
+                rows, counts = (np.array(column) for column in zip(*known))
+                score[rows] += WEIGHTS["mutual"] * np.minimum(counts, MUTUAL_CAP) / MUTUAL_CAP
+        score[~self.active] = -np.inf
+        score[row] = -np.inf
+        return score
+
+    def reasons(self, row, other, mutual_count=0):
+        """Short human-readable explanations of why ``other`` matched ``row``."""
+        reasons = []
+        shared = int(self.interests[row] @ self.interests[other])
+        if shared:
+            reasons.append(f"{shared} shared interest{'s' if shared != 1 else ''}")
+        for name, label in (("university", "Same university"), ("employer", "Same employer"), ("city", "Same city")):
+            if self.codes[name][row] >= 0 and self.codes[name][row] == self.codes[name][other]:
+                reasons.append(label)
+        if mutual_count:
+            reasons.append(f"{mutual_count} mutual connection{'s' if mutual_count != 1 else ''}")
+        return reasons
+
+    def _grow(self, new_ids):
+        start = len(self.user_ids)
+        extra = len(new_ids)
+        self.user_ids = np.concatenate([self.user_ids, np.array(new_ids, dtype=np.int64)])
+        self.positions.update((user_id, start + i) for i, user_id in enumerate(new_ids))
+        self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+        self.mentor = np.concatenate([self.mentor, np.zeros(extra, dtype=bool)])
+        self.year = np.concatenate([self.year, np.zeros(extra, dtype=np.int32)])
+        for name in _CATEGORICAL:
+            self.codes[name] = np.concatenate([self.codes[name], np.full(extra, -1, dtype=np.int32)])
+        self.interests = np.concatenate(
+            [self.interests, np.zeros((extra, self.interests.shape[1]), dtype=np.float32)]
+        )
+        self.interest_counts = np.concatenate([self.interest_counts, np.zeros(extra, dtype=np.float32)])
+
+
+def top_matches(features, row, mode="peers", mutual=None, exclude=(), limit=CACHED_RESULTS):
+    """Best (row, score) pairs for ``row``, highest first; non-positive scores are dropped."""
+    score = features.score(row, mutual)
+    if mode == "mentors":
+        score[~features.mentor] = -np.inf
+        if features.year[row]:
+            score[features.year >= features.year[row]] = -np.inf
+    excluded = [features.positions[u] for u in exclude if u in features.positions]
+    score[excluded] = -np.inf
+    k = min(limit, len(score))
+    if k == 0:
+        return []
+    top = np.argpartition(-score, k - 1)[:k]
+    top = top[np.argsort(-score[top], kind="stable")]
+    return [(int(i), float(score[i])) for i in top if score[i] > 0]
+
+
+class RecommendationModel:
+    """
+    Args:
+        listener: change_feed.Listener whose shared connection delivers changes
+        graph: ConnectionGraph used for mutual counts and exclusions
+    """
+
+    def __init__(self, listener, graph, refresh_seconds=REFRESH_SECONDS, cache_seconds=CACHE_SECONDS):
+        self._feed = listener.feed(NOTIFY_CHANNEL)
+        self._graph = graph
+        self.refresh_seconds = refresh_seconds
+        self._cache = TTLCache(maxsize=10000, ttl=cache_seconds)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loaded_at = None
+        self._counters = {"full_loads": 0, "patched_users": 0, "cache_hits": 0, "cache_misses": 0}
+
+    def recommend(self, cur, user_id, mode="peers", limit=20):
+        """
+        [{"user_id", "score", "reasons"}] for ``user_id``, best first. ``cur``
+        is the request's cursor, used to load or patch the model and the
+        connection graph.
+        """
+        connected = set(self._graph.neighbors(cur, user_id))
+        with self._lock:
+            self._ensure_fresh(cur)
+            results = self._cache.get((user_id, mode))
+            if results is None:
+                self._counters["cache_misses"] += 1
+                results = self._cache[(user_id, mode)] = self._compute(cur, user_id, mode, connected)
+            else:
+                self._counters["cache_hits"] += 1
+        return [result for result in results if result["user_id"] not in connected][:limit]
+
+    def invalidate(self, user_id):
+        with self._lock:
+            for mode in MODES:
+                self._cache.pop((user_id, mode), None)
+
+    def stats(self):
+        with self._lock:
+            loaded = self._loaded_at is not None and self._pid == os.getpid()
+            return {
+                **self._counters,
+                "users": len(self._features) if loaded else 0,
+                "cached": len(self._cache),
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if loaded else None,
+            }
+
+    def _compute(self, cur, user_id, mode, connected):
+        row = self._features.positions.get(user_id)
+        if row is None or not self._features.active[row]:
+            return []
+        # Safe under our lock: the graph never calls back into the model
+        mutual = dict(self._graph.suggestions(cur, user_id, limit=500))
+        return [
+            {
+                "user_id": int(self._features.user_ids[other]),
+                "score": round(score, 3),
+                "reasons": self._features.reasons(
+                    row, other, mutual.get(int(self._features.user_ids[other]), 0)
+                ),
+            }
+            for other, score in top_matches(self._features, row, mode, mutual, exclude=connected)
+        ]
+
+    def _ensure_fresh(self, cur):
+        # Connections and arrays do not survive fork(), so each worker loads its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._feed.reset()
+            self._loaded_at = None
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self._load_all(cur)
+            return
+        try:
+            dirty = {int(payload) for payload in self._feed.drain() if payload.isdigit()}
+        except Exception as e:
+            logger.warning(f"⚠️ Recommendation model listener lost, reloading: {e}")
+            self._load_all(cur)
+            return
+        if dirty:
+            self._patch(cur, dirty)
+
+    def _fetch(self, cur, where="", params=()):
+        cur.execute(_USER_SQL + where, params)
+        users = cur.fetchall()
+        cur.execute(
+            "SELECT user_id, interest_id FROM user_interests" + where.replace("u.user_id", "user_id"),
+            params,
+        )
+        return users, cur.fetchall()
+
+    def _load_all(self, cur):
+        # LISTEN first so changes committed while loading are patched in afterwards
+        self._feed.listen()
+        users, interests = self._fetch(cur)
+        self._features = FeatureMatrix(users, interests)
+        self._cache.clear()
+        self._loaded_at = time.monotonic()
+        self._counters["full_loads"] += 1
+
+    def _patch(self, cur, user_ids):
+        users, interests = self._fetch(cur, " WHERE u.user_id = ANY(%s)", (sorted(user_ids),))
+        self._features.update(users, interests)
+        self._features.deactivate(user_ids - {row[0] for row in users})
+        for user_id in user_ids:
+            for mode in MODES:
+                self._cache.pop((user_id, mode), None)
+        self._counters["patched_users"] += len(user_ids)
+
+
+_model = None
+
+
+def get_model():
+    global _model
+    if _model is None:
+        _model = RecommendationModel(get_listener(), connection_graph.get_graph())
+    return _model
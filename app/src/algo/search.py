@@ -0,0 +1,155 @@
+"""
+Full-text search over channel messages and direct messages.
+
+Both tables carry a generated ``search_vector`` column with a GIN index (see
+app/db/schema.sql), so matching is an index lookup instead of an ILIKE scan.
+Access rules are part of the SQL: channel results are limited to active
+channels in communities the user belongs to, and private channels only if
+they are a member; DM results to conversations the user is in. Results are
+ranked with ts_rank and keyset-paginated on (rank, message_id). Snippets
+are produced only for the rows on the returned page.
+"""
+
+import html
+
+from algo.pagination import encode_cursor, decode_cursor
+
+TEXT_SEARCH_CONFIG = "english"
+
+# ts_headline markers; swapped for <mark> after the snippet is HTML-escaped
+_START, _STOP = "\u2063[[", "]]\u2063"
+_HEADLINE_OPTIONS = f'StartSel="{_START}", StopSel="{_STOP}", MaxFragments=2, MaxWords=25, MinWords=8'
+
+
+def _highlight(snippet):
+    escaped = html.escape(snippet or "")
+    return escaped.replace(html.escape(_START), "<mark>").replace(html.escape(_STOP), "</mark>")
+
+
+def _rows(cur):
+    columns = [column[0] for column in cur.description]
+    return [dict(row) if isinstance(row, dict) else dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def _keyset(cursor):
+    if not cursor:
+        return "", []
+    rank, message_id = decode_cursor(cursor, size=2)
+    try:
+        params = [float(rank), int(message_id)]
+    except (TypeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
+    return "WHERE (rank, message_id) < (%s::float8, %s)", params
+
+
+def _page(rows, limit):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    for row in rows:
+        row["snippet"] = _highlight(row["snippet"])
+    last = rows[-1] if rows else None
+    return {
+        "results": rows,
+        "has_more": has_more,
+        "next_cursor": encode_cursor(last["rank"], last["message_id"]) if last and has_more else None,
+    }
+
+
+def search_channel_messages(cur, user_id, query, community_id=None, channel_id=None,
+                            cursor=None, limit=20):
+    """
+    Search channel messages the user is allowed to read.
+
+    Returns {"results": [...], "has_more", "next_cursor"}; each result has
+    message_id, channel_id, channel_name, community_id, user_id, username,
+    created_at, rank and an HTML-safe snippet with <mark> highlights.
+    Raises ValueError for a malformed cursor.
+    """
+    keyset, keyset_params = _keyset(cursor)
+    filters, params = "", [TEXT_SEARCH_CONFIG, query, user_id, user_id]
+    if community_id is not None:
+        filters += " AND c.community_id = %s"
+        params.append(community_id)
+    if channel_id is not None:
+        filters += " AND cm.channel_id = %s"
+        params.append(channel_id)
+    cur.execute(
+        f"""
+        WITH q AS (SELECT websearch_to_tsquery(%s::regconfig, %s) AS query),
+        ranked AS (
+            SELECT cm.message_id, cm.channel_id, c.name AS channel_name, c.community_id,
+                   cm.user_id, cm.content, cm.created_at,
+                   ts_rank(cm.search_vector, q.query)::float8 AS rank
+            FROM q
+            JOIN channel_messages cm ON cm.search_vector @@ q.query
+            JOIN channels c ON c.channel_id = cm.channel_id AND c.is_active = true
+            JOIN community_members mem
+                 ON mem.community_id = c.community_id AND mem.user_id = %s AND mem.status = 'active'
+            LEFT JOIN channel_members chm
+                 ON chm.channel_id = c.channel_id AND chm.user_id = %s
+            WHERE cm.is_deleted = false
+              AND (c.is_private = false OR chm.user_id IS NOT NULL)
+              {filters}
+        ),
+        page AS (
+            SELECT * FROM ranked
+            {keyset}
+            ORDER BY rank DESC, message_id DESC
+            LIMIT %s
+        )
+        SELECT page.message_id, page.channel_id, page.channel_name, page.community_id,
+               page.user_id, u.username, page.created_at, page.rank,
+               ts_headline(%s::regconfig, page.content, q.query, %s) AS snippet
+        FROM page
+        CROSS JOIN q
+        JOIN users u ON u.user_id = page.user_id
+        ORDER BY page.rank DESC, page.message_id DESC
+        """,
+        params + keyset_params + [limit + 1, TEXT_SEARCH_CONFIG, _HEADLINE_OPTIONS],
+    )
+    return _page(_rows(cur), limit)
+
+
+def search_direct_messages(cur, user_id, query, partner_id=None, cursor=None, limit=20):
+    """
+    Search the user's direct messages, optionally within one conversation.
+
+    Same result shape as search_channel_messages, with sender_id,
+    partner_id and partner_username instead of channel fields.
+    Raises ValueError for a malformed cursor.
+    """
+    keyset, keyset_params = _keyset(cursor)
+    filters, params = "", [TEXT_SEARCH_CONFIG, query, user_id, user_id, user_id]
+    if partner_id is not None:
+        filters = "AND LEAST(m.sender_id, m.receiver_id) = %s AND GREATEST(m.sender_id, m.receiver_id) = %s"
+        params += [min(user_id, partner_id), max(user_id, partner_id)]
+    cur.execute(
+        f"""
+        WITH q AS (SELECT websearch_to_tsquery(%s::regconfig, %s) AS query),
+        ranked AS (
+            SELECT m.message_id, m.sender_id,
+                   CASE WHEN m.sender_id = %s THEN m.receiver_id ELSE m.sender_id END AS partner_id,
+                   m.content, m.created_at,
+                   ts_rank(m.search_vector, q.query)::float8 AS rank
+            FROM q
+            JOIN messages m ON m.search_vector @@ q.query
+            WHERE (m.sender_id = %s OR m.receiver_id = %s)
+              {filters}
+        ),
+        page AS (
+            SELECT * FROM ranked
+            {keyset}
+            ORDER BY rank DESC, message_id DESC
+            LIMIT %s
+        )
+        SELECT page.message_id, page.sender_id, page.partner_id, u.username AS partner_username,
+               page.created_at, page.rank,
+               ts_headline(%s::regconfig, page.content, q.query, %s) AS snippet
+        FROM page
+        CROSS JOIN q
+        JOIN users u ON u.user_id = page.partner_id
+        ORDER BY page.rank DESC, page.message_id DESC
+        """,
+        params + keyset_params + [limit + 1, TEXT_SEARCH_CONFIG, _HEADLINE_OPTIONS],
+    )
+    return _page(_rows(cur), limit)
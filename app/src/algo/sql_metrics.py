@@ -0,0 +1,197 @@
+"""
+Per-request SQL instrumentation.
+
+Every connection handed out by algo.db is created with InstrumentedConnection,
+so all cursors (plain or RealDictCursor) record how many statements ran, how
+long they took and which distinct statement shapes ("fingerprints") were
+seen. At the end of the request the totals are emitted as a Server-Timing
+header and a structured log line; a fingerprint repeated in one request is
+reported as a likely N+1 query.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import psycopg2.extensions
+from flask import g, has_app_context, request
+
+logger = logging.getLogger(__name__)
+
+# Settings, overridable through app.config or environment variables. init_app()
+# reads them, so values from .env (loaded by algo.db) are seen.
+DEFAULTS = {
+    "SQL_INSTRUMENTATION": True,  # false disables the cursor wrappers entirely
+    "SQL_N_PLUS_ONE_THRESHOLD": 3,  # executions of one fingerprint in a request before it is flagged
+}
+
+ENABLED = DEFAULTS["SQL_INSTRUMENTATION"]
+N_PLUS_ONE_THRESHOLD = DEFAULTS["SQL_N_PLUS_ONE_THRESHOLD"]
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:\?\s*,\s*)+\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Reduce a statement to its shape: literals become ?, whitespace collapses."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = str(sql).replace("%s", "?")
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(?)", sql)
+    return _WHITESPACE.sub(" ", sql).strip().lower()
+
+
+def fingerprint(sql):
+    """Short stable identifier for a normalized statement."""
+    return hashlib.md5(normalize_sql(sql).encode("utf-8")).hexdigest()[:12]
+
+
+class QueryStats:
+    """Accumulates query counts and timings for a single request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = {}  # fingerprint -> [count, total seconds, sample sql]
+
+    def record(self, sql, elapsed):
+        self.count += 1
+        self.duration += elapsed
+        key = fingerprint(sql)
+        entry = self.fingerprints.get(key)
+        if entry is None:
+            sample = sql.decode("utf-8", "replace") if isinstance(sql, bytes) else str(sql)
+            self.fingerprints[key] = [1, elapsed, _WHITESPACE.sub(" ", sample).strip()[:200]]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+    @property
+    def distinct(self):
+        return len(self.fingerprints)
+
+    def repeated(self, threshold=None):
+        """Fingerprints executed at least ``threshold`` times (likely N+1)."""
+        threshold = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return [
+            {"fingerprint": key, "count": count, "ms": round(total * 1000, 2), "sql": sample}
+            for key, (count, total, sample) in self.fingerprints.items()
+            if count >= threshold
+        ]
+
+    def server_timing(self):
+        return 'db;dur=%.2f;desc="%d queries, %d distinct"' % (
+            self.duration * 1000, self.count, self.distinct
+        )
+
+
+def _current_stats():
+    if not has_app_context():
+        return None
+    stats = g.get("sql_stats")
+    if stats is None:
+        stats = g.sql_stats = QueryStats()
+    return stats
+
+
+class _TimedCursorMixin:
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            stats = _current_stats()
+            if stats is not None:
+                stats.record(query, time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            stats = _current_stats()
+            if stats is not None:
+                stats.record(query, time.perf_counter() - start)
+
+
+_instrumented_factories = {}
+
+
+def instrumented_cursor_factory(factory):
+    """Return (and cache) a subclass of ``factory`` that records timings."""
+    cls = _instrumented_factories.get(factory)
+    if cls is None:
+        cls = type("Timed" + factory.__name__, (_TimedCursorMixin, factory), {})
+        _instrumented_factories[factory] = cls
+    return cls
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection whose cursors report to the request's QueryStats."""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = instrumented_cursor_factory(factory)
+        return super().cursor(*args, **kwargs)
+
+
+def emit_request_stats(response):
+    """after_request hook: attach Server-Timing and log the request's totals."""
+    stats = g.pop("sql_stats", None)
+    if stats is None or not stats.count:
+        return response
+
+    existing = response.headers.get("Server-Timing")
+    timing = stats.server_timing()
+    response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+
+    repeated = stats.repeated()
+    record = {
+        "event": "sql_request_stats",
+        "method": request.method,
+        "endpoint": request.endpoint,
+        "path": request.path,
+        "status": response.status_code,
+        "queries": stats.count,
+        "distinct": stats.distinct,
+        "db_ms": round(stats.duration * 1000, 2),
+        "n_plus_one": repeated,
+    }
+    if repeated:
+        logger.warning(json.dumps(record))
+    else:
+        logger.info(json.dumps(record))
+    return response
+
+
+def _setting(name, config=None):
+    """Read a setting from app config, then env, then the default."""
+    default = DEFAULTS[name]
+    value = None
+    if config is not None:
+        value = config.get(name)
+    if value is None:
+        value = os.getenv(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return str(value).lower() in ["true", "1", "t"]
+    return type(default)(value)
+
+
+def init_app(app):
+    """
+    Read the settings and register the per-request reporting hook. Runs before
+    algo.db.init_app() so the pool's connections follow SQL_INSTRUMENTATION.
+    """
+    global ENABLED, N_PLUS_ONE_THRESHOLD
+    ENABLED = _setting("SQL_INSTRUMENTATION", app.config)
+    N_PLUS_ONE_THRESHOLD = _setting("SQL_N_PLUS_ONE_THRESHOLD", app.config)
+    if ENABLED:
+        app.after_request(emit_request_stats)
@@ -0,0 +1,153 @@
+"""
+Write-behind buffer for high-frequency, coalescable writes.
+
+Request handlers add() keyed operations and return immediately. Operations
+on the same key are merged while they wait, so a burst of writes becomes one
+net change per key. A background thread in each worker process hands the
+pending batch to a flush callable every ``interval`` seconds, or sooner once
+``max_keys`` keys are waiting. Pending writes live in process memory until
+they are flushed; shutdown() flushes whatever is left at exit.
+
+A failed flush (e.g. PoolTimeout under load) puts its batch back, merged
+with anything queued since, and the flusher backs off exponentially before
+trying again. A key is only dropped after ``max_retries`` failed flushes.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Args:
+        flush: Callable taking {key: value} and writing it in one batch
+        merge: Callable (pending, new) -> merged value, or None when the two
+               cancel out and the key should be dropped. Defaults to last-write-wins.
+        interval: Seconds between flushes
+        max_keys: Pending keys that trigger an early flush
+        max_retries: Failed flushes a key survives before it is dropped
+        max_backoff: Upper bound in seconds on the wait after a failed flush
+        name: Used for the thread name and log lines
+    """
+
+    def __init__(self, flush, merge=None, interval=0.5, max_keys=1000, max_retries=5, max_backoff=30.0,
+                 name="write-behind"):
+        self._flush = flush
+        self._merge = merge or (lambda pending, new: new)
+        self.interval = interval
+        self.max_keys = max_keys
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.name = name
+        self._pending = {}
+        self._attempts = {}  # key -> failed flushes so far
+        self._failures = 0  # consecutive failed flushes, drives the backoff
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        self._counters = {"added": 0, "coalesced": 0, "flushes": 0, "flushed_keys": 0, "retried_keys": 0, "failed_keys": 0}
+
+    def add(self, key, value=True):
+        """Queue a write. Merges with any pending write for the same key."""
+        self._ensure_started()
+        with self._lock:
+            self._counters["added"] += 1
+            if key in self._pending:
+                self._counters["coalesced"] += 1
+                merged = self._merge(self._pending[key], value)
+                if merged is None:
+                    del self._pending[key]
+                else:
+                    self._pending[key] = merged
+            else:
+                self._pending[key] = value
+            if len(self._pending) >= self.max_keys:
+                self._wake.set()
+
+    def flush(self):
+        """
+        Write out everything pending now. Returns the number of keys flushed;
+        on failure the batch is requeued and 0 is returned.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self._flush(batch)
+            except Exception as e:
+                self._requeue(batch)
+                logger.error(f"❌ {self.name} flush of {len(batch)} keys failed, will retry: {e}")
+                return 0
+            with self._lock:
+                for key in batch:
+                    self._attempts.pop(key, None)
+                self._failures = 0
+                self._retry_at = 0.0
+                self._counters["flushes"] += 1
+                self._counters["flushed_keys"] += len(batch)
+            return len(batch)
+
+    def _requeue(self, batch):
+        """Put a failed batch back under newer pending writes and schedule a retry."""
+        with self._lock:
+            self._failures += 1
+            self._retry_at = time.monotonic() + min(self.interval * 2 ** self._failures, self.max_backoff)
+            for key, value in batch.items():
+                attempts = self._attempts.get(key, 0) + 1
+                if attempts > self.max_retries:
+                    self._attempts.pop(key, None)
+                    self._counters["failed_keys"] += 1
+                    logger.error(f"❌ {self.name} dropping {key!r} after {self.max_retries} failed flushes")
+                    continue
+                self._attempts[key] = attempts
+                self._counters["retried_keys"] += 1
+                if key in self._pending:
+                    # The failed value is older than whatever was queued since
+                    merged = self._merge(value, self._pending[key])
+                    if merged is None:
+                        del self._pending[key]
+                        self._attempts.pop(key, None)
+                    else:
+                        self._pending[key] = merged
+                else:
+                    self._pending[key] = value
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters["pending"] = len(self._pending)
+        return counters
+
+    def shutdown(self):
+        self.flush()
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so (re)start the flusher in each worker
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+            self._pid = os.getpid()
+            atexit.register(self.shutdown)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if time.monotonic() < self._retry_at:
+                continue  # backing off after a failed flush
+            started = time.monotonic()
+            flushed = self.flush()
+            if flushed:
+                logger.debug(f"{self.name} flushed {flushed} keys in {time.monotonic() - started:.3f}s")
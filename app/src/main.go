@@ -158,6 +158,9 @@ type Hub struct {
 	Register   chan *Client
 	Unregister chan *Client
 
+	// Broadcast API batches, delivered one at a time in arrival order
+	BroadcastQueue chan []WSMessage
+
 	// Database connection
 	DB *sql.DB
 
@@ -213,10 +216,32 @@ func NewHub(db *sql.DB) *Hub {
 		Register:      make(chan *Client),
 		Unregister:    make(chan *Client),
 		Broadcast:     make(chan WSMessage, 100), // Buffered channel to prevent blocking
-		DB:            db,
+		// Full queue blocks the broadcast API, which backs the relay off
+		BroadcastQueue: make(chan []WSMessage, 256),
+		DB:             db,
+	}
+}
+
+// Single worker for broadcast API batches. The outbox relay posts batches
+// in order, so broadcasting them one after another keeps per-channel order.
+func (h *Hub) runBroadcastQueue() {
+	for wsMessages := range h.BroadcastQueue {
+		h.broadcastBatch(wsMessages)
 	}
 }
 
+func (h *Hub) broadcastBatch(wsMessages []WSMessage) {
+	defer func() {
+		if r := recover(); r != nil {
+			log.Printf("❌ Panic in broadcast worker: %v", r)
+		}
+	}()
+	for _, wsMessage := range wsMessages {
+		h.broadcastToChannel(wsMessage)
+	}
+	log.Printf("✅ Broadcasted %d event(s)", len(wsMessages))
+}
+
 // Main Hub loop - handles all WebSocket events
 func (h *Hub) Run() {
 	for {
@@ -858,6 +883,7 @@ func main() {
 	// Initialize Hub
 	hub = NewHub(db)
 	go hub.Run()
+	go hub.runBroadcastQueue()
 
 	// Initialize OAuth handler
 	oauth := NewGoogleOAuth(db)
@@ -933,6 +959,13 @@ func main() {
 	log.Fatal(http.ListenAndServe(fmt.Sprintf("%s:%d", host, port), nil))
 }
 
+// broadcastRequest is a single event pushed by the Python app
+type broadcastRequest struct {
+	Type      string      `json:"type"`
+	ChannelID interface{} `json:"channel_id"`
+	Message   interface{} `json:"message"`
+}
+
 // Handle broadcast API requests from Python
 func handleBroadcastAPI(hub *Hub, w http.ResponseWriter, r *http.Request) {
 	// Enable CORS
@@ -950,81 +983,61 @@ func handleBroadcastAPI(hub *Hub, w http.ResponseWriter, r *http.Request) {
 		return
 	}
 
-	// Parse the broadcast request
-	var broadcastReq struct {
-		Type      string      `json:"type"`
-		ChannelID interface{} `json:"channel_id"`
-		Message   interface{} `json:"message"`
+	// Parse the broadcast request. Python sends either a single event or,
+	// when its queue backs up, {"type": "batch", "events": [...]}
+	var envelope struct {
+		broadcastRequest
+		Events []broadcastRequest `json:"events"`
 	}
 
-	if err := json.NewDecoder(r.Body).Decode(&broadcastReq); err != nil {
+	if err := json.NewDecoder(r.Body).Decode(&envelope); err != nil {
 		log.Printf("❌ Failed to decode broadcast request: %v", err)
 		w.WriteHeader(http.StatusBadRequest)
 		return
 	}
 
-	log.Printf("📡 Received broadcast request: type=%s, channel_id=%v", broadcastReq.Type, broadcastReq.ChannelID)
+	requests := []broadcastRequest{envelope.broadcastRequest}
+	if envelope.Type == "batch" {
+		requests = envelope.Events
+	}
 
-	// Extract user info from the message data
-	var userID int
-	if msgData, ok := broadcastReq.Message.(map[string]interface{}); ok {
-		log.Printf("🔍 Message data: %+v", msgData)
-		if uid, exists := msgData["user_id"]; exists {
-			log.Printf("🔍 Found user_id: %v (type: %T)", uid, uid)
-			if uidFloat, ok := uid.(float64); ok {
-				userID = int(uidFloat)
-				log.Printf("✅ Extracted userID: %d", userID)
-			} else {
-				log.Printf("❌ user_id is not float64: %T", uid)
-			}
-		} else {
-			log.Printf("❌ No user_id found in message data")
-		}
-	} else {
-		log.Printf("❌ Message is not map[string]interface{}: %T", broadcastReq.Message)
+	log.Printf("📡 Received broadcast request with %d event(s)", len(requests))
+
+	wsMessages := make([]WSMessage, 0, len(requests))
+	for _, req := range requests {
+		wsMessages = append(wsMessages, buildBroadcastMessage(req))
 	}
 
-	// Extract username from message data
+	// Queue before acknowledging: the broadcast worker takes batches in the
+	// order they arrived, so a later batch can never overtake an earlier one
+	hub.BroadcastQueue <- wsMessages
+
+	w.WriteHeader(http.StatusOK)
+	w.Write([]byte(`{"status": "success"}`))
+}
+
+// Build the WebSocket message for one broadcast event
+func buildBroadcastMessage(req broadcastRequest) WSMessage {
+	// Extract user info from the message data
+	var userID int
 	var username string
-	if msgData, ok := broadcastReq.Message.(map[string]interface{}); ok {
-		if uname, exists := msgData["username"]; exists {
-			log.Printf("🔍 Found username: %v (type: %T)", uname, uname)
-			if unameStr, ok := uname.(string); ok {
-				username = unameStr
-				log.Printf("✅ Extracted username: %s", username)
-			} else {
-				log.Printf("❌ username is not string: %T", uname)
-			}
-		} else {
-			log.Printf("❌ No username found in message data")
+	if msgData, ok := req.Message.(map[string]interface{}); ok {
+		if uidFloat, ok := msgData["user_id"].(float64); ok {
+			userID = int(uidFloat)
 		}
+		if unameStr, ok := msgData["username"].(string); ok {
+			username = unameStr
+		}
+	} else {
+		log.Printf("❌ Message is not map[string]interface{}: %T", req.Message)
 	}
 
-	// Create WebSocket message for broadcasting
-	wsMessage := WSMessage{
-		Type:      MessageType(broadcastReq.Type),
-		ChannelID: broadcastReq.ChannelID,
+	return WSMessage{
+		Type:      MessageType(req.Type),
+		ChannelID: req.ChannelID,
 		UserID:    userID,
 		Username:  username,
-		Data:      broadcastReq.Message,
+		Data:      req.Message,
 		Timestamp: time.Now(),
 	}
-	log.Printf("🔍 Created WSMessage: Type=%s, ChannelID=%v, UserID=%d", wsMessage.Type, wsMessage.ChannelID, wsMessage.UserID)
-
-	// Respond to Python immediately (don't block)
-	w.WriteHeader(http.StatusOK)
-	w.Write([]byte(`{"status": "success"}`))
-
-	// Broadcast asynchronously to avoid blocking the HTTP response
-	go func() {
-		defer func() {
-			if r := recover(); r != nil {
-				log.Printf("❌ Panic in broadcast goroutine: %v", r)
-			}
-		}()
-		log.Printf("🔄 About to broadcast to channel %v, connected clients: %d", broadcastReq.ChannelID, len(hub.Clients))
-		log.Printf("🚀 Calling hub.broadcastToChannel...")
-		hub.broadcastToChannel(wsMessage)
-		log.Printf("✅ Broadcasted message to channel %v", broadcastReq.ChannelID)
-	}()
 }
@@ -46,13 +46,16 @@ channels.forEach((channel) => {
     }
 
     currentChannelId = channelId;
-    if (socket) {
+    if (socket && socket.connected) {
       console.log(`🚪 Joining channel: ${channelId}`);
       socket.joinChannel(channelId);
+    } else {
+      openChannelStream(channelId);
     }
 
     // Load channel messages (you can implement this)
     loadChannelMessages(channelId);
+    markChannelRead(channel);
   });
 });
 
@@ -105,13 +108,19 @@ function sendMessage() {
     chatMessages.scrollTop = chatMessages.scrollHeight;
     input.value = "";
 
-    // Send message through WebSocket
-    if (socket) {
+    // Send message through WebSocket, or the REST API when streaming over SSE
+    if (socket && socket.connected) {
       console.log(
         `📤 Sending message to channel ${currentChannelId}:`,
         message,
       );
       socket.sendMessage(message, currentChannelId);
+    } else {
+      fetch(`/api/channels/${currentChannelId}/messages`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ content: message }),
+      }).catch((error) => console.error("❌ Failed to send message:", error));
     }
   } else if (!currentChannelId) {
     console.warn("⚠️ No channel selected");
@@ -129,6 +138,7 @@ messageInput.addEventListener("keypress", (e) => {
 if (socket) {
   socket.on("connect", () => {
     console.log("✅ Connected to Go WebSocket server!");
+    closeChannelStream();
     // Join the first channel by default
     const firstChannel = document.querySelector(".channel");
     if (firstChannel) {
@@ -138,6 +148,9 @@ if (socket) {
 
   socket.on("disconnect", () => {
     console.log("❌ Disconnected from WebSocket server");
+    if (currentChannelId) {
+      openChannelStream(currentChannelId);
+    }
   });
 
   socket.on("error", (error: any) => {
@@ -169,6 +182,45 @@ if (socket) {
   });
 }
 
+// Clear the channel's unread badge and advance its read pointer
+function markChannelRead(channel: Element) {
+  channel.querySelector(".channel-unread")?.remove();
+  const channelId = channel.getAttribute("data-channel-id");
+  if (!channelId || !/^\d+$/.test(channelId)) return;
+  fetch(`/api/channels/${channelId}/read`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: "{}",
+  }).catch((error) => console.error("❌ Failed to mark channel read:", error));
+}
+
+// Server-Sent Events fallback for networks where the WebSocket cannot connect.
+// EventSource reconnects on its own and resumes from Last-Event-ID.
+let channelStream: EventSource | null = null;
+
+function openChannelStream(channelId: string) {
+  closeChannelStream();
+  if (!/^\d+$/.test(channelId)) return;
+
+  console.log(`📡 Streaming channel ${channelId} over SSE`);
+  channelStream = new EventSource(`/api/channels/${channelId}/stream`);
+  channelStream.addEventListener("new_message", (event: MessageEvent) => {
+    const message = JSON.parse(event.data);
+    if (String(message.user_id) === String(currentUserId)) return; // shown optimistically
+    displayChannelMessage({ ...message, channel_id: String(message.channel_id) });
+  });
+  channelStream.addEventListener("resync", () => {
+    loadChannelMessages(channelId);
+  });
+}
+
+function closeChannelStream() {
+  if (channelStream) {
+    channelStream.close();
+    channelStream = null;
+  }
+}
+
 // Display incoming channel message
 function displayChannelMessage(data: any) {
   if (data.channel_id !== currentChannelId) return; // Only show messages for current channel
@@ -17,12 +17,13 @@ export function createMessageElement(
     senderUsername?: string;
     senderPfp?: string;
     otherUserPfp?: string;
+    sentAt?: Date;
   },
 ): HTMLElement {
   const messageDiv = document.createElement("div");
   messageDiv.className = `message ${isSent ? "sent" : "received"}`;
 
-  const currentTime = new Date().toLocaleTimeString("en-US", {
+  const currentTime = (options?.sentAt || new Date()).toLocaleTimeString("en-US", {
     hour: "2-digit",
     minute: "2-digit",
   });
@@ -233,6 +233,50 @@ if ((window as any).chatInitialized) {
     // Current conversation tracking
     let currentConversationUserId: number = otherUserId || 0;
 
+    // Older history is fetched page by page as the user scrolls up
+    let historyCursor: string | null = chatData.historyCursor || null;
+    let isLoadingHistory = false;
+
+    async function loadOlderMessages(): Promise<void> {
+      if (!historyCursor || isLoadingHistory || !messagesArea || !otherUserName) {
+        return;
+      }
+      isLoadingHistory = true;
+      try {
+        const response = await fetch(
+          `/api/chat/${encodeURIComponent(otherUserName)}/messages?before=${encodeURIComponent(historyCursor)}`,
+        );
+        if (!response.ok) {
+          throw new Error(`History request failed: ${response.status}`);
+        }
+        const page = await response.json();
+        const previousHeight = messagesArea.scrollHeight;
+        const anchor = messagesArea.querySelector(".message");
+        for (const msg of page.messages) {
+          const element = createMessageElement(msg.content, msg.sender_id === currentUserId, {
+            otherUserPfp: otherUserPfp,
+            sentAt: msg.timestamp ? new Date(msg.timestamp) : undefined,
+          });
+          messagesArea.insertBefore(element, anchor);
+        }
+        // Keep the viewport on the message the user was reading
+        messagesArea.scrollTop += messagesArea.scrollHeight - previousHeight;
+        historyCursor = page.has_older ? page.next_cursor : null;
+      } catch (error) {
+        console.error("Failed to load older messages:", error);
+      } finally {
+        isLoadingHistory = false;
+      }
+    }
+
+    if (messagesArea) {
+      messagesArea.addEventListener("scroll", function () {
+        if (messagesArea.scrollTop < 80) {
+          loadOlderMessages();
+        }
+      });
+    }
+
     // Message tracking for deduplication
     const processedMessages = new Set<string>();
     let lastSentMessageTime = 0;
@@ -286,6 +330,9 @@ if ((window as any).chatInitialized) {
           messagesArea.appendChild(messageElement);
           scrollToBottom(messagesArea);
         }
+        if (!isSent) {
+          scheduleMarkRead(data.message_id);
+        }
 
         // Update conversation list
         const otherId = isSent ? receiverId : senderId;
@@ -302,6 +349,27 @@ if ((window as any).chatInitialized) {
       }
     });
 
+    // Read receipts: one request per burst of incoming messages (the server batches too)
+    let markReadTimer: number | null = null;
+    let pendingReadId: number | null = null;
+    function scheduleMarkRead(messageId?: number): void {
+      if (!otherUserName) return;
+      if (messageId) {
+        pendingReadId = Math.max(pendingReadId || 0, Number(messageId));
+      }
+      if (markReadTimer) return;
+      markReadTimer = window.setTimeout(() => {
+        markReadTimer = null;
+        const body = pendingReadId ? { message_id: pendingReadId } : {};
+        pendingReadId = null;
+        fetch(`/api/chat/${encodeURIComponent(otherUserName)}/read`, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify(body),
+        }).catch((error) => console.error("❌ Failed to mark conversation read:", error));
+      }, 1000);
+    }
+
     // Typing indicators
     socket.on("typing_start", (data: { user_id: number }) => {
       if (String(data.user_id) === String(currentConversationUserId)) {
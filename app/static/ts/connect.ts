@@ -12,11 +12,12 @@ interface Person {
   skills: string[];
   connectionStatus: string;
   connection_id?: number;
-  isRecommended: boolean;
+  reasons: string[];
 }
 
 interface ConnectData {
   people: Person[];
+  nextCursor: string | null;
   universities: string[];
   graduationYears: string[];
   locations: string[];
@@ -37,14 +38,13 @@ document.addEventListener("DOMContentLoaded", function () {
   const windowWithData = window as WindowWithConnectData;
   const connectData: ConnectData = windowWithData.connectData || {
     people: [],
+    nextCursor: null,
     universities: [],
     graduationYears: [],
     locations: [],
   };
-  const allPeople = connectData.people || [];
-
   // Process people data to match expected format
-  const processedPeople: Person[] = allPeople.map((person: any) => ({
+  const toPerson = (person: any): Person => ({
     id: person.id,
     name: person.name,
     title: person.title,
@@ -58,12 +58,14 @@ document.addEventListener("DOMContentLoaded", function () {
     connectionStatus:
       person.connection_status || person.connectionStatus || "none",
     connection_id: person.connection_id || null,
-    isRecommended: Math.random() > 0.7, // Random recommendation for demo
-  }));
+    reasons: person.reasons || [],
+  });
 
-  let currentPeople: Person[] = [...processedPeople];
-  let displayedCount: number = 0;
-  const itemsPerLoad: number = 6;
+  // The server filters and pages the directory; the first page comes with the template
+  let currentPeople: Person[] = (connectData.people || []).map(toPerson);
+  let nextCursor: string | null = connectData.nextCursor || null;
+  let recommendedPeople: Person[] = [];
+  let directoryRequest = 0;
   let searchTimeout: NodeJS.Timeout;
 
   // Generate default avatar function
@@ -235,8 +237,7 @@ document.addEventListener("DOMContentLoaded", function () {
     searchInput.addEventListener("input", function () {
       clearTimeout(searchTimeout);
       searchTimeout = setTimeout(() => {
-        performSearch();
-        showSearchResults();
+        performSearch().then(showSearchResults);
       }, 300); // 300ms debounce
     });
 
@@ -244,8 +245,7 @@ document.addEventListener("DOMContentLoaded", function () {
     searchInput.addEventListener("keypress", function (e) {
       if (e.key === "Enter") {
         clearTimeout(searchTimeout);
-        performSearch();
-        showSearchResults();
+        performSearch().then(showSearchResults);
       }
     });
 
@@ -259,34 +259,48 @@ document.addEventListener("DOMContentLoaded", function () {
     });
   }
 
-  function performSearch(): void {
-    const query = searchInput?.value.toLowerCase().trim() || "";
-
-    if (query) {
-      currentPeople = processedPeople.filter((person) => {
-        // Enhanced multi-field search
-        const searchableFields = [
-          person.name.toLowerCase(),
-          person.company.toLowerCase(),
-          person.title.toLowerCase(),
-          person.university.toLowerCase(),
-          person.location.toLowerCase(),
-          person.role.toLowerCase(),
-          ...person.skills.map((skill) => skill.toLowerCase()),
-        ];
-
-        // Support for multi-word search
-        const searchWords = query.split(" ").filter((word) => word.length > 0);
-
-        return searchWords.every((word) =>
-          searchableFields.some((field) => field.includes(word)),
-        );
-      });
-    } else {
-      currentPeople = [...processedPeople];
+  function directoryParams(): URLSearchParams {
+    const params = new URLSearchParams();
+    const fields: [string, string][] = [
+      ["q", searchInput?.value.trim() || ""],
+      ["university", (document.getElementById("universityFilter") as HTMLSelectElement)?.value || ""],
+      ["graduation_year", (document.getElementById("yearFilter") as HTMLSelectElement)?.value || ""],
+      ["role", (document.getElementById("roleFilter") as HTMLSelectElement)?.value || ""],
+      ["city", (document.getElementById("locationFilter") as HTMLSelectElement)?.value || ""],
+    ];
+    fields.forEach(([name, value]) => {
+      if (value) params.set(name, value);
+    });
+    return params;
+  }
+
+  // Fetch a page from /api/directory; reset starts over with the current filters
+  async function loadDirectory(reset: boolean): Promise<void> {
+    const params = directoryParams();
+    if (!reset && nextCursor) params.set("cursor", nextCursor);
+    const requestId = ++directoryRequest;
+
+    try {
+      const response = await fetch(`/api/directory?${params.toString()}`);
+      const result = await response.json();
+      // A newer search has started; drop this stale page
+      if (requestId !== directoryRequest) return;
+      if (!result.success) {
+        showNotification(result.message || "Failed to load alumni", "error");
+        return;
+      }
+      const people = result.people.map(toPerson);
+      currentPeople = reset ? people : currentPeople.concat(people);
+      nextCursor = result.next_cursor;
+      renderPeople();
+    } catch (error) {
+      console.error("Error loading directory:", error);
+      showNotification("Network error. Please try again.", "error");
     }
-    displayedCount = 0;
-    renderPeople();
+  }
+
+  function performSearch(): Promise<void> {
+    return loadDirectory(true);
   }
 
   // Show search results info
@@ -311,10 +325,11 @@ document.addEventListener("DOMContentLoaded", function () {
     }
 
     const count = currentPeople.length;
+    const more = nextCursor ? "+" : "";
     resultsDiv.innerHTML = `
             <div class="search-results-content">
                 <i class="fas fa-search"></i>
-                <span>Found <strong>${count}</strong> result${count !== 1 ? "s" : ""} for "<em>${escapeHtml(query)}</em>"</span>
+                <span>Found <strong>${count}${more}</strong> result${count !== 1 || more ? "s" : ""} for "<em>${escapeHtml(query)}</em>"</span>
                 <button class="clear-search-btn" onclick="clearSearch()">
                     <i class="fas fa-times"></i> Clear
                 </button>
@@ -357,51 +372,49 @@ document.addEventListener("DOMContentLoaded", function () {
   }
 
   function applyFilters(): void {
-    const university =
-      (document.getElementById("universityFilter") as HTMLSelectElement)
-        ?.value || "";
-    const year =
-      (document.getElementById("yearFilter") as HTMLSelectElement)?.value || "";
-    const role =
-      (document.getElementById("roleFilter") as HTMLSelectElement)?.value || "";
-    const location =
-      (document.getElementById("locationFilter") as HTMLSelectElement)?.value ||
-      "";
-    const searchQuery = searchInput?.value.toLowerCase().trim() || "";
-
-    currentPeople = processedPeople.filter((person) => {
-      const matchesUniversity =
-        !university ||
-        person.university.toLowerCase().includes(university.toLowerCase());
-      const matchesYear = !year || person.graduationYear.toString() === year;
-      const matchesRole =
-        !role || person.role.toLowerCase() === role.toLowerCase();
-      const matchesLocation =
-        !location ||
-        person.location.toLowerCase().includes(location.toLowerCase());
-      const matchesSearch =
-        !searchQuery ||
-        person.name.toLowerCase().includes(searchQuery) ||
-        person.company.toLowerCase().includes(searchQuery) ||
-        person.title.toLowerCase().includes(searchQuery) ||
-        person.skills.some((skill) =>
-          skill.toLowerCase().includes(searchQuery),
-        );
+    loadDirectory(true);
+    refreshFacets();
+    filtersSection.classList.remove("active");
+  }
 
-      return (
-        matchesUniversity &&
-        matchesYear &&
-        matchesRole &&
-        matchesLocation &&
-        matchesSearch
-      );
-    });
+  // Facet name -> filter dropdown; counts come from the server's facet index
+  const facetSelects: Record<string, string> = {
+    university: "universityFilter",
+    graduation_year: "yearFilter",
+    role: "roleFilter",
+    city: "locationFilter",
+  };
 
-    displayedCount = 0;
-    renderPeople();
-    filtersSection.classList.remove("active");
+  async function refreshFacets(): Promise<void> {
+    const params = directoryParams();
+    params.delete("q");
+    try {
+      const response = await fetch(`/api/directory/facets?${params.toString()}`);
+      const result = await response.json();
+      if (!result.success) return;
+      Object.entries(facetSelects).forEach(([facet, selectId]) => {
+        const select = document.getElementById(selectId) as HTMLSelectElement;
+        if (!select) return;
+        const current = select.value;
+        const allOption = select.options[0];
+        select.innerHTML = "";
+        select.appendChild(allOption);
+        result.facets[facet].forEach((item: { value: string | number; count: number }) => {
+          const value = String(item.value);
+          const label = facet === "role" ? value.charAt(0).toUpperCase() + value.slice(1) : value;
+          select.appendChild(new Option(`${label} (${item.count})`, value));
+        });
+        select.value = current;
+      });
+    } catch (error) {
+      console.error("Error loading filter counts:", error);
+    }
   }
 
+  Object.values(facetSelects).forEach((selectId) => {
+    document.getElementById(selectId)?.addEventListener("change", refreshFacets);
+  });
+
   // Modal functionality
   const connectionModal = document.getElementById("connectionModal");
   const profileModal = document.getElementById("profileModal");
@@ -521,7 +534,9 @@ document.addEventListener("DOMContentLoaded", function () {
 
           if (result.success) {
             // Update person's connection status
-            selectedPerson.connectionStatus = "pending";
+            findPeople(selectedPerson.id).forEach((person) => {
+              person.connectionStatus = "pending";
+            });
 
             // Show success message
             showNotification(result.message, "success");
@@ -545,6 +560,24 @@ document.addEventListener("DOMContentLoaded", function () {
     });
   }
 
+  // Ranked by the server's recommendation model
+  async function loadRecommendations(): Promise<void> {
+    try {
+      const response = await fetch("/api/recommendations?limit=6");
+      const result = await response.json();
+      if (!result.success) return;
+      recommendedPeople = result.people.map(toPerson);
+      renderPeople();
+    } catch (error) {
+      console.error("Error loading recommendations:", error);
+    }
+  }
+
+  // The same person can be in both the recommended and the directory lists
+  function findPeople(personId: number): Person[] {
+    return [...recommendedPeople, ...currentPeople].filter((p) => p.id === personId);
+  }
+
   // Render people function
   function renderPeople() {
     const recommendedContainer = document.getElementById("recommendedPeople");
@@ -554,30 +587,20 @@ document.addEventListener("DOMContentLoaded", function () {
     recommendedContainer.innerHTML = "";
     allPeopleContainer.innerHTML = "";
 
-    // Separate recommended and all people
-    const recommendedPeople = currentPeople.filter(
-      (person) => person.isRecommended,
-    );
-    const allPeople = currentPeople.filter((person) => !person.isRecommended);
-
     // Render recommended people
     recommendedPeople.forEach((person) => {
       recommendedContainer.appendChild(createPersonCard(person));
     });
 
-    // Render all people (with pagination)
-    const peopleToShow = allPeople.slice(0, displayedCount + itemsPerLoad);
-    peopleToShow.forEach((person) => {
+    // Render all loaded people; further pages are fetched on demand
+    currentPeople.forEach((person) => {
       allPeopleContainer.appendChild(createPersonCard(person));
     });
 
-    displayedCount = peopleToShow.length;
-
     // Show/hide load more button
     const loadMoreBtn = document.getElementById("loadMoreBtn");
     if (loadMoreBtn) {
-      loadMoreBtn.style.display =
-        displayedCount < allPeople.length ? "inline-block" : "none";
+      loadMoreBtn.style.display = nextCursor ? "inline-block" : "none";
     }
   }
 
@@ -636,6 +659,14 @@ document.addEventListener("DOMContentLoaded", function () {
                     <i class="fas fa-briefcase"></i>
                     <span>${person.industry}</span>
                 </div>
+                ${
+                  person.reasons.length
+                    ? `<div class="detail-item">
+                    <i class="fas fa-lightbulb"></i>
+                    <span>${person.reasons.join(" · ")}</span>
+                </div>`
+                    : ""
+                }
             </div>
             <div class="person-skills">
                 <div class="skills-container">
@@ -654,7 +685,7 @@ document.addEventListener("DOMContentLoaded", function () {
   (window as WindowWithConnectData).connectWithPerson = function (
     personId: number,
   ): void {
-    const person = currentPeople.find((p) => p.id === personId);
+    const person = findPeople(personId)[0];
     if (person) {
       openConnectionModal(person);
     }
@@ -663,7 +694,7 @@ document.addEventListener("DOMContentLoaded", function () {
   (window as WindowWithConnectData).viewProfile = function (
     personId: number,
   ): void {
-    const person = currentPeople.find((p) => p.id === personId);
+    const person = findPeople(personId)[0];
     if (person) {
       openProfileModal(person);
     }
@@ -688,10 +719,9 @@ document.addEventListener("DOMContentLoaded", function () {
 
       if (result.success) {
         // Update person's connection status
-        const person = currentPeople.find((p) => p.id === personId);
-        if (person) {
+        findPeople(personId).forEach((person) => {
           person.connectionStatus = "connected";
-        }
+        });
 
         showNotification("Connection request accepted!", "success");
         renderPeople();
@@ -726,10 +756,9 @@ document.addEventListener("DOMContentLoaded", function () {
 
       if (result.success) {
         // Update person's connection status
-        const person = currentPeople.find((p) => p.id === personId);
-        if (person) {
+        findPeople(personId).forEach((person) => {
           person.connectionStatus = "none";
-        }
+        });
 
         showNotification("Connection request declined", "info");
         renderPeople();
@@ -749,7 +778,7 @@ document.addEventListener("DOMContentLoaded", function () {
   const loadMoreBtn = document.getElementById("loadMoreBtn");
   if (loadMoreBtn) {
     loadMoreBtn.addEventListener("click", function () {
-      renderPeople();
+      loadDirectory(false);
     });
   }
 
@@ -833,4 +862,6 @@ document.addEventListener("DOMContentLoaded", function () {
 
   // Initial render
   renderPeople();
+  refreshFacets();
+  loadRecommendations();
 });
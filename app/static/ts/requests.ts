@@ -19,11 +19,20 @@ interface Connection {
   connected_at: string;
 }
 
+type RequestList = "received" | "sent" | "accepted";
+
+interface RequestCounts {
+  received: number;
+  sent: number;
+  accepted: number;
+}
+
 interface RequestsData {
   pendingRequests: ConnectionRequest[];
   sentRequests: ConnectionRequest[];
   connections: Connection[];
   connectionsCount: number;
+  cursors: Record<RequestList, string | null>;
 }
 
 // Prevent multiple initializations
@@ -41,6 +50,17 @@ if ((window as any).requestsInitialized) {
       sentRequests: [],
       connections: [],
       connectionsCount: 0,
+      cursors: { received: null, sent: null, accepted: null },
+    };
+
+    // Only the first slice of each list is rendered; the rest is paged in by cursor
+    const cursors: Record<RequestList, string | null> = {
+      ...requestsData.cursors,
+    };
+    const listGrids: Record<RequestList, string> = {
+      received: "incomingRequests",
+      sent: "sentRequests",
+      accepted: "myConnections",
     };
 
     console.log("Requests data:", requestsData);
@@ -140,6 +160,18 @@ if ((window as any).requestsInitialized) {
       await handleCancelRequest(connectionId);
     };
 
+    (window as any).respondToAll = async function (
+      action: "accept" | "reject",
+    ): Promise<void> {
+      await handleBulkResponse(action);
+    };
+
+    (window as any).loadMore = async function (
+      list: RequestList,
+    ): Promise<void> {
+      await loadMoreItems(list);
+    };
+
     (window as any).viewProfile = function (username: string): void {
       window.location.href = `/profile/${username}`;
     };
@@ -179,7 +211,7 @@ if ((window as any).requestsInitialized) {
           }
 
           // Update counters
-          updateCounters();
+          refreshCounters();
 
           // Show success message
           const message =
@@ -208,6 +240,72 @@ if ((window as any).requestsInitialized) {
       }
     }
 
+    // Accept or decline every request card currently shown, in one call
+    async function handleBulkResponse(
+      action: "accept" | "reject",
+    ): Promise<void> {
+      const cards = Array.from(
+        document.querySelectorAll<HTMLElement>(
+          "#incomingRequests .request-card[data-request-id]",
+        ),
+      );
+      const connectionIds = cards.map((card) => Number(card.dataset.requestId));
+      if (connectionIds.length === 0) return;
+      try {
+        showLoading(true);
+
+        const response = await fetch("/api/connection_requests/respond", {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify({
+            connection_ids: connectionIds,
+            action: action,
+          }),
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+          result.results.forEach(
+            (item: { connection_id: number; success: boolean }) => {
+              if (!item.success) return;
+              const requestCard = document.querySelector(
+                `#incomingRequests [data-request-id="${item.connection_id}"]`,
+              );
+              if (requestCard) requestCard.remove();
+            },
+          );
+          refreshCounters();
+
+          const verb = action === "accept" ? "accepted" : "declined";
+          showNotification(
+            result.failed
+              ? `${result.succeeded} requests ${verb}, ${result.failed} no longer pending`
+              : `${result.succeeded} requests ${verb}`,
+            result.failed ? "warning" : "success",
+          );
+
+          if (action === "accept" && result.succeeded) {
+            setTimeout(() => {
+              window.location.reload();
+            }, 1500);
+          }
+        } else {
+          showNotification(
+            result.message || `Failed to ${action} requests`,
+            "error",
+          );
+        }
+      } catch (error) {
+        console.error(`Error bulk ${action}ing requests:`, error);
+        showNotification("Network error. Please try again.", "error");
+      } finally {
+        showLoading(false);
+      }
+    }
+
     // Handle cancel sent request
     async function handleCancelRequest(connectionId: number): Promise<void> {
       try {
@@ -235,7 +333,7 @@ if ((window as any).requestsInitialized) {
           }
 
           // Update counters
-          updateCounters();
+          refreshCounters();
 
           showNotification("Connection request cancelled", "info");
         } else {
@@ -252,37 +350,158 @@ if ((window as any).requestsInitialized) {
       }
     }
 
-    // Update counters after actions
-    function updateCounters(): void {
-      const incomingCards = document.querySelectorAll(
-        "#incomingRequests .request-card",
-      ).length;
-      const sentCards = document.querySelectorAll(
-        "#sentRequests .request-card",
-      ).length;
-      const connectionCards = document.querySelectorAll(
-        "#myConnections .request-card",
-      ).length;
-
-      // Update badges
-      const incomingBadge = document.getElementById("incomingBadge");
-      const sentBadge = document.getElementById("sentBadge");
-      const connectionsBadge = document.getElementById("connectionsBadge");
-
-      if (incomingBadge) incomingBadge.textContent = incomingCards.toString();
-      if (sentBadge) sentBadge.textContent = sentCards.toString();
-      if (connectionsBadge)
-        connectionsBadge.textContent = connectionCards.toString();
-
-      // Update stat cards
-      const pendingCount = document.getElementById("pendingCount");
-      const sentCount = document.getElementById("sentCount");
-      const connectionsCount = document.getElementById("connectionsCount");
-
-      if (pendingCount) pendingCount.textContent = incomingCards.toString();
-      if (sentCount) sentCount.textContent = sentCards.toString();
-      if (connectionsCount)
-        connectionsCount.textContent = connectionCards.toString();
+    // Append the next page of a list
+    async function loadMoreItems(list: RequestList): Promise<void> {
+      const cursor = cursors[list];
+      const grid = document.getElementById(listGrids[list]);
+      if (!cursor || !grid) return;
+      try {
+        const params = new URLSearchParams({ type: list, cursor });
+        const response = await fetch(`/api/connection_requests?${params}`);
+        const result = await response.json();
+        if (!result.success) {
+          showNotification(result.message || "Failed to load more", "error");
+          return;
+        }
+        result.items.forEach((item: ConnectionRequest & Connection) => {
+          grid.appendChild(
+            list === "accepted"
+              ? renderConnectionCard(item)
+              : renderRequestCard(item, list),
+          );
+        });
+        cursors[list] = result.next_cursor;
+        const loadMoreButton = document.getElementById(`${list}LoadMore`);
+        if (loadMoreButton) loadMoreButton.hidden = !result.next_cursor;
+        setCounters(result.counts);
+        initializeProfilePictures();
+      } catch (error) {
+        console.error("Error loading more:", error);
+        showNotification("Network error. Please try again.", "error");
+      }
+    }
+
+    function avatarHtml(name: string, avatar?: string): string {
+      const image = avatar
+        ? `<img src="${escapeHtml(avatar)}" alt="${escapeHtml(name)}" />`
+        : "";
+      return `<div class="user-avatar">${image}<div class="avatar-fallback">${escapeHtml(
+        name.slice(0, 2).toUpperCase(),
+      )}</div></div>`;
+    }
+
+    function bindButton(
+      card: HTMLElement,
+      selector: string,
+      handler: () => void,
+    ): void {
+      const button = card.querySelector<HTMLButtonElement>(selector);
+      if (button) button.addEventListener("click", handler);
+    }
+
+    // Same markup as the server-rendered request cards in requests.html
+    function renderRequestCard(
+      request: ConnectionRequest,
+      list: "received" | "sent",
+    ): HTMLElement {
+      const card = document.createElement("div");
+      card.className =
+        list === "sent" ? "request-card sent-request" : "request-card";
+      card.dataset.requestId = String(request.connection_id);
+      const message = request.message
+        ? `<div class="request-message"><p>"${escapeHtml(request.message)}"</p></div>`
+        : "";
+      const actions =
+        list === "sent"
+          ? `<button class="btn btn-cancel"><i class="fas fa-times"></i> Cancel Request</button>`
+          : `<button class="btn btn-accept"><i class="fas fa-check"></i> Accept</button>
+             <button class="btn btn-decline"><i class="fas fa-times"></i> Decline</button>`;
+      card.innerHTML = `
+        <div class="request-header">
+          ${avatarHtml(request.name, request.avatar)}
+          <div class="user-info">
+            <h3>${escapeHtml(request.name)}</h3>
+            <p class="username">@${escapeHtml(request.username)}</p>
+            <p class="time">${list === "sent" ? "Sent " : ""}${escapeHtml(request.created_at)}</p>
+          </div>
+          ${list === "sent" ? '<div class="status-badge pending"><i class="fas fa-clock"></i> Pending</div>' : ""}
+        </div>
+        ${message}
+        <div class="request-actions">
+          ${actions}
+          <button class="btn btn-view"><i class="fas fa-eye"></i> View Profile</button>
+        </div>`;
+      bindButton(card, ".btn-accept", () =>
+        handleConnectionResponse(request.connection_id, "accept"),
+      );
+      bindButton(card, ".btn-decline", () =>
+        handleConnectionResponse(request.connection_id, "reject"),
+      );
+      bindButton(card, ".btn-cancel", () =>
+        handleCancelRequest(request.connection_id),
+      );
+      bindButton(card, ".btn-view", () =>
+        (window as any).viewProfile(request.username),
+      );
+      return card;
+    }
+
+    // Same markup as the server-rendered connection cards in requests.html
+    function renderConnectionCard(connection: Connection): HTMLElement {
+      const card = document.createElement("div");
+      card.className = "request-card connection-card";
+      card.dataset.userId = String(connection.user_id);
+      card.innerHTML = `
+        <div class="request-header">
+          ${avatarHtml(connection.name, connection.avatar)}
+          <div class="user-info">
+            <h3>${escapeHtml(connection.name)}</h3>
+            <p class="username">@${escapeHtml(connection.username)}</p>
+            <p class="time">Connected ${escapeHtml(connection.connected_at)}</p>
+          </div>
+          <div class="status-badge connected">
+            <i class="fas fa-check-circle"></i> Connected
+          </div>
+        </div>
+        <div class="request-actions">
+          <button class="btn btn-message"><i class="fas fa-comment"></i> Message</button>
+          <button class="btn btn-view"><i class="fas fa-eye"></i> View Profile</button>
+        </div>`;
+      bindButton(card, ".btn-message", () =>
+        (window as any).startChat(connection.username),
+      );
+      bindButton(card, ".btn-view", () =>
+        (window as any).viewProfile(connection.username),
+      );
+      return card;
+    }
+
+    // Lists are paged, so counts come from the server rather than the DOM
+    async function refreshCounters(): Promise<void> {
+      try {
+        const response = await fetch(
+          "/api/connection_requests?type=received&limit=1",
+        );
+        const result = await response.json();
+        if (result.success) setCounters(result.counts);
+      } catch (error) {
+        console.error("Error refreshing counters:", error);
+      }
+    }
+
+    function setCounters(counts: RequestCounts): void {
+      const targets: [string, number][] = [
+        ["incomingBadge", counts.received],
+        ["sentBadge", counts.sent],
+        ["connectionsBadge", counts.accepted],
+        ["pendingCount", counts.received],
+        ["sentCount", counts.sent],
+        ["connectionsCount", counts.accepted],
+      ];
+      targets.forEach(([id, value]) => {
+        const element = document.getElementById(id);
+        if (element) element.textContent = value.toString();
+      });
     }
 
     // Show/hide loading overlay
@@ -367,4 +586,4 @@ if ((window as any).requestsInitialized) {
 }
 
 // Export types for potential external use
-export { ConnectionRequest, Connection, RequestsData };
+export { ConnectionRequest, Connection, RequestsData, RequestCounts, RequestList };
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: score one user against a synthetic population.
+
+Builds a FeatureMatrix shaped like production data (no database needed)
+and times recommendations.top_matches for random users.
+
+    python scripts/bench_recommendations.py --users 100000 --runs 200
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.recommendations import FeatureMatrix, top_matches
+
+
+def synthetic_population(n, interests=25, seed=7):
+    rng = random.Random(seed)
+    universities = [f"University {i}" for i in range(200)]
+    cities = [f"City {i}" for i in range(500)]
+    employers = [f"company {i}" for i in range(5000)]
+    users, pairs = [], []
+    for user_id in range(1, n + 1):
+        users.append((
+            user_id,
+            "verified",
+            rng.choice(("student", "alumni", "alumni", "staff")),
+            rng.choice(universities),
+            rng.choice(cities) if rng.random() < 0.9 else None,
+            rng.randint(1990, 2028),
+            rng.choice(employers) if rng.random() < 0.6 else None,
+        ))
+        pairs.extend((user_id, i) for i in rng.sample(range(1, interests + 1), rng.randint(0, 6)))
+    return users, pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--mode", choices=("peers", "mentors"), default="peers")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    users, pairs = synthetic_population(args.users)
+    features = FeatureMatrix(users, pairs)
+    print(f"Built features for {len(features):,} users in {time.perf_counter() - started:.2f}s")
+
+    rng = random.Random(1)
+    timings = []
+    for _ in range(args.runs):
+        row = rng.randrange(len(features))
+        started = time.perf_counter()
+        top_matches(features, row, args.mode)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    print(f"{args.runs} {args.mode} scorings over {len(features):,} users:")
+    print(f"  median {statistics.median(timings):.2f} ms")
+    print(f"  p95    {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+    print(f"  max    {timings[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,10 @@ cleanup() {
         kill $PYTHON_PID 2>/dev/null
         echo "✅ Python Flask server stopped"
     fi
+    if [ ! -z "$RELAY_PID" ]; then
+        kill $RELAY_PID 2>/dev/null
+        echo "✅ Outbox relay stopped"
+    fi
     echo "👋 All servers stopped"
     exit 0
 }
@@ -86,6 +90,10 @@ else
     echo "📥 macOS: brew install python3"
     exit 1
 fi
+
+# Start the outbox relay that forwards channel events to the Go server
+flask --app run.py outbox-relay &
+RELAY_PID=$!
 cd ../..
 
 echo ""
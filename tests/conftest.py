@@ -0,0 +1,64 @@
+import os
+import sys
+from collections import namedtuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+Notify = namedtuple("Notify", "pid channel payload")
+
+
+class FakeCursor:
+    """
+    Records every execute() and serves one queued result set per call.
+
+    Each result set is a list of rows; once the queue runs out, execute()
+    serves an empty one. fetchone() returns the first row of the current set.
+    """
+
+    def __init__(self, *results, description=None):
+        self.results = list(results)
+        self.description = description
+        self.executed = []
+        self.rows = []
+
+    @property
+    def sql(self):
+        return self.executed[-1][0] if self.executed else None
+
+    @property
+    def params(self):
+        return self.executed[-1][1] if self.executed else None
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        self.rows = self.results.pop(0) if self.results else []
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Hands out the same cursor every time, so a test can inspect what ran."""
+
+    def __init__(self, cursor=None):
+        self._cursor = cursor or FakeCursor()
+
+    def cursor(self, *args, **kwargs):
+        return self._cursor
+
+
+class FakeListener(FakeConnection):
+    """A dedicated LISTEN connection; tests append Notify tuples to notifies."""
+
+    def __init__(self):
+        super().__init__()
+        self.notifies = []
+
+    def poll(self):
+        pass
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.broadcaster import Broadcaster
+
+
+class FakeResponse:
+    status_code = 200
+
+
+class FakeSession:
+    def __init__(self):
+        self.payloads = []
+
+    def post(self, url, json, timeout):
+        self.payloads.append(json)
+        return FakeResponse()
+
+
+def make_broadcaster(**kwargs):
+    b = Broadcaster(url="http://go.invalid/api/broadcast", **kwargs)
+    session = FakeSession()
+    b._session = lambda: session
+    return b, session
+
+
+def test_batches_are_wrapped_single_events_are_not():
+    b, session = make_broadcaster()
+    event = {"type": "new_message", "channel_id": 1, "message": {}}
+    assert b.send_batch([event])
+    assert b.send_batch([event, event])
+    assert session.payloads[0] == event
+    assert session.payloads[1] == {"type": "batch", "events": [event, event]}
+    assert b.stats()["sent"] == 3
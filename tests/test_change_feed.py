@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.change_feed import Listener
+from conftest import FakeListener, Notify
+
+
+def test_feeds_share_one_connection_and_see_only_their_channels():
+    connections = []
+
+    def connect():
+        connections.append(FakeListener())
+        return connections[-1]
+
+    listener = Listener(connect)
+    graph, directory = listener.feed("graph"), listener.feed("directory", "graph")
+    assert graph.listen() and directory.listen()
+    assert len(connections) == 1
+    assert [sql for sql, _ in connections[0].cursor().executed] == ["LISTEN graph", "LISTEN directory"]
+
+    connections[0].notifies.extend([Notify(0, "graph", "1:2"), Notify(0, "directory", "7")])
+    assert graph.drain() == ["1:2"]
+    assert directory.drain() == ["1:2", "7"]
+    assert directory.drain() == []
+
+
+def test_a_lost_connection_resets_every_feed():
+    conn = FakeListener()
+    listener = Listener(lambda: conn)
+    first, second = listener.feed("a"), listener.feed("b")
+    first.listen()
+    second.listen()
+
+    def lost():
+        raise ConnectionError("server closed the connection")
+
+    conn.poll = lost
+    with pytest.raises(ConnectionError):
+        first.drain()
+    with pytest.raises(ConnectionError):
+        second.drain()
+    assert not first.listening and not second.listening
@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import channel_access
+from conftest import FakeCursor
+
+
+def setup_function():
+    channel_access.clear()
+
+
+def test_private_channel_requires_membership_and_is_cached():
+    cur = FakeCursor([(7, True, "member", None, False, None)])
+    access = channel_access.resolve(cur, 1, 10)
+    assert access.community_id == 7
+    assert not access.can_read and not access.can_write
+
+    channel_access.resolve(cur, 1, 10)
+    assert len(cur.executed) == 1
+
+
+def test_invalidation_forces_requery():
+    row = {
+        "community_id": 7, "is_private": True, "community_role": "member",
+        "channel_role": "member", "is_channel_member": True, "can_send_messages": False,
+    }
+    cur = FakeCursor([row], [row])
+    access = channel_access.resolve(cur, 1, 10)
+    assert access.can_read and not access.can_write
+
+    channel_access.invalidate_community(7)
+    channel_access.resolve(cur, 1, 10)
+    assert len(cur.executed) == 2
+
+
+def test_missing_channel_resolves_to_none():
+    assert channel_access.resolve(FakeCursor(), 1, 99) is None
@@ -0,0 +1,37 @@
+import os
+import sys
+import contextlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import channel_reads
+from algo.write_behind import WriteBehindBuffer
+from conftest import FakeConnection, FakeCursor
+
+
+def test_read_pointer_survives_a_failed_flush(monkeypatch):
+    conn, attempts = FakeConnection(), []
+
+    @contextlib.contextmanager
+    def borrow():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("PoolTimeout")
+        yield conn
+
+    monkeypatch.setattr(channel_reads.db, "borrow", borrow)
+    buffer = WriteBehindBuffer(channel_reads._flush_read_pointers, merge=max)
+    buffer._ensure_started = lambda: None
+    monkeypatch.setattr(channel_reads, "read_buffer", buffer)
+
+    channel_reads.mark_read(1, 2, 10)
+    assert buffer.flush() == 0
+    channel_reads.mark_read(1, 2, 8)  # an older pointer must not win over the requeued one
+    assert buffer.flush() == 1
+    assert conn.cursor().executed[0][1] == ([1], [2], [10])
+
+
+def test_read_pointer_is_capped_at_the_newest_message():
+    assert channel_reads.read_pointer(FakeCursor([(30,)]), 2) == 30
+    assert channel_reads.read_pointer(FakeCursor([(30,)]), 2, 25) == 25
+    assert channel_reads.read_pointer(FakeCursor([{"coalesce": 30}]), 2, 10**9) == 30
@@ -0,0 +1,90 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.change_feed import Listener
+from algo.connection_graph import NOTIFY_CHANNEL, ConnectionGraph, build_csr
+from conftest import FakeListener, Notify
+
+# 1 - 2 - 3, 1 - 4 - 3, 4 - 5, plus a duplicate 2 -> 1 row
+EDGES = [(1, 2), (2, 1), (2, 3), (1, 4), (4, 3), (4, 5)]
+
+
+class GraphCursor:
+    """Answers the graph's edge, pair-status and visibility queries from a set of accepted pairs."""
+
+    def __init__(self, accepted, private=()):
+        self.accepted = accepted
+        self.private = private
+
+    def execute(self, sql, params=None):
+        if "profile_visibility" in sql:
+            self.rows = [(user_id,) for user_id in self.private]
+        elif "unnest" in sql:
+            self.rows = [
+                (a, b, (a, b) in self.accepted or (b, a) in self.accepted)
+                for a, b in zip(*params)
+            ]
+        else:
+            self.rows = list(self.accepted)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def make_graph(accepted, private=()):
+    """A graph loaded through GraphCursor, the cursor to read it with, and its LISTEN connection."""
+    listener = FakeListener()
+    return ConnectionGraph(Listener(lambda: listener)), GraphCursor(accepted, private), listener
+
+
+def test_csr_is_symmetric_and_deduplicated():
+    user_ids, indptr, indices = build_csr([e[0] for e in EDGES], [e[1] for e in EDGES])
+
+    assert user_ids.tolist() == [1, 2, 3, 4, 5]
+    assert indices[indptr[0]:indptr[1]].tolist() == [1, 3]  # node of 1 -> nodes of 2 and 4
+    assert int(indptr[-1]) == 10
+
+
+def test_suggestions_rank_by_mutual_count():
+    graph, cur, _ = make_graph(set(EDGES))
+
+    assert graph.suggestions(cur, 1) == [(3, 2), (5, 1)]
+    assert graph.mutual(cur, 1, 3) == [2, 4]
+    assert graph.suggestions(cur, 99) == []
+
+
+def test_notified_pairs_update_the_delta_layer():
+    accepted = set(EDGES)
+    graph, cur, listener = make_graph(accepted)
+    graph.neighbors(cur, 1)
+
+    accepted.discard((4, 3))
+    accepted.add((5, 6))
+    listener.notifies.extend([Notify(0, NOTIFY_CHANNEL, "3:4"), Notify(0, NOTIFY_CHANNEL, "6:5")])
+
+    assert graph.neighbors(cur, 3) == [2]
+    assert graph.neighbors(cur, 6) == [5]
+    assert graph.mutual(cur, 1, 5) == [4]
+
+    listener.notifies.append(Notify(0, NOTIFY_CHANNEL, "4"))
+    assert graph.neighbors(cur, 1) == [2]
+    assert graph.stats()["full_loads"] == 1
+
+
+def test_paths_are_shortest_and_skip_hidden_hops():
+    chain = set(EDGES) | {(5, 6), (6, 7)}
+
+    graph, cur, _ = make_graph(chain)
+    assert graph.paths(cur, 1, 7) == {"degree": 4, "paths": [[1, 4, 5, 6, 7]], "truncated": False}
+    assert graph.paths(cur, 2, 4)["paths"] == [[2, 1, 4], [2, 3, 4]]
+    assert graph.paths(cur, 1, 7, max_depth=3)["degree"] is None
+
+    # 4 is hidden: it may not be a hop for 2, but 1 is connected to 4 and may use it
+    graph, cur, _ = make_graph(chain, private=[4])
+    assert graph.paths(cur, 2, 5)["degree"] is None
+    assert graph.paths(cur, 1, 5)["paths"] == [[1, 4, 5]]
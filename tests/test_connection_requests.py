@@ -0,0 +1,92 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import connection_requests
+from algo.pagination import encode_cursor, decode_cursor
+from conftest import FakeCursor
+
+
+def json_row(connection_id, user_id, first):
+    return {"connection_id": connection_id, "user_id": user_id, "request": "hi",
+            "firstname": first, "lastname": "Doe", "username": first.lower(), "pfp_path": None}
+
+
+def test_load_returns_viewer_counts_and_first_slices():
+    received = [json_row(9, 4, "Ada"), json_row(7, 5, "Alan"), json_row(3, 6, "Grace")]
+    cur = FakeCursor([("me", "Me", "Myself", "alumni", None, 12, 3, 0, received, [], [json_row(2, 8, "Bob")])])
+
+    page = connection_requests.load(cur, 1, limit=2)
+
+    assert page["current_user"] == ("me", "Me", "Myself", "alumni", None)
+    assert page["counts"] == {"accepted": 12, "received": 3, "sent": 0}
+    assert [item["user_id"] for item in page["lists"]["received"]["items"]] == [4, 5]
+    assert page["lists"]["received"]["items"][0]["message"] == "hi"
+    assert decode_cursor(page["lists"]["received"]["next_cursor"]) == [7]
+    assert page["lists"]["sent"] == {"items": [], "has_more": False, "next_cursor": None}
+    assert page["lists"]["accepted"]["items"][0]["connected_at"] == "Recently"
+    assert cur.params == {"user_id": 1, "limit": 3}
+
+
+def test_cursor_continues_one_list():
+    first = FakeCursor([("me", "Me", "Myself", "alumni", None, 0, 0, 2, [json_row(5, 2, "Ada"), json_row(4, 3, "Bob")])])
+    token = connection_requests.load(first, 1, ("sent",), limit=1)["lists"]["sent"]["next_cursor"]
+    cur = FakeCursor([("me", "Me", "Myself", "alumni", None, 0, 0, 2, [json_row(4, 3, "Bob")])])
+
+    connection_requests.load(cur, 1, ("sent",), cursor=token, limit=1)
+
+    assert cur.params["after"] == 5
+    assert "c.connection_id < %(after)s" in cur.sql
+    with pytest.raises(ValueError):
+        connection_requests.load(cur, 1, cursor=token)
+    with pytest.raises(ValueError):
+        connection_requests.load(cur, 1, ("blocked",))
+    for values in ([None], [[1]], ["x"]):
+        with pytest.raises(ValueError):
+            connection_requests.load(cur, 1, ("sent",), cursor=encode_cursor(*values))
+
+
+def test_respond_many_reports_each_request_and_accepted_pairs():
+    cur = FakeCursor([], [], [(10, 4), (12, 6)])
+
+    results, pairs = connection_requests.respond_many(cur, 1, [12, 10, 11, 10], "accept")
+
+    assert [(r["connection_id"], r["success"]) for r in results] == [(12, True), (10, True), (11, False)]
+    assert pairs == [(6, 1), (4, 1)]
+    assert cur.executed[2][1] == ("accepted", [10, 11, 12], 1)
+    assert connection_requests.respond_many(FakeCursor([], [], [(10, 4)]), 1, [10], "reject")[1] == []
+
+
+def test_bulk_calls_create_then_lock_counters_in_user_order_first():
+    cur = FakeCursor([], [], [(12, 6)])
+    connection_requests.cancel_many(cur, 1, [12, 10])
+    (create_sql, create_params), (lock_sql, lock_params) = cur.executed[:2]
+    assert "ON CONFLICT (user_id) DO NOTHING" in create_sql and "ORDER BY u.user_id" in create_sql
+    assert "FOR UPDATE" in lock_sql and "ORDER BY s.user_id" in lock_sql
+    assert create_params == lock_params == {"user_ids": [1], "connection_ids": [10, 12]}
+    assert cur.executed[2][1] == ([10, 12], 1)
+
+    cur = FakeCursor([], [], [(2, 40), (5, 41)])
+    connection_requests.send_many(cur, 3, [5, 2])
+    assert cur.executed[1][1] == {"user_ids": [2, 3, 5], "connection_ids": []}
+    assert cur.executed[2][1]["targets"] == [2, 5]
+
+
+def test_send_many_explains_each_failure():
+    # 2 inserted; 3 connected, 4 already sent, 5 sent to us, 6 missing, 1 is ourselves
+    cur = FakeCursor([], [], [(2, 40)], [(3, 3, "accepted"), (4, 1, "pending"), (5, 5, "pending")])
+
+    results = connection_requests.send_many(cur, 1, [2, 3, 4, 5, 6, 1], "hello")
+
+    assert results[0] == {"user_id": 2, "success": True, "connection_id": 40}
+    assert [r["message"] for r in results[1:]] == [
+        "Already connected",
+        "Connection request already sent",
+        "This user has already sent you a request",
+        "User not found",
+        "Cannot connect to yourself",
+    ]
+    assert cur.executed[3][1]["targets"] == [3, 4, 5, 6, 1]
@@ -0,0 +1,120 @@
+import os
+import sys
+
+import psycopg2
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import connection_stats, connection_requests
+from conftest import FakeCursor
+
+SCHEMA_SQL = os.path.join(os.path.dirname(__file__), '../app/db/schema.sql')
+
+
+# The trigger and the drift/rebuild SQL run against the PostgreSQL database
+# named by TEST_DATABASE_URL, and are skipped without one. Each test builds
+# connections and user_connection_stats from schema.sql in a scratch schema
+# and rolls everything back afterwards.
+@pytest.fixture
+def pg():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    with open(SCHEMA_SQL) as f:
+        schema = f.read()
+    # connections, its indexes, user_connection_stats and the counters trigger
+    schema = schema[schema.index("CREATE TABLE connections"):schema.index("CREATE TABLE education_details")]
+    conn = psycopg2.connect(url)
+    cur = conn.cursor()
+    try:
+        cur.execute("CREATE SCHEMA connection_stats_test")
+        cur.execute("SET LOCAL search_path TO connection_stats_test")
+        cur.execute("CREATE TABLE users (user_id INT PRIMARY KEY)")
+        cur.execute(schema)
+        cur.execute("INSERT INTO users SELECT generate_series(1, 6)")
+        yield cur
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def connect(cur, user_id, con_user_id, status="pending"):
+    cur.execute(
+        "INSERT INTO connections (user_id, con_user_id, status) VALUES (%s, %s, %s) RETURNING connection_id",
+        (user_id, con_user_id, status),
+    )
+    return cur.fetchone()[0]
+
+
+def stored(cur):
+    cur.execute("SELECT user_id, accepted, pending_in, pending_out FROM user_connection_stats ORDER BY user_id")
+    return {row[0]: row[1:] for row in cur.fetchall()}
+
+
+def test_trigger_follows_a_request_from_send_to_cancel(pg):
+    first = connect(pg, 1, 2)
+    connect(pg, 3, 1)
+    assert stored(pg) == {1: (0, 1, 1), 2: (0, 1, 0), 3: (0, 0, 1)}
+
+    pg.execute("UPDATE connections SET status = 'accepted' WHERE connection_id = %s", (first,))
+    pg.execute("UPDATE connections SET status = 'denied' WHERE user_id = 3")
+    assert stored(pg) == {1: (1, 0, 0), 2: (1, 0, 0), 3: (0, 0, 0)}
+
+    pg.execute("DELETE FROM connections WHERE connection_id = %s", (first,))
+    assert stored(pg) == {1: (0, 0, 0), 2: (0, 0, 0), 3: (0, 0, 0)}
+
+
+def test_denied_request_sent_again_flips_direction(pg):
+    # 2 asked 1, was denied; now 1 asks 2 and the same row is re-opened from 1's side
+    denied = connect(pg, 2, 1, "denied")
+    assert stored(pg) == {}
+
+    results = connection_requests.send_many(pg, 1, [2], "hi")
+
+    assert results == [{"user_id": 2, "success": True, "connection_id": denied}]
+    assert stored(pg) == {1: (0, 0, 1), 2: (0, 1, 0)}
+    assert connection_requests.respond_many(pg, 2, [denied], "accept")[1] == [(1, 2)]
+    assert stored(pg) == {1: (1, 0, 0), 2: (1, 0, 0)}
+
+
+def test_decrements_never_recreate_counter_rows(pg):
+    connect(pg, 1, 2, "accepted")
+    connect(pg, 3, 2)
+    pg.execute("DELETE FROM user_connection_stats WHERE user_id = 3")
+
+    pg.execute("DELETE FROM connections WHERE user_id = 3")
+    pg.execute("DELETE FROM users WHERE user_id = 1")  # cascades to the accepted connection
+
+    assert stored(pg) == {2: (0, 0, 0)}
+    assert connection_stats.find_drift(pg) == []
+
+
+def test_drift_is_found_and_rebuilt(pg):
+    connect(pg, 1, 2, "accepted")
+    connect(pg, 1, 3, "accepted")
+    connect(pg, 4, 1)
+    connect(pg, 2, 3)
+    connect(pg, 5, 2, "denied")
+    pg.execute("UPDATE user_connection_stats SET accepted = 9 WHERE user_id = 1")
+    pg.execute("DELETE FROM user_connection_stats WHERE user_id = 3")
+    pg.execute("INSERT INTO user_connection_stats (user_id, pending_in) VALUES (6, 2)")
+
+    assert connection_stats.find_drift(pg) == [
+        (1, (2, 1, 0), (9, 1, 0)),
+        (3, (1, 1, 0), (0, 0, 0)),
+        (6, (0, 0, 0), (0, 2, 0)),
+    ]
+    assert connection_stats.rebuild_counts(pg) == (1, 2)
+    assert connection_stats.find_drift(pg) == []
+    assert connection_stats.counts_for(pg, 2) == {"accepted": 1, "pending_in": 0, "pending_out": 1}
+
+
+def test_counts_for_defaults_to_zero_without_a_row():
+    assert connection_stats.counts_for(FakeCursor(), 7) == {"accepted": 0, "pending_in": 0, "pending_out": 0}
+
+
+def test_find_drift_accepts_dict_rows():
+    row = {"user_id": 4, "a": 2, "b": 0, "c": 1, "d": 3, "e": 0, "f": 1}
+
+    assert connection_stats.find_drift(FakeCursor([row])) == [(4, (2, 0, 1), (3, 0, 1))]
@@ -0,0 +1,53 @@
+import os
+import sys
+import datetime
+import contextlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import conversations
+from algo.pagination import encode_cursor
+from algo.write_behind import WriteBehindBuffer
+from conftest import FakeConnection, FakeCursor
+
+
+def test_read_receipt_survives_a_failed_flush(monkeypatch):
+    conn, attempts = FakeConnection(), []
+
+    @contextlib.contextmanager
+    def borrow():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("PoolTimeout")
+        yield conn
+
+    monkeypatch.setattr(conversations.db, "borrow", borrow)
+    buffer = WriteBehindBuffer(conversations._flush_read_pointers, merge=max)
+    buffer._ensure_started = lambda: None
+    monkeypatch.setattr(conversations, "read_buffer", buffer)
+
+    conversations.mark_read(1, 2, 10)
+    assert buffer.flush() == 0
+    conversations.mark_read(1, 2, 14)
+    assert buffer.flush() == 1
+    assert conn.cursor().executed[0][1] == ([1], [2], [14])
+
+
+def test_read_pointer_is_capped_at_the_newest_received_message():
+    assert conversations.read_pointer(FakeCursor([(12,)]), 1, 2) == 12
+    assert conversations.read_pointer(FakeCursor([(12,)]), 1, 2, 9) == 9
+    assert conversations.read_pointer(FakeCursor([(12,)]), 1, 2, 10**9) == 12
+
+
+def test_forward_page_looks_up_older_history():
+    at = datetime.datetime(2025, 9, 1, 12, 0)
+    after = encode_cursor(at, 5)
+    rows = [(6, 2, 1, "hi", at, "bob"), (7, 1, 2, "hey", at, "me")]
+
+    page = conversations.fetch_history(FakeCursor(rows, [(False,)]), 1, 2, after=after)
+    assert page["has_older"] is False and page["next_cursor"] is None
+    assert page["has_newer"] is False
+
+    cur = FakeCursor([], [(True,)])
+    assert conversations.fetch_history(cur, 1, 2, after=after)["has_older"] is True
+    assert "<= (" in cur.sql and cur.params == (1, 2, at, 5)
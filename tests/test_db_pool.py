@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+import time
+import flask
+import pytest
+import psycopg2.extensions
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import db
+from algo.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Minimal stand-in for a psycopg2 connection."""
+
+    def __init__(self):
+        self.closed = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        raise AssertionError("ping should not run in these tests")
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    kwargs.setdefault("ping_after", None)
+    return ConnectionPool(FakeConnection, **kwargs)
+
+
+def test_reuses_returned_connection():
+    pool = make_pool(minconn=1, maxconn=2)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert pool.stats()["size"] == 1
+
+
+def test_times_out_when_exhausted():
+    pool = make_pool(minconn=0, maxconn=1, timeout=0.05)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+
+
+def test_waiter_receives_returned_connection():
+    pool = make_pool(minconn=0, maxconn=1, timeout=2)
+    conn = pool.getconn()
+    threading.Timer(0.05, pool.putconn, args=(conn,)).start()
+    assert pool.getconn() is conn
+
+
+def test_discards_closed_and_expired_connections():
+    pool = make_pool(minconn=0, maxconn=1, max_age=0.01)
+    conn = pool.getconn()
+    conn.close()
+    pool.putconn(conn)
+    assert pool.stats()["size"] == 0
+
+    fresh = pool.getconn()
+    assert fresh is not conn
+    time.sleep(0.02)
+    pool.putconn(fresh)
+    assert pool.stats()["size"] == 0
+
+
+def test_rolls_back_open_transaction_on_return():
+    pool = make_pool(minconn=0, maxconn=1)
+    conn = pool.getconn()
+    conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.rollbacks == 1
+    assert pool.getconn() is conn
+
+
+def test_request_connection_returns_to_the_pool_it_came_from(monkeypatch):
+    app = flask.Flask(__name__)
+    old, new = make_pool(minconn=0, maxconn=1), make_pool(minconn=0, maxconn=1)
+    monkeypatch.setattr(db, "pool", old)
+    with app.app_context():
+        conn = db.get_db()
+        old.closeall()
+        monkeypatch.setattr(db, "pool", new)  # as init_db_pool() would
+        db.close_db()
+    assert conn.closed
+    assert old.stats()["size"] == 0 and new.stats()["size"] == 0
+
+
+def test_borrow_requires_an_initialized_pool(monkeypatch):
+    monkeypatch.setattr(db, "pool", None)
+    with pytest.raises(RuntimeError):
+        with db.borrow():
+            pass
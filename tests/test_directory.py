@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import directory
+from algo.pagination import decode_cursor
+from conftest import FakeCursor
+
+
+def row(user_id, first, last, out=(None, None), incoming=(None, None)):
+    return (user_id, first, last, first.lower(), "MIT", 2020, None, "/p.png", "alumni",
+            "Acme", "Engineer", "Music, Travel", *out, *incoming)
+
+
+def test_pages_are_keyed_on_name_and_id():
+    cur = FakeCursor([row(3, "Ada", "Byron"), row(5, "Alan", "Turing"), row(8, "Grace", "Hopper")])
+
+    page = directory.search(cur, 1, {}, limit=2)
+
+    assert [p["id"] for p in page["people"]] == [3, 5]
+    assert page["has_more"]
+    assert decode_cursor(page["next_cursor"]) == ["Turing", "Alan", 5]
+
+    next_cur = FakeCursor([])
+    directory.search(next_cur, 1, {}, cursor=page["next_cursor"], limit=2)
+    assert (next_cur.params["c_last"], next_cur.params["c_first"], next_cur.params["c_id"]) == ("Turing", "Alan", 5)
+
+
+def test_filters_and_words_become_bound_predicates():
+    cur = FakeCursor([])
+
+    directory.search(cur, 1, {"university": "Oxford", "city": "", "q": "ada 100%_", "company": "Acme"})
+
+    assert cur.params["university"] == "Oxford"
+    assert "city" not in cur.params
+    assert cur.params["company"] == "%acme%"
+    assert cur.params["word_0"] == "%ada%"
+    assert cur.params["word_1"] == "%100\\%\\_%"
+    assert "Oxford" not in cur.sql
+
+
+def test_connection_status_from_either_direction():
+    mine = directory.person_from_row(row(2, "A", "B", out=("pending", 11)))
+    theirs = directory.person_from_row(row(2, "A", "B", incoming=("pending", 12)))
+    accepted = directory.person_from_row(row(2, "A", "B", incoming=("accepted", 13)))
+
+    assert (mine["connection_status"], mine["connection_id"]) == ("pending", 11)
+    assert (theirs["connection_status"], theirs["connection_id"]) == ("received_request", 12)
+    assert accepted["connection_status"] == "connected" and "connection_id" not in accepted
+    assert mine["location"] == "Not specified"
+    assert mine["interests"] == ["Music", "Travel"]
@@ -0,0 +1,77 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.change_feed import Listener
+from algo.directory_index import FacetIndex
+from conftest import FakeListener, Notify
+
+USERS = {
+    1: (1, "verified", "MIT", 2020, "Boston", "alumni"),
+    2: (2, "verified", "MIT", 2021, "Austin", "student"),
+    3: (3, "verified", "Yale", 2020, "Boston", "alumni"),
+    4: (4, "pending", "Yale", 2022, None, "student"),
+}
+
+
+class UsersCursor:
+    """Serves USERS to the index's full load and per-user patch queries."""
+
+    def execute(self, sql, params=None):
+        if "ANY" in sql:
+            self.rows = [USERS[i] for i in params[0] if i in USERS]
+        else:
+            self.rows = [row for row in USERS.values() if row[1] == "verified"]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def make_index():
+    listener = FakeListener()
+    return FacetIndex(Listener(lambda: listener)), listener
+
+
+def values(result, facet):
+    return {item["value"]: item["count"] for item in result["facets"][facet]}
+
+
+def test_each_facet_ignores_its_own_selection():
+    index, _ = make_index()
+
+    result = index.counts(UsersCursor(), 99, {"university": "MIT", "city": ""})
+
+    assert result["total"] == 2
+    assert values(result, "university") == {"MIT": 2, "Yale": 1}
+    assert values(result, "city") == {"Boston": 1, "Austin": 1}
+    assert [item["value"] for item in result["facets"]["graduation_year"]] == [2021, 2020]
+
+
+def test_notified_users_are_patched_in_place(monkeypatch):
+    index, listener = make_index()
+    index.counts(UsersCursor(), 99)
+
+    monkeypatch.setitem(USERS, 4, (4, "verified", "Yale", 2022, "Denver", "student"))
+    monkeypatch.setitem(USERS, 2, (2, "rejected", "MIT", 2021, "Austin", "student"))
+    listener.notifies.extend([Notify(0, "directory_changes", "4"), Notify(0, "directory_changes", "2")])
+
+    result = index.counts(UsersCursor(), 99)
+
+    assert result["total"] == 3
+    assert values(result, "city") == {"Boston": 2, "Denver": 1}
+    assert index.stats()["full_loads"] == 1
+    assert index.stats()["patched_users"] == 2
+
+
+def test_counts_leave_out_the_viewer_like_the_directory_list():
+    index, _ = make_index()
+
+    result = index.counts(UsersCursor(), 1, {"university": "MIT"})
+
+    assert result["total"] == 1
+    assert values(result, "university") == {"MIT": 1, "Yale": 1}
+    assert values(result, "city") == {"Austin": 1}
@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import event_hub
+from algo.event_hub import EventHub
+
+
+def make_hub():
+    hub = EventHub(connect=None)
+    hub._ensure_started = lambda: None  # no listener thread in tests
+    return hub
+
+
+def test_publish_fans_out_to_channel_subscribers_only():
+    hub = make_hub()
+    a = hub.subscribe(1)
+    b = hub.subscribe(1)
+    other = hub.subscribe(2)
+
+    hub.publish({"channel_id": 1, "type": "new_message", "message": {"message_id": 5}})
+
+    assert a.get(timeout=0)["message"]["message_id"] == 5
+    assert b.get(timeout=0)["message"]["message_id"] == 5
+    assert other.get(timeout=0) is None
+
+
+def test_slow_subscriber_is_marked_overflowed(monkeypatch):
+    monkeypatch.setattr(event_hub, "SUBSCRIBER_QUEUE_SIZE", 1)
+    hub = make_hub()
+    sub = hub.subscribe(1)
+
+    hub.publish({"channel_id": 1, "type": "new_message", "message": {}})
+    hub.publish({"channel_id": 1, "type": "new_message", "message": {}})
+
+    assert sub.overflowed
+    hub.unsubscribe(sub)
+    assert hub.subscriber_count() == 0
@@ -0,0 +1,60 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.outbox import ENQUEUE_LOCK_SPACE, OutboxRelay, enqueue
+from conftest import FakeCursor
+
+
+class FakeOutboxCursor:
+    """Serves pending rows to SELECTs and records delivered ids from UPDATEs."""
+
+    def __init__(self, rows):
+        self.pending = list(rows)
+        self.delivered = []
+        self._result = []
+
+    def execute(self, sql, params=None):
+        if sql.lstrip().startswith("SELECT"):
+            self._result = self.pending[: params[0]]
+        elif sql.lstrip().startswith("UPDATE"):
+            ids = params[0]
+            self.delivered.extend(ids)
+            self.pending = [row for row in self.pending if row[0] not in ids]
+
+    def fetchall(self):
+        return self._result
+
+
+ROWS = [
+    (1, 10, "new_message", {"message_id": 1}),
+    (2, 11, "new_message", {"message_id": 2}),
+    (3, 10, "new_message", {"message_id": 3}),
+]
+
+
+def test_drain_delivers_in_outbox_order():
+    sent = []
+    relay = OutboxRelay(connect=None, sender=lambda events: sent.extend(events) or True, batch_size=2)
+    cur = FakeOutboxCursor(ROWS)
+    assert relay.drain(cur) == 3
+    assert [e["message"]["message_id"] for e in sent] == [1, 2, 3]
+    assert cur.delivered == [1, 2, 3]
+
+
+def test_failed_delivery_leaves_rows_pending(monkeypatch):
+    monkeypatch.setattr("algo.outbox.time.sleep", lambda seconds: None)
+    relay = OutboxRelay(connect=None, sender=lambda events: False)
+    cur = FakeOutboxCursor(ROWS)
+    assert relay.drain(cur) == 0
+    assert cur.delivered == []
+    assert len(cur.pending) == 3
+
+
+def test_enqueue_locks_the_channel_before_inserting():
+    cur = FakeCursor([], [(7,)])
+    assert enqueue(cur, 10, "message_edited", {"message_id": 1}) == 7
+    assert "pg_advisory_xact_lock" in cur.executed[0][0]
+    assert cur.executed[0][1] == (ENQUEUE_LOCK_SPACE, 10)
+    assert "INSERT INTO realtime_outbox" in cur.sql
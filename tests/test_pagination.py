@@ -0,0 +1,36 @@
+import os
+import sys
+import datetime
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.pagination import encode_cursor, decode_cursor, decode_time_cursor, page_limit
+
+
+def test_cursor_round_trip():
+    created_at = datetime.datetime(2025, 9, 1, 12, 30, 5, 123456)
+    token = encode_cursor(created_at, 42)
+    assert "=" not in token
+    assert decode_cursor(token, size=2) == ["2025-09-01T12:30:05.123456", 42]
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(1, 2, 3), size=2)
+
+
+def test_time_cursor_values_are_parsed():
+    created_at = datetime.datetime(2025, 9, 1, 12, 30, 5)
+    assert decode_time_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    for values in (("x", "y"), (None, None), (created_at, [1])):
+        with pytest.raises(ValueError):
+            decode_time_cursor(encode_cursor(*values))
+
+
+def test_page_limit_is_clamped():
+    assert page_limit(None) == 50
+    assert page_limit(0) == 1
+    assert page_limit(500) == 100
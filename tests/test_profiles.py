@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.change_feed import Listener
+from algo.profiles import ProfileCache
+from conftest import FakeListener, Notify
+
+
+class ProfileCursor:
+    """Answers load_profile() and load_viewer() from a list of users rows."""
+
+    def __init__(self, users):
+        self.users = users
+        self.queries = 0
+
+    def execute(self, sql, params=None):
+        self.queries += 1
+        if isinstance(params, dict):
+            matches = [u for u in self.users if u[4] == params["username"]]
+            matches += [u for u in self.users if u[0] == params["fallback_id"]]
+            # users row, interests, education, work, connection count, community
+            self.row = tuple(matches[0]) + (["AI"], None, [], 2, None) if matches else None
+        else:
+            self.row = next((u for u in self.users if u[0] == params[0]), None)
+
+    def fetchone(self):
+        return self.row
+
+
+def user(user_id, username):
+    return (user_id, "First", "Last", f"{username}@x.io", username) + (None,) * 13
+
+
+def test_profiles_are_cached_and_invalidated_by_notifications():
+    cur = ProfileCursor([user(1, "ada"), user(2, "bob")])
+    listener = FakeListener()
+    cache = ProfileCache(Listener(lambda: listener))
+
+    profile = cache.profile(cur, "ada", 2)
+    assert profile["user_data"][0] == 1
+    assert profile["user_interests"] == ["AI"]
+    assert profile["connections_count"] == 2
+    assert cache.profile(cur, "ada", 2) is profile
+    assert cur.queries == 1
+
+    # A connection accepted between 1 and 3 is broadcast as "1:3"
+    listener.notifies.append(Notify(0, "connection_changes", "1:3"))
+    cache.profile(cur, "ada", 2)
+    assert cur.queries == 2
+
+    cache.invalidate(1)
+    cache.profile(cur, "ada", 2)
+    assert cur.queries == 3
+
+
+def test_display_name_falls_back_to_viewer_without_caching():
+    cur = ProfileCursor([user(1, "ada"), user(2, "bob")])
+    cache = ProfileCache(Listener(FakeListener))
+
+    assert cache.profile(cur, "Bob Builder", 2)["user_data"][4] == "bob"
+    assert cache.profile(cur, "Nobody", None) is None
+    assert cache.viewer(cur, 2)[4] == "bob"
+    assert cache.stats()["profiles"] == 0
+    assert cache.stats()["viewers"] == 1
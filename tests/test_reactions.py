@@ -0,0 +1,25 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import reactions
+from conftest import FakeCursor
+
+
+def test_counts_for_groups_counters_by_message():
+    cur = FakeCursor([(1, "👍", 3), (1, "🎉", 1), (2, "👍", 7)])
+
+    counts = reactions.counts_for(cur, [1, 2])
+
+    assert counts == {
+        1: [{"emoji": "👍", "count": 3}, {"emoji": "🎉", "count": 1}],
+        2: [{"emoji": "👍", "count": 7}],
+    }
+    assert "message_reaction_counts" in cur.executed[0][0]
+
+
+def test_counts_for_skips_query_without_messages():
+    cur = FakeCursor([])
+    assert reactions.counts_for(cur, []) == {}
+    assert cur.executed == []
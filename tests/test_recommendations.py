@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.change_feed import Listener
+from algo.recommendations import FeatureMatrix, RecommendationModel, top_matches
+from conftest import FakeCursor, FakeListener
+
+USERS = [
+    (1, "verified", "student", "MIT", "Boston", 2024, None),
+    (2, "verified", "alumni", "MIT", "Boston", 2015, "acme"),
+    (3, "verified", "alumni", "Yale", "Denver", 2010, "acme"),
+    (4, "verified", "student", "MIT", "Boston", 2024, None),
+    (5, "pending", "alumni", "MIT", "Boston", 2024, None),
+]
+INTERESTS = [(1, 1), (1, 2), (2, 1), (2, 2), (3, 3), (4, 3), (5, 1)]
+
+
+def ranked_ids(features, row, **kwargs):
+    return [int(features.user_ids[i]) for i, _ in top_matches(features, row, **kwargs)]
+
+
+def test_similar_verified_users_rank_first():
+    features = FeatureMatrix(USERS, INTERESTS)
+    me = features.positions[1]
+
+    assert ranked_ids(features, me) == [2, 4]
+    assert ranked_ids(features, me, mode="mentors") == [2]
+    # Same university and city, same year, capped mutual bonus: 2 + 1 + 1 + 1.5
+    assert dict(top_matches(features, me, mutual={4: 9}))[features.positions[4]] == 5.5
+    assert ranked_ids(features, me, exclude={2}) == [4]
+    assert features.reasons(me, features.positions[2], 1) == [
+        "2 shared interests", "Same university", "Same city", "1 mutual connection"
+    ]
+
+
+def test_updates_replace_rows_and_interests():
+    features = FeatureMatrix(USERS, INTERESTS)
+
+    features.update([(3, "verified", "alumni", "MIT", "Boston", 2024, None), (6, "verified", "staff", None, None, None, None)],
+                    [(3, 1), (3, 2), (3, 40)])
+    features.deactivate({2})
+
+    me = features.positions[1]
+    assert ranked_ids(features, me) == [3, 4]
+    assert features.interests.shape == (6, 41)
+    assert features.reasons(me, features.positions[3])[0] == "2 shared interests"
+
+
+class NoConnections:
+    def neighbors(self, cur, user_id):
+        return []
+
+    def suggestions(self, cur, user_id, limit=20):
+        return []
+
+
+def test_model_loads_through_the_request_cursor():
+    model = RecommendationModel(Listener(FakeListener), NoConnections())
+    cur = FakeCursor(USERS, INTERESTS)
+
+    assert [match["user_id"] for match in model.recommend(cur, 1)] == [2, 4]
+    assert len(cur.executed) == 2
+    assert model.recommend(cur, 1, limit=1)[0]["user_id"] == 2
+    assert model.stats()["cache_hits"] == 1
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import search
+from algo.pagination import encode_cursor, decode_cursor
+from conftest import FakeCursor
+
+COLUMNS = [("message_id",), ("rank",), ("snippet",)]
+
+
+def test_snippets_are_escaped_before_highlighting():
+    snippet = f"<script>x</script> {search._START}launch{search._STOP} day"
+    assert search._highlight(snippet) == "&lt;script&gt;x&lt;/script&gt; <mark>launch</mark> day"
+
+
+def test_pages_are_keyed_on_rank_and_message_id():
+    cur = FakeCursor([(9, 0.5, "a"), (7, 0.5, "b"), (3, 0.1, "c")], description=COLUMNS)
+
+    page = search.search_direct_messages(cur, 1, "launch", limit=2)
+
+    assert [r["message_id"] for r in page["results"]] == [9, 7]
+    assert page["has_more"]
+    assert decode_cursor(page["next_cursor"]) == [0.5, 7]
+
+    next_cur = FakeCursor([], description=COLUMNS)
+    search.search_direct_messages(next_cur, 1, "launch", cursor=page["next_cursor"], limit=2)
+    assert next_cur.params[-5:-3] == [0.5, 7]
+
+
+def test_cursor_values_that_do_not_parse_are_rejected():
+    for values in ([None, None], ["x", 7], [0.5, [1]]):
+        with pytest.raises(ValueError):
+            search.search_direct_messages(FakeCursor(description=COLUMNS), 1, "launch", cursor=encode_cursor(*values))
@@ -0,0 +1,57 @@
+import os
+import sys
+from flask import Flask, g
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo import sql_metrics
+
+
+def test_fingerprint_ignores_literals_and_whitespace():
+    a = "SELECT * FROM users WHERE user_id = %s"
+    b = "SELECT *\n    FROM users\n    WHERE user_id = 42"
+    assert sql_metrics.fingerprint(a) == sql_metrics.fingerprint(b)
+    assert sql_metrics.fingerprint(a) != sql_metrics.fingerprint("SELECT * FROM messages")
+
+
+def test_repeated_fingerprints_are_flagged():
+    stats = sql_metrics.QueryStats()
+    stats.record("SELECT 1 FROM channels", 0.001)
+    for user_id in range(4):
+        stats.record(f"SELECT username FROM users WHERE user_id = {user_id}", 0.002)
+    assert stats.count == 5
+    assert stats.distinct == 2
+    repeated = stats.repeated(threshold=3)
+    assert len(repeated) == 1
+    assert repeated[0]["count"] == 4
+
+
+def test_server_timing_header_is_emitted():
+    app = Flask(__name__)
+    sql_metrics.init_app(app)
+
+    @app.route("/")
+    def index():
+        sql_metrics._current_stats().record("SELECT 1", 0.0125)
+        return "ok"
+
+    response = app.test_client().get("/")
+    assert response.headers["Server-Timing"] == 'db;dur=12.50;desc="1 queries, 1 distinct"'
+
+
+def test_settings_are_read_when_the_app_is_set_up(monkeypatch):
+    monkeypatch.setattr(sql_metrics, "ENABLED", True)
+    monkeypatch.setattr(sql_metrics, "N_PLUS_ONE_THRESHOLD", 3)
+    monkeypatch.setenv("SQL_N_PLUS_ONE_THRESHOLD", "5")
+    app = Flask(__name__)
+    app.config["SQL_INSTRUMENTATION"] = "false"
+    sql_metrics.init_app(app)
+
+    @app.route("/")
+    def index():
+        sql_metrics._current_stats().record("SELECT 1", 0.0125)
+        return "ok"
+
+    assert "Server-Timing" not in app.test_client().get("/").headers
+    assert not sql_metrics.ENABLED
+    assert sql_metrics.N_PLUS_ONE_THRESHOLD == 5
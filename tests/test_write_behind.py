@@ -0,0 +1,77 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../app/src')))
+
+from algo.write_behind import WriteBehindBuffer
+
+
+def make_buffer(**kwargs):
+    flushed = []
+    buffer = WriteBehindBuffer(flushed.append, **kwargs)
+    buffer._ensure_started = lambda: None  # flush manually in tests
+    return buffer, flushed
+
+
+def test_toggles_on_same_key_cancel_out():
+    buffer, flushed = make_buffer(merge=lambda pending, new: None)
+
+    buffer.add((1, 7, "👍"))
+    buffer.add((1, 7, "👍"))
+    buffer.add((1, 7, "👍"))
+    buffer.add((1, 8, "👍"))
+    buffer.add((1, 8, "👍"))
+
+    assert buffer.flush() == 1
+    assert flushed == [{(1, 7, "👍"): True}]
+    assert buffer.stats()["coalesced"] == 2
+
+
+def test_failed_flush_is_retried_and_the_toggle_still_lands():
+    flushed, calls = [], []
+
+    def flaky(batch):
+        calls.append(dict(batch))
+        if len(calls) == 1:
+            raise RuntimeError("PoolTimeout")
+        flushed.append(batch)
+
+    buffer = WriteBehindBuffer(flaky, merge=lambda pending, new: None)
+    buffer._ensure_started = lambda: None
+    buffer.add((1, 7, "👍"))
+
+    assert buffer.flush() == 0
+    assert buffer.stats()["pending"] == 1
+    assert buffer.flush() == 1
+    assert flushed == [{(1, 7, "👍"): True}]
+    assert buffer.stats()["failed_keys"] == 0
+
+
+def test_requeued_batch_merges_with_newer_writes():
+    def fail_while_a_newer_write_arrives(batch):
+        buffer.add("a", 5)
+        buffer.add("b", 1)
+        raise RuntimeError("db down")
+
+    buffer = WriteBehindBuffer(fail_while_a_newer_write_arrives, merge=max)
+    buffer._ensure_started = lambda: None
+    buffer.add("a", 7)
+
+    assert buffer.flush() == 0
+    assert buffer._pending == {"a": 7, "b": 1}
+
+
+def test_keys_are_dropped_after_max_retries():
+    def explode(batch):
+        raise RuntimeError("db down")
+
+    buffer = WriteBehindBuffer(explode, max_retries=2)
+    buffer._ensure_started = lambda: None
+    buffer.add("a", 3)
+
+    for _ in range(3):
+        assert buffer.flush() == 0
+    stats = buffer.stats()
+    assert stats["failed_keys"] == 1
+    assert stats["retried_keys"] == 2
+    assert stats["pending"] == 0